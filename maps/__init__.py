@@ -0,0 +1 @@
+"""KartRush map tooling: editor, map I/O and offline bakes."""
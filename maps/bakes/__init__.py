@@ -0,0 +1 @@
+"""Offline bakes computed from a map document at export/compile time."""
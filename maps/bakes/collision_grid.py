@@ -0,0 +1,302 @@
+"""Uniform-grid broadphase for wall collisions (``collisionGrid``).
+
+``Room.checkWallCollisions`` tests every segment of every continuous curve for
+every player on every tick. This bake splits the track into square cells and
+lists, for each cell, the ``(curve, segment)`` pairs whose capsule of radius
+``WALL_CLEARANCE`` (kart radius + 4) overlaps the cell, so a kart only has to
+test the segments of the cell it is in.
+
+Stored layout (CSR, every array flat)::
+
+    "collisionGrid": {
+      "cellSize": 100, "originX": -100, "originY": -100, "cols": 18, "rows": 13,
+      "radius": 24,
+      "cellStart": [...],   # cols * rows + 1 offsets, in (curve, segment) pairs
+      "segments": [...]     # curve0, segment0, curve1, segment1, ...
+    }
+
+Cell ``(col, row)`` is ``row * cols + col``; its pairs are
+``segments[2 * cellStart[k]:2 * cellStart[k + 1]]``, sorted by curve then
+segment, i.e. in the brute-force loop order. A position outside the grid can
+not touch any wall. When the curves carry a ``tessellated`` polyline (the
+``tessellate`` bake), it is the collision geometry and segment indices refer
+to it (``collision_points``).
+"""
+
+import math
+import random
+import sys
+import time
+
+from maps.game_config import COLLISION_GRID_SIZE, TRACK_HEIGHT, TRACK_WIDTH, WALL_CLEARANCE
+
+# Marge ajoutée au rayon pendant le bake : une position arrondie à la frontière
+# d'une cellule doit toujours retrouver les segments de sa cellule
+BAKE_MARGIN = 1e-3
+
+
+def collision_points(curve):
+    """Polyline a continuous curve collides with: ``tessellated`` when baked, else ``points``"""
+    return curve.get("tessellated") or curve.get("points", [])
+
+
+def wall_segments(continuous_curves):
+    """Yield ``(curve, segment, x1, y1, x2, y2)`` in checkWallCollisions order.
+
+    Segments follow ``collision_points``. Closed curves wrap the last point to
+    the first, zero-length segments are skipped like the server does.
+    """
+    for ci, curve in enumerate(continuous_curves):
+        points = collision_points(curve)
+        count = len(points)
+        closed = curve.get("closed", False)
+        segment_count = count if closed else count - 1
+        for i in range(segment_count):
+            x1, y1 = points[i]
+            x2, y2 = points[(i + 1) % count if closed else i + 1]
+            if x1 == x2 and y1 == y2:
+                continue
+            yield ci, i, x1, y1, x2, y2
+
+
+def segment_hit(x1, y1, x2, y2, kx, ky, min_dist_sq):
+    """Exact server test: is (kx, ky) closer than sqrt(min_dist_sq) to the segment?"""
+    dx = x2 - x1
+    dy = y2 - y1
+    seg_len_sq = dx * dx + dy * dy
+    if seg_len_sq == 0:
+        return False
+    t = ((kx - x1) * dx + (ky - y1) * dy) / seg_len_sq
+    t = max(0, min(1, t))
+    dist_x = kx - (x1 + t * dx)
+    dist_y = ky - (y1 + t * dy)
+    return dist_x * dist_x + dist_y * dist_y < min_dist_sq
+
+
+def _point_segment_distance_sq(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    seg_len_sq = dx * dx + dy * dy
+    t = 0.0 if seg_len_sq == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / seg_len_sq))
+    ex = px - (x1 + t * dx)
+    ey = py - (y1 + t * dy)
+    return ex * ex + ey * ey
+
+
+def _point_box_distance_sq(px, py, left, top, right, bottom):
+    ex = left - px if px < left else px - right if px > right else 0.0
+    ey = top - py if py < top else py - bottom if py > bottom else 0.0
+    return ex * ex + ey * ey
+
+
+def _segment_crosses_box(x1, y1, x2, y2, left, top, right, bottom):
+    """Liang-Barsky clipping: does the segment enter the box?"""
+    t0, t1 = 0.0, 1.0
+    dx = x2 - x1
+    dy = y2 - y1
+    for p, q in ((-dx, x1 - left), (dx, right - x1), (-dy, y1 - top), (dy, bottom - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            r = q / p
+            if p < 0:
+                if r > t1:
+                    return False
+                t0 = max(t0, r)
+            else:
+                if r < t0:
+                    return False
+                t1 = min(t1, r)
+    return True
+
+
+def segment_box_distance_sq(x1, y1, x2, y2, left, top, right, bottom):
+    """Squared distance between a segment and an axis-aligned box"""
+    if _segment_crosses_box(x1, y1, x2, y2, left, top, right, bottom):
+        return 0.0
+    return min(
+        _point_box_distance_sq(x1, y1, left, top, right, bottom),
+        _point_box_distance_sq(x2, y2, left, top, right, bottom),
+        _point_segment_distance_sq(left, top, x1, y1, x2, y2),
+        _point_segment_distance_sq(right, top, x1, y1, x2, y2),
+        _point_segment_distance_sq(left, bottom, x1, y1, x2, y2),
+        _point_segment_distance_sq(right, bottom, x1, y1, x2, y2),
+    )
+
+
+def bake_collision_grid(continuous_curves, cell_size=COLLISION_GRID_SIZE, radius=WALL_CLEARANCE):
+    """Build the ``collisionGrid`` section for a list of continuous curves"""
+    segments = list(wall_segments(continuous_curves))
+    reach = radius + BAKE_MARGIN
+
+    min_x, min_y, max_x, max_y = 0, 0, TRACK_WIDTH, TRACK_HEIGHT
+    for _, _, x1, y1, x2, y2 in segments:
+        min_x = min(min_x, x1 - reach, x2 - reach)
+        min_y = min(min_y, y1 - reach, y2 - reach)
+        max_x = max(max_x, x1 + reach, x2 + reach)
+        max_y = max(max_y, y1 + reach, y2 + reach)
+    origin_x = math.floor(min_x / cell_size) * cell_size
+    origin_y = math.floor(min_y / cell_size) * cell_size
+    cols = max(1, math.ceil((max_x - origin_x) / cell_size))
+    rows = max(1, math.ceil((max_y - origin_y) / cell_size))
+
+    cells = [[] for _ in range(cols * rows)]
+    reach_sq = reach * reach
+    for ci, si, x1, y1, x2, y2 in segments:
+        col0 = max(0, int((min(x1, x2) - reach - origin_x) // cell_size))
+        col1 = min(cols - 1, int((max(x1, x2) + reach - origin_x) // cell_size))
+        row0 = max(0, int((min(y1, y2) - reach - origin_y) // cell_size))
+        row1 = min(rows - 1, int((max(y1, y2) + reach - origin_y) // cell_size))
+        for row in range(row0, row1 + 1):
+            top = origin_y + row * cell_size
+            for col in range(col0, col1 + 1):
+                left = origin_x + col * cell_size
+                if segment_box_distance_sq(x1, y1, x2, y2, left, top,
+                                           left + cell_size, top + cell_size) <= reach_sq:
+                    cells[row * cols + col].append((ci, si))
+
+    cell_start = [0]
+    flat = []
+    for cell in cells:
+        for ci, si in cell:
+            flat.append(ci)
+            flat.append(si)
+        cell_start.append(len(flat) // 2)
+
+    return {
+        "cellSize": cell_size,
+        "originX": origin_x,
+        "originY": origin_y,
+        "cols": cols,
+        "rows": rows,
+        "radius": radius,
+        "cellStart": cell_start,
+        "segments": flat
+    }
+
+
+def grid_candidates(grid, x, y):
+    """Return the flat (curve, segment) slice of the cell containing (x, y)"""
+    cell_size = grid["cellSize"]
+    col = math.floor((x - grid["originX"]) / cell_size)
+    row = math.floor((y - grid["originY"]) / cell_size)
+    if col < 0 or row < 0 or col >= grid["cols"] or row >= grid["rows"]:
+        return ()
+    k = row * grid["cols"] + col
+    start = grid["cellStart"]
+    return grid["segments"][2 * start[k]:2 * start[k + 1]]
+
+
+def query_collision_grid(grid, continuous_curves, x, y, radius=WALL_CLEARANCE):
+    """Segments checkWallCollisions would hit at (x, y), using the grid.
+
+    Returns ``[(curve, segment), ...]``: the first hit segment of each curve,
+    in curve order, exactly like the brute-force loop with its per-curve break.
+    """
+    if radius > grid["radius"]:
+        raise ValueError(f"grille calculée pour un rayon {grid['radius']}, demandé {radius}")
+    min_dist_sq = radius * radius
+    candidates = grid_candidates(grid, x, y)
+    hits = []
+    last_curve = -1
+    for k in range(0, len(candidates), 2):
+        ci = candidates[k]
+        if ci == last_curve:
+            continue
+        si = candidates[k + 1]
+        points = collision_points(continuous_curves[ci])
+        x1, y1 = points[si]
+        x2, y2 = points[(si + 1) % len(points)]
+        if segment_hit(x1, y1, x2, y2, x, y, min_dist_sq):
+            hits.append((ci, si))
+            last_curve = ci
+    return hits
+
+
+def brute_force_hits(continuous_curves, x, y, radius=WALL_CLEARANCE):
+    """Reference: the server's full loop over every segment"""
+    min_dist_sq = radius * radius
+    hits = []
+    last_curve = -1
+    for ci, si, x1, y1, x2, y2 in wall_segments(continuous_curves):
+        if ci != last_curve and segment_hit(x1, y1, x2, y2, x, y, min_dist_sq):
+            hits.append((ci, si))
+            last_curve = ci
+    return hits
+
+
+def sample_positions(grid, continuous_curves, count, seed=0):
+    """Random test positions: uniform over the grid, near walls and on cell borders"""
+    rng = random.Random(seed)
+    segments = list(wall_segments(continuous_curves))
+    cell_size = grid["cellSize"]
+    width = grid["cols"] * cell_size
+    height = grid["rows"] * cell_size
+    positions = []
+    for n in range(count):
+        kind = n % 3
+        if kind == 0 or not segments:
+            x = grid["originX"] - cell_size + rng.random() * (width + 2 * cell_size)
+            y = grid["originY"] - cell_size + rng.random() * (height + 2 * cell_size)
+        elif kind == 1:
+            _, _, x1, y1, x2, y2 = rng.choice(segments)
+            t = rng.random()
+            spread = grid["radius"] * 1.5
+            x = x1 + t * (x2 - x1) + rng.uniform(-spread, spread)
+            y = y1 + t * (y2 - y1) + rng.uniform(-spread, spread)
+        elif rng.random() < 0.5:
+            x = grid["originX"] + rng.randrange(grid["cols"] + 1) * cell_size
+            y = grid["originY"] + rng.random() * height
+        else:
+            x = grid["originX"] + rng.random() * width
+            y = grid["originY"] + rng.randrange(grid["rows"] + 1) * cell_size
+        positions.append((x, y))
+    return positions
+
+
+def verify_collision_grid(grid, continuous_curves, samples=20000, seed=0):
+    """Compare grid queries with the brute-force loop; returns the mismatching positions"""
+    mismatches = []
+    for x, y in sample_positions(grid, continuous_curves, samples, seed):
+        if query_collision_grid(grid, continuous_curves, x, y) != brute_force_hits(continuous_curves, x, y):
+            mismatches.append((x, y))
+    return mismatches
+
+
+def grid_stats(grid):
+    """Average and maximum number of segments per cell"""
+    start = grid["cellStart"]
+    sizes = [start[k + 1] - start[k] for k in range(len(start) - 1)]
+    return sum(sizes) / len(sizes), max(sizes)
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Bake and verify wall collision grids")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--cell-size", type=int, default=COLLISION_GRID_SIZE)
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="random positions compared against the brute-force loop")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            curves = json.load(f).get("continuousCurves", [])
+        start = time.perf_counter()
+        grid = bake_collision_grid(curves, args.cell_size)
+        baked = time.perf_counter() - start
+        total = sum(1 for _ in wall_segments(curves))
+        mean, worst = grid_stats(grid)
+        mismatches = verify_collision_grid(grid, curves, args.samples)
+        print(f"{path}: {grid['cols']}x{grid['rows']} cells, {total} segments, "
+              f"{mean:.1f} avg / {worst} max per cell, baked in {baked * 1000:.1f} ms, "
+              f"{args.samples} positions: {'OK' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+        status |= bool(mismatches)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,471 @@
+"""Racing-line progress acceleration (``racingLine.segmentDistances`` / ``progressGrid``).
+
+``calculateTrackProgress`` and the rocket's initial search in ``updateRocket``
+scan every racing-line segment to find the closest one. This bake stores what
+``preprocessRacingLine`` computes (cumulative ``segmentDistances`` and the
+exact ``totalLength``) and a uniform grid listing, for each cell, the only
+segments that can be the closest one to a position inside the cell::
+
+    "progressGrid": {
+      "cellSize": 16, "originX": 0, "originY": 0, "cols": 96, "rows": 64,
+      "segmentCount": 63,
+      "cellStart": [...],   # cols * rows + 1 offsets into segments
+      "segments": [...]     # racing-line segment indices, ascending
+    }
+
+A segment is a candidate for a cell when its distance to the cell is not
+larger than the smallest "farthest distance" of any segment to the cell, so
+the brute-force winner (first segment with the strictly smallest distance) is
+always among the candidates. Positions outside the grid fall back to the
+full scan. The bake prunes the segments per block of cells first, so it does
+not compare every cell with every segment.
+"""
+
+import math
+import random
+import sys
+import time
+
+from maps.bakes.collision_grid import segment_box_distance_sq
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+DEFAULT_CELL_SIZE = 16
+# Côté des blocs de cellules dont les candidats sont cherchés ensemble pendant le bake
+BLOCK_CELLS = 4
+DEFAULT_SPACING = 40
+# preprocessRacingLine retire un dernier point à moins de 5 px du premier
+MIN_SPACING = 10
+# Écart relatif toléré entre la longueur d'un segment rééchantillonné et l'espacement
+SPACING_TOLERANCE = 1e-3
+# Marge relative sur les distances comparées pendant le bake (arrondis flottants)
+BAKE_MARGIN = 1e-6
+
+
+def _distance_xy(x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    return math.sqrt(dx * dx + dy * dy)
+
+
+def preprocess_racing_line(racing_line):
+    """Python port of ``Room.preprocessRacingLine``, without mutating the input.
+
+    Returns ``(points, closed, segment_distances, total_length)`` where
+    ``points`` drops the duplicate closing point like the server does.
+    """
+    points = [list(p) for p in racing_line.get("points", [])]
+    if len(points) < 2:
+        return points, False, [0], 0
+    first, last = points[0], points[-1]
+    closing_distance = _distance_xy(first[0], first[1], last[0], last[1])
+    if closing_distance < 5 and len(points) > 2:
+        points.pop()
+    closed = bool(racing_line.get("closed")) or (len(points) >= 3 and closing_distance < 30)
+
+    segment_distances = [0]
+    total = 0
+    count = len(points)
+    for i in range(count if closed else count - 1):
+        p1 = points[i]
+        p2 = points[(i + 1) % count]
+        total += _distance_xy(p1[0], p1[1], p2[0], p2[1])
+        segment_distances.append(total)
+    return points, closed, segment_distances, total
+
+
+def racing_segments(points, closed):
+    """List of ``(x1, y1, x2, y2)`` in the server's segment order"""
+    count = len(points)
+    return [(points[i][0], points[i][1], points[(i + 1) % count][0], points[(i + 1) % count][1])
+            for i in range(count if closed else count - 1)]
+
+
+def closest_on_segment(px, py, x1, y1, x2, y2):
+    """Port of getClosestPointOnSegment; returns ``(x, y, t)``"""
+    dx = x2 - x1
+    dy = y2 - y1
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return x1, y1, 0
+    t = ((px - x1) * dx + (py - y1) * dy) / length_squared
+    t = max(0, min(1, t))
+    return x1 + t * dx, y1 + t * dy, t
+
+
+def _farthest_distance_sq(x1, y1, x2, y2, left, top, right, bottom):
+    """Largest squared distance from a point of the box to the segment (reached at a corner)"""
+    best = 0.0
+    for cx, cy in ((left, top), (right, top), (left, bottom), (right, bottom)):
+        qx, qy, _ = closest_on_segment(cx, cy, x1, y1, x2, y2)
+        best = max(best, (cx - qx) ** 2 + (cy - qy) ** 2)
+    return best
+
+
+def _box_candidates(segments, indices, left, top, right, bottom):
+    """Segments among ``indices`` that can be the closest one to a point of the box, ascending"""
+    cx = (left + right) / 2
+    cy = (top + bottom) / 2
+    half_diagonal = _distance_xy(left, top, right, bottom) / 2
+    center = []
+    for i in indices:
+        x1, y1, x2, y2 = segments[i]
+        qx, qy, _ = closest_on_segment(cx, cy, x1, y1, x2, y2)
+        center.append(((cx - qx) ** 2 + (cy - qy) ** 2, i))
+    center.sort()
+    # Plus petite distance au plus loin : elle est au moins la distance au centre,
+    # les segments suivants (triés) ne peuvent plus la faire baisser
+    bound = math.inf
+    for d_sq, i in center:
+        if d_sq >= bound:
+            break
+        bound = min(bound, _farthest_distance_sq(*segments[i], left, top, right, bottom))
+    # Segments dont la distance à la boîte ne dépasse pas sqrt(bound), avec une marge.
+    # La distance à la boîte est au plus celle au centre et au moins celle-ci moins
+    # la demi-diagonale : le test exact ne sert qu'entre les deux
+    limit = bound * (1 + BAKE_MARGIN) + BAKE_MARGIN
+    reach_sq = (math.sqrt(limit) + half_diagonal) ** 2
+    candidates = []
+    for d_sq, i in center:
+        if d_sq > reach_sq:
+            break
+        if d_sq <= limit or segment_box_distance_sq(*segments[i], left, top, right, bottom) <= limit:
+            candidates.append(i)
+    candidates.sort()
+    return candidates
+
+
+def bake_progress_grid(points, closed, cell_size=DEFAULT_CELL_SIZE):
+    """Build the ``progressGrid`` section for preprocessed racing-line points.
+
+    The cells are processed by blocks of ``BLOCK_CELLS`` x ``BLOCK_CELLS``:
+    the candidates of a block are searched among every segment, those of a
+    cell only among its block's (a segment that can be the closest one to a
+    point of the cell can also be the closest one to that point of the block).
+    """
+    segments = racing_segments(points, closed)
+    min_x = min([0] + [p[0] for p in points])
+    min_y = min([0] + [p[1] for p in points])
+    max_x = max([TRACK_WIDTH] + [p[0] for p in points])
+    max_y = max([TRACK_HEIGHT] + [p[1] for p in points])
+    origin_x = math.floor(min_x / cell_size) * cell_size
+    origin_y = math.floor(min_y / cell_size) * cell_size
+    cols = max(1, math.ceil((max_x - origin_x) / cell_size))
+    rows = max(1, math.ceil((max_y - origin_y) / cell_size))
+
+    cells = [None] * (cols * rows)
+    everything = range(len(segments))
+    for block_row in range(0, rows, BLOCK_CELLS):
+        for block_col in range(0, cols, BLOCK_CELLS):
+            row_end = min(rows, block_row + BLOCK_CELLS)
+            col_end = min(cols, block_col + BLOCK_CELLS)
+            block = _box_candidates(segments, everything,
+                                    origin_x + block_col * cell_size, origin_y + block_row * cell_size,
+                                    origin_x + col_end * cell_size, origin_y + row_end * cell_size)
+            for row in range(block_row, row_end):
+                top = origin_y + row * cell_size
+                for col in range(block_col, col_end):
+                    left = origin_x + col * cell_size
+                    cells[row * cols + col] = _box_candidates(segments, block, left, top,
+                                                              left + cell_size, top + cell_size)
+
+    cell_start = [0]
+    flat = []
+    for candidates in cells:
+        flat.extend(candidates)
+        cell_start.append(len(flat))
+
+    return {
+        "cellSize": cell_size,
+        "originX": origin_x,
+        "originY": origin_y,
+        "cols": cols,
+        "rows": rows,
+        "segmentCount": len(segments),
+        "cellStart": cell_start,
+        "segments": flat
+    }
+
+
+def bake_racing_line(racing_line, cell_size=DEFAULT_CELL_SIZE):
+    """Return the exported racing line with its progress data baked in.
+
+    ``points`` are kept as exported (the server drops the closing duplicate
+    itself when it loads the map); segment indices refer to the server's
+    preprocessed points, which are a prefix of them.
+    """
+    points, closed, segment_distances, total = preprocess_racing_line(racing_line)
+    baked = dict(racing_line)
+    baked["totalLength"] = total
+    baked["segmentDistances"] = segment_distances
+    if len(points) >= 2:
+        baked["progressGrid"] = bake_progress_grid(points, closed, cell_size)
+    else:
+        baked.pop("progressGrid", None)
+    return baked
+
+
+def strip_racing_line(racing_line):
+    """Remove the progress fields from a racing line"""
+    racing_line.pop("segmentDistances", None)
+    racing_line.pop("progressGrid", None)
+
+
+def _circle_exit(px, py, ax, ay, bx, by, t_start, radius):
+    """First t >= t_start where segment a->b leaves the circle (p, radius), or None"""
+    dx = bx - ax
+    dy = by - ay
+    a = dx * dx + dy * dy
+    if a == 0:
+        return None
+    fx = ax - px
+    fy = ay - py
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - radius * radius
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    t = (-b + math.sqrt(disc)) / (2 * a)
+    return t if t_start <= t <= 1 else None
+
+
+def _chord_walk(path, spacing, count):
+    """Points reached by ``count`` chords of length ``spacing`` along ``path``.
+
+    Returns None when the path ends first.
+    """
+    i, t = 0, 0.0
+    px, py = path[0]
+    reached = []
+    for _ in range(count):
+        while True:
+            if i >= len(path) - 1:
+                return None
+            ax, ay = path[i]
+            bx, by = path[i + 1]
+            root = _circle_exit(px, py, ax, ay, bx, by, t, spacing)
+            if root is not None:
+                t = root
+                px = ax + root * (bx - ax)
+                py = ay + root * (by - ay)
+                break
+            i += 1
+            t = 0.0
+        reached.append((px, py))
+    return reached
+
+
+def _resample_count(path, length, count):
+    """Chord walk with ``count`` segments whose last one ends on ``path[-1]``"""
+    end = path[-1]
+
+    def overshoot(s):
+        reached = _chord_walk(path, s, count - 1)
+        if reached is None:
+            return -1.0, None
+        last = reached[-1] if reached else path[0]
+        return _distance_xy(last[0], last[1], end[0], end[1]) - s, reached
+
+    low, high = length / count / 2, length
+    while overshoot(low)[0] < 0 and low > 1e-9:
+        low /= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if overshoot(middle)[0] > 0:
+            low = middle
+        else:
+            high = middle
+    actual = (low + high) / 2
+    reached = overshoot(actual)[1] or _chord_walk(path, low, count - 1) or []
+    return [list(path[0])] + [[x, y] for x, y in reached] + [list(end)], actual
+
+
+def _spread(points, actual):
+    lengths = [_distance_xy(*points[i], *points[i + 1]) for i in range(len(points) - 1)]
+    return max(abs(d - actual) for d in lengths)
+
+
+def resample_points(points, closed, spacing=DEFAULT_SPACING, tolerance=SPACING_TOLERANCE):
+    """Resample a polyline so that every segment has the same length.
+
+    The number of segments starts at ``round(length / spacing)``; the actual
+    spacing is then adjusted (bisection) so the last segment ends exactly on
+    the last point, or back on the first one for a closed line. The chord walk
+    jumps where a bend comes back inside the circle, so the bisection can stop
+    on such a jump with an odd last segment: every segment length is checked
+    against ``tolerance`` (a fraction of the spacing) and the neighbouring
+    counts are tried until one passes. Returns ``(points, actual_spacing)``;
+    closed lines are returned without a duplicate closing point.
+    """
+    path = [tuple(p) for p in points]
+    if closed:
+        path.append(path[0])
+    length = sum(_distance_xy(*path[i], *path[i + 1]) for i in range(len(path) - 1))
+    if length == 0 or len(path) < 2:
+        return [list(p) for p in points], 0.0
+    minimum = 3 if closed else 1
+    target = max(minimum, round(length / spacing))
+    counts = [target]
+    for offset in range(1, target + 1):
+        counts += [count for count in (target + offset, target - offset) if count >= minimum]
+    best = None
+    for count in counts:
+        resampled, actual = _resample_count(path, length, count)
+        spread = _spread(resampled, actual)
+        if best is None or spread < best[0]:
+            best = spread, resampled, actual
+        if spread <= tolerance * actual:
+            break
+    _spread_value, resampled, actual = best
+    if closed:
+        resampled.pop()
+    return resampled, actual
+
+
+def resample_racing_line(racing_line, spacing=DEFAULT_SPACING):
+    """Exported racing line resampled at a constant spacing.
+
+    Closed lines get a duplicate closing point so that preprocessRacingLine
+    drops it and keeps the line closed whatever the spacing. ``spacing`` is
+    stored so clients can map arc length to a segment index by division.
+    """
+    points, closed, _distances, _total = preprocess_racing_line(racing_line)
+    if len(points) < 2:
+        return dict(racing_line)
+    spacing = max(spacing, MIN_SPACING)
+    resampled, actual = resample_points(points, closed, spacing)
+    exported = dict(racing_line)
+    exported["points"] = resampled + [list(resampled[0])] if closed else resampled
+    exported["spacing"] = actual
+    _points, _closed, _distances, exported["totalLength"] = preprocess_racing_line(exported)
+    return exported
+
+
+def _closest_segment(points, indices, x, y):
+    count = len(points)
+    closest_segment = -1
+    closest_distance = math.inf
+    closest_t = 0
+    for i in indices:
+        p1 = points[i]
+        p2 = points[(i + 1) % count]
+        cx, cy, t = closest_on_segment(x, y, p1[0], p1[1], p2[0], p2[1])
+        dist = _distance_xy(x, y, cx, cy)
+        if dist < closest_distance:
+            closest_distance = dist
+            closest_segment = i
+            closest_t = t
+    return closest_segment, closest_t
+
+
+def brute_force_progress(points, closed, segment_distances, x, y):
+    """Reference: calculateTrackProgress's full scan; returns ``(segment, t, lap progress)``"""
+    segment, t = _closest_segment(points, range(len(points) if closed else len(points) - 1), x, y)
+    if segment < 0:
+        return -1, 0, 0
+    start = segment_distances[segment]
+    return segment, t, start + (segment_distances[segment + 1] - start) * t
+
+
+def grid_progress(grid, points, closed, segment_distances, x, y):
+    """Same result as brute_force_progress, scanning only the cell's candidates"""
+    cell_size = grid["cellSize"]
+    col = math.floor((x - grid["originX"]) / cell_size)
+    row = math.floor((y - grid["originY"]) / cell_size)
+    if col < 0 or row < 0 or col >= grid["cols"] or row >= grid["rows"]:
+        return brute_force_progress(points, closed, segment_distances, x, y)
+    k = row * grid["cols"] + col
+    start_index = grid["cellStart"]
+    segment, t = _closest_segment(points, grid["segments"][start_index[k]:start_index[k + 1]], x, y)
+    if segment < 0:
+        return -1, 0, 0
+    start = segment_distances[segment]
+    return segment, t, start + (segment_distances[segment + 1] - start) * t
+
+
+def candidate_counts(grid, positions):
+    """Number of candidate segments scanned for each position"""
+    counts = []
+    start = grid["cellStart"]
+    for x, y in positions:
+        col = math.floor((x - grid["originX"]) / grid["cellSize"])
+        row = math.floor((y - grid["originY"]) / grid["cellSize"])
+        if col < 0 or row < 0 or col >= grid["cols"] or row >= grid["rows"]:
+            counts.append(grid["segmentCount"])
+        else:
+            k = row * grid["cols"] + col
+            counts.append(start[k + 1] - start[k])
+    return counts
+
+
+def sample_track_positions(points, closed, count, spread=60, seed=0):
+    """Random positions within ``spread`` px of the racing line (where karts drive)"""
+    rng = random.Random(seed)
+    segments = racing_segments(points, closed)
+    positions = []
+    for _ in range(count):
+        x1, y1, x2, y2 = rng.choice(segments)
+        t = rng.random()
+        positions.append((x1 + t * (x2 - x1) + rng.uniform(-spread, spread),
+                          y1 + t * (y2 - y1) + rng.uniform(-spread, spread)))
+    return positions
+
+
+def benchmark(racing_line, count=20000, cell_size=DEFAULT_CELL_SIZE, seed=0):
+    """Compare grid and brute-force progress queries; returns a dict of figures"""
+    points, closed, distances, _total = preprocess_racing_line(racing_line)
+    start = time.perf_counter()
+    grid = bake_progress_grid(points, closed, cell_size)
+    bake_time = time.perf_counter() - start
+    positions = sample_track_positions(points, closed, count, seed=seed)
+    # Quelques positions uniformes sur toute la piste en plus
+    rng = random.Random(seed + 1)
+    positions += [(rng.uniform(0, TRACK_WIDTH), rng.uniform(0, TRACK_HEIGHT)) for _ in range(count // 4)]
+
+    start = time.perf_counter()
+    brute = [brute_force_progress(points, closed, distances, x, y) for x, y in positions]
+    brute_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = [grid_progress(grid, points, closed, distances, x, y) for x, y in positions]
+    grid_time = time.perf_counter() - start
+
+    counts = candidate_counts(grid, positions[:count])
+    return {
+        "segments": grid["segmentCount"],
+        "queries": len(positions),
+        "mismatches": sum(a != b for a, b in zip(brute, fast)),
+        "bake_ms": bake_time * 1000,
+        "brute_us": brute_time / len(positions) * 1e6,
+        "grid_us": grid_time / len(positions) * 1e6,
+        "mean_candidates": sum(counts) / len(counts),
+        "p95_candidates": sorted(counts)[int(len(counts) * 0.95)],
+    }
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Racing-line progress grid benchmark")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            racing_line = json.load(f).get("racingLine")
+        if not racing_line:
+            print(f"{path}: pas de ligne de course")
+            continue
+        r = benchmark(racing_line, args.queries, args.cell_size)
+        print(f"{path}: {r['segments']} segments, grid baked in {r['bake_ms']:.0f} ms; "
+              f"{r['queries']} queries, {r['mismatches']} mismatches; "
+              f"brute {r['brute_us']:.1f} us/query, grid {r['grid_us']:.1f} us/query "
+              f"(x{r['brute_us'] / r['grid_us']:.1f}); near the line "
+              f"{r['mean_candidates']:.1f} candidates on average, p95 {r['p95_candidates']}")
+        status |= bool(r["mismatches"])
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
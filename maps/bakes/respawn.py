@@ -0,0 +1,300 @@
+"""Precomputed respawn poses per checkpoint (``respawnTable``).
+
+On respawn the server puts the kart back where it crossed the
+second-to-last validated checkpoint, wherever that was (against a wall,
+next to a void zone). This bake lists, for each checkpoint, a few safe
+poses just past the gate::
+
+    "respawnTable": {
+      "clearance": 24, "source": "racingLine",
+      "poses": [[x, y, angle, x, y, angle, ...], ...]   # one list per checkpoint
+    }
+
+Poses are taken on the racing line, past the point where it crosses the
+checkpoint, and then beside it; ``angle`` follows the racing-line tangent
+(``Math.cos(angle)`` / ``Math.sin(angle)`` like ``Player.update``). Without
+a racing line they are spread along the checkpoint, heading along its
+forward normal (``source`` is then ``"checkpoint"``).
+
+A pose is kept when it is at least ``clearance`` away from every wall
+(``sdf`` when baked, exact distance otherwise), none of its points around
+the kart falls in a void zone (``voidZoneBitmap`` when baked, exact
+even-odd test otherwise), the segment from its anchor (where the racing line
+crosses the gate, or the point of the gate it is spread from) to the pose
+crosses no wall, and it does not overlap another pose of the same
+checkpoint. Respawn becomes ``poses[checkpoint][3 * slot:3 * slot + 3]``.
+"""
+
+import math
+import sys
+import time
+
+from maps.bakes.collision_grid import wall_segments
+from maps.bakes.racing_line import closest_on_segment, preprocess_racing_line, racing_segments
+from maps.bakes.simplify import segments_touch
+from maps.bakes.triggers import line_segments_intersect
+from maps.game_config import KART_SIZE, TRACK_HEIGHT, TRACK_WIDTH, WALL_CLEARANCE
+
+POSES_PER_CHECKPOINT = 4
+# Distances testées après la ligne (le long de la trajectoire) et décalages latéraux
+FORWARD_OFFSETS = (30, 50, 70, 90, 110)
+LATERAL_OFFSETS = (0, -30, 30, -60, 60)
+# Deux karts réapparus au même checkpoint ne doivent pas se chevaucher
+MIN_POSE_SPACING = 2 * KART_SIZE + 4
+VOID_CHECK_POINTS = 8
+
+
+def point_at_distance(points, closed, segment_distances, total, s):
+    """Position and unit tangent at arc length ``s`` of the racing line"""
+    segments = racing_segments(points, closed)
+    if closed and total > 0:
+        s %= total
+    s = max(0.0, min(s, total))
+    for i, (x1, y1, x2, y2) in enumerate(segments):
+        length = segment_distances[i + 1] - segment_distances[i]
+        if s <= segment_distances[i + 1] or i == len(segments) - 1:
+            if length == 0:
+                return x1, y1, 1.0, 0.0
+            t = max(0.0, min(1.0, (s - segment_distances[i]) / length))
+            tx, ty = (x2 - x1) / length, (y2 - y1) / length
+            return x1 + t * (x2 - x1), y1 + t * (y2 - y1), tx, ty
+    x, y = points[0]
+    return x, y, 1.0, 0.0
+
+
+def _checkpoint_arc(checkpoint, points, closed, segment_distances):
+    """Arc length where the racing line crosses the checkpoint forward.
+
+    Falls back to the closest point of the racing line to the gate center.
+    """
+    nx = -(checkpoint["y2"] - checkpoint["y1"])
+    ny = checkpoint["x2"] - checkpoint["x1"]
+    best = None
+    for i, (x1, y1, x2, y2) in enumerate(racing_segments(points, closed)):
+        if not line_segments_intersect(x1, y1, x2, y2, checkpoint["x1"], checkpoint["y1"],
+                                       checkpoint["x2"], checkpoint["y2"]):
+            continue
+        # Paramètre du croisement sur le segment de la trajectoire
+        ex = checkpoint["x2"] - checkpoint["x1"]
+        ey = checkpoint["y2"] - checkpoint["y1"]
+        denom = (x2 - x1) * ey - (y2 - y1) * ex
+        t = ((checkpoint["x1"] - x1) * ey - (checkpoint["y1"] - y1) * ex) / denom
+        forward = (x2 - x1) * nx + (y2 - y1) * ny > 0
+        arc = segment_distances[i] + t * (segment_distances[i + 1] - segment_distances[i])
+        if best is None or (forward and not best[0]):
+            best = (forward, arc)
+    if best is not None:
+        return best[1]
+
+    cx = (checkpoint["x1"] + checkpoint["x2"]) / 2
+    cy = (checkpoint["y1"] + checkpoint["y2"]) / 2
+    closest = None
+    for i, (x1, y1, x2, y2) in enumerate(racing_segments(points, closed)):
+        qx, qy, t = closest_on_segment(cx, cy, x1, y1, x2, y2)
+        distance_sq = (qx - cx) ** 2 + (qy - cy) ** 2
+        if closest is None or distance_sq < closest[0]:
+            closest = (distance_sq, segment_distances[i] + t * (segment_distances[i + 1] - segment_distances[i]))
+    return closest[1]
+
+
+def safety_checks(data):
+    """Return ``(wall_distance(x, y), in_void(x, y))`` using the baked data when present"""
+    curves = data.get("continuousCurves", [])
+    if data.get("sdf"):
+        from maps.bakes.sdf import decode_sdf, sample_sdf
+        samples = decode_sdf(data["sdf"])
+
+        def wall_distance(x, y):
+            return abs(sample_sdf(data["sdf"], x, y, samples)[0])
+    else:
+        from maps.bakes.collision_grid import _point_segment_distance_sq, wall_segments
+        segments = [s[2:] for s in wall_segments(curves)]
+
+        def wall_distance(x, y):
+            if not segments:
+                return math.inf
+            return math.sqrt(min(_point_segment_distance_sq(x, y, *segment) for segment in segments))
+
+    zones = [z for z in data.get("voidZones", []) if z.get("closed", True) and len(z.get("points", [])) >= 3]
+    if data.get("voidZoneBitmap"):
+        from maps.bakes.void_zones import decode_bitmap, zones_at
+        bitmap = data["voidZoneBitmap"]
+        cells = decode_bitmap(bitmap)
+        all_zones = data.get("voidZones", [])
+
+        def point_in_void(x, y):
+            return bool(zones_at(bitmap, cells, all_zones, x, y))
+    else:
+        from maps.bakes.void_zones import point_in_polygon
+
+        def point_in_void(x, y):
+            return any(point_in_polygon(x, y, z["points"]) for z in zones)
+
+    def in_void(x, y):
+        if point_in_void(x, y):
+            return True
+        for k in range(VOID_CHECK_POINTS):
+            angle = 2 * math.pi * k / VOID_CHECK_POINTS
+            if point_in_void(x + WALL_CLEARANCE * math.cos(angle), y + WALL_CLEARANCE * math.sin(angle)):
+                return True
+        return False
+
+    return wall_distance, in_void
+
+
+def sight_check(data):
+    """Return ``blocked(ax, ay, bx, by)``: True when the segment touches a wall segment"""
+    segments = [((x1, y1), (x2, y2)) for _ci, _si, x1, y1, x2, y2 in wall_segments(data.get("continuousCurves", []))]
+
+    def blocked(ax, ay, bx, by):
+        left, right = min(ax, bx), max(ax, bx)
+        top, bottom = min(ay, by), max(ay, by)
+        for a, b in segments:
+            if max(a[0], b[0]) < left or min(a[0], b[0]) > right or max(a[1], b[1]) < top or min(a[1], b[1]) > bottom:
+                continue
+            if segments_touch((ax, ay), (bx, by), a, b):
+                return True
+        return False
+
+    return blocked
+
+
+def _pose_is_safe(x, y, anchor, poses, wall_distance, in_void, blocked, clearance):
+    if not (KART_SIZE <= x <= TRACK_WIDTH - KART_SIZE and KART_SIZE <= y <= TRACK_HEIGHT - KART_SIZE):
+        return False
+    if any(math.hypot(x - px, y - py) < MIN_POSE_SPACING for px, py, _ in poses):
+        return False
+    if wall_distance(x, y) < clearance or in_void(x, y):
+        return False
+    # Pas de mur entre la ligne franchie et la pose (décalages latéraux, virages)
+    return not blocked(anchor[0], anchor[1], x, y)
+
+
+def _round(value):
+    return round(value, 2)
+
+
+def bake_respawn_table(data, poses_per_checkpoint=POSES_PER_CHECKPOINT, clearance=WALL_CLEARANCE):
+    """Build the ``respawnTable`` section; a checkpoint with no safe pose gets an empty list"""
+    wall_distance, in_void = safety_checks(data)
+    blocked = sight_check(data)
+    racing_line = data.get("racingLine")
+    line = None
+    if racing_line and len(racing_line.get("points", [])) >= 2:
+        points, closed, segment_distances, total = preprocess_racing_line(racing_line)
+        if total > 0:
+            line = (points, closed, segment_distances, total)
+
+    table = []
+    for checkpoint in data.get("checkpoints") or []:
+        candidates = []
+        if line is not None:
+            points, closed, segment_distances, total = line
+            arc = _checkpoint_arc(checkpoint, points, closed, segment_distances)
+            anchor = point_at_distance(points, closed, segment_distances, total, arc)[:2]
+            for forward in FORWARD_OFFSETS:
+                x, y, tx, ty = point_at_distance(points, closed, segment_distances, total, arc + forward)
+                angle = math.atan2(ty, tx)
+                for lateral in LATERAL_OFFSETS:
+                    candidates.append((x - ty * lateral, y + tx * lateral, angle, anchor))
+        else:
+            dx = checkpoint["x2"] - checkpoint["x1"]
+            dy = checkpoint["y2"] - checkpoint["y1"]
+            length = math.hypot(dx, dy) or 1.0
+            # Normale avant du serveur : (-dy, dx)
+            nx, ny = -dy / length, dx / length
+            angle = math.atan2(ny, nx)
+            for forward in FORWARD_OFFSETS:
+                for u in (0.5, 0.35, 0.65, 0.2, 0.8):
+                    anchor = (checkpoint["x1"] + u * dx, checkpoint["y1"] + u * dy)
+                    candidates.append((anchor[0] + nx * forward, anchor[1] + ny * forward, angle, anchor))
+
+        poses = []
+        for x, y, angle, anchor in candidates:
+            if len(poses) == poses_per_checkpoint:
+                break
+            if _pose_is_safe(x, y, anchor, poses, wall_distance, in_void, blocked, clearance):
+                poses.append((x, y, angle))
+        table.append([_round(value) if k % 3 < 2 else round(value, 4)
+                      for k, value in enumerate(v for pose in poses for v in pose)])
+
+    return {
+        "clearance": clearance,
+        "source": "racingLine" if line is not None else "checkpoint",
+        "poses": table
+    }
+
+
+def respawn_pose(table, checkpoint, slot=0):
+    """Pose ``{x, y, angle}`` for a checkpoint, cycling through its slots; None when it has none"""
+    poses = table["poses"][checkpoint] if 0 <= checkpoint < len(table["poses"]) else []
+    if not poses:
+        return None
+    k = 3 * (slot % (len(poses) // 3))
+    return {"x": poses[k], "y": poses[k + 1], "angle": poses[k + 2]}
+
+
+def _gate_points(checkpoint, samples=20):
+    x1, y1 = checkpoint["x1"], checkpoint["y1"]
+    dx, dy = checkpoint["x2"] - x1, checkpoint["y2"] - y1
+    return [(x1 + dx * k / samples, y1 + dy * k / samples) for k in range(samples + 1)]
+
+
+def verify_respawn_table(data, table):
+    """Re-check every pose with the exact wall distance and void-zone tests,
+    and check that some point of its checkpoint gate sees it without a wall
+    in between.
+
+    Returns ``(poses, unsafe, empty_checkpoints)``.
+    """
+    exact = {key: value for key, value in data.items() if key not in ("sdf", "voidZoneBitmap")}
+    wall_distance, in_void = safety_checks(exact)
+    blocked = sight_check(data)
+    checkpoints = data.get("checkpoints", [])
+    # Tolérance de quantification du SDF (1/16 px) et de l'arrondi des poses
+    slack = 0.1
+    count = unsafe = 0
+    for index, poses in enumerate(table["poses"]):
+        gate = _gate_points(checkpoints[index]) if index < len(checkpoints) else []
+        for k in range(0, len(poses), 3):
+            count += 1
+            x, y = poses[k], poses[k + 1]
+            if wall_distance(x, y) < table["clearance"] - slack or in_void(x, y):
+                unsafe += 1
+            elif gate and all(blocked(gx, gy, x, y) for gx, gy in gate):
+                unsafe += 1
+    return count, unsafe, sum(1 for poses in table["poses"] if not poses)
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Bake respawn tables and check every pose")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--baked", action="store_true",
+                        help="bake the sdf and void-zone bitmap first and check through them")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if args.baked:
+            from maps.bakes.sdf import bake_sdf
+            from maps.bakes.void_zones import bake_void_zones
+            data["sdf"] = bake_sdf(data.get("continuousCurves", []))
+            data["voidZones"], bitmap = bake_void_zones(data.get("voidZones", []))
+            if bitmap:
+                data["voidZoneBitmap"] = bitmap
+        start = time.perf_counter()
+        table = bake_respawn_table(data)
+        baked = time.perf_counter() - start
+        count, unsafe, empty = verify_respawn_table(data, table)
+        print(f"{path}: {len(table['poses'])} checkpoints, {count} poses from {table['source']}, "
+              f"{empty} without pose, {unsafe} unsafe, baked in {baked * 1000:.0f} ms")
+        status |= bool(unsafe)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,315 @@
+"""Signed distance field of the wall polylines (``sdf``).
+
+The field is sampled on the corners of a regular grid covering the track.
+Each sample holds:
+
+- the distance to the closest wall segment (of the ``tessellated`` polyline
+  when baked, see ``collision_points``), negative inside closed curves
+  (even-odd rule, like ``isPointInPolygon``), positive elsewhere,
+- the push-out normal, the unit vector from the closest wall point to the
+  sample (gradient of the unsigned distance).
+
+Distances are computed exactly (``grid_field``): an exact field on a coarse
+grid bounds the distance of every sample, so each wall segment is evaluated
+(vectorized) only on the window of samples it can be the closest segment of,
+and the even-odd sign comes from one sorted list of edge crossings per row.
+The result is the same as the brute-force ``exact_field`` over the whole
+grid. The samples are then quantized: distance in 1/``distanceScale`` px,
+normal components in 1/32767. The three int16 channels
+are interleaved per sample and stored little-endian, base64 encoded::
+
+    "sdf": {
+      "cellSize": 2, "originX": 0, "originY": 0, "cols": 769, "rows": 513,
+      "distanceScale": 16, "encoding": "int16le-base64",
+      "channels": ["distance", "normalX", "normalY"],
+      "data": "..."
+    }
+
+A lookup is one bilinear interpolation of the four corners around the
+position (``sample_sdf``). Requires NumPy.
+"""
+
+import base64
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from maps.bakes.collision_grid import collision_points, wall_segments
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+DEFAULT_CELL_SIZE = 2
+DISTANCE_SCALE = 16
+NORMAL_SCALE = 32767
+CHANNELS = ("distance", "normalX", "normalY")
+ENCODING = "int16le-base64"
+# Pas du champ grossier qui borne les distances (en échantillons)
+COARSE_STEP = 8
+
+
+def _grid_axes(cell_size, width, height):
+    cols = int(math.ceil(width / cell_size)) + 1
+    rows = int(math.ceil(height / cell_size)) + 1
+    xs = np.arange(cols, dtype=np.float64) * cell_size
+    ys = np.arange(rows, dtype=np.float64) * cell_size
+    return xs, ys
+
+
+def exact_field(continuous_curves, px, py):
+    """Exact signed distance and push-out normal at the positions ``(px, py)``.
+
+    ``px`` and ``py`` are broadcast together (a row and a column give a grid).
+    Returns ``(distance, normal_x, normal_y)`` float64 arrays of the broadcast
+    shape. With no wall the distance is +inf.
+    """
+    px, py = np.broadcast_arrays(np.asarray(px, dtype=np.float64), np.asarray(py, dtype=np.float64))
+    best = np.full(px.shape, np.inf)
+    vec_x = np.zeros(px.shape)
+    vec_y = np.zeros(px.shape)
+    inside = np.zeros(px.shape, dtype=bool)
+
+    for _ci, _si, x1, y1, x2, y2 in wall_segments(continuous_curves):
+        dx = x2 - x1
+        dy = y2 - y1
+        t = np.clip(((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy), 0.0, 1.0)
+        ex = px - (x1 + t * dx)
+        ey = py - (y1 + t * dy)
+        dist_sq = ex * ex + ey * ey
+        closer = dist_sq < best
+        best[closer] = dist_sq[closer]
+        vec_x[closer] = ex[closer]
+        vec_y[closer] = ey[closer]
+
+    for curve in continuous_curves:
+        points = collision_points(curve)
+        if not curve.get("closed", False) or len(points) < 3:
+            continue
+        # Règle pair-impair, même test que isPointInPolygon côté serveur
+        for i in range(len(points)):
+            xi, yi = points[i]
+            xj, yj = points[i - 1]
+            if yi == yj:
+                continue
+            crosses = (yi > py) != (yj > py)
+            inside ^= crosses & (px < (xj - xi) * (py - yi) / (yj - yi) + xi)
+
+    distance = np.sqrt(best)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normal_x = np.where(distance > 0, vec_x / distance, 0.0)
+        normal_y = np.where(distance > 0, vec_y / distance, 0.0)
+    return np.where(inside, -distance, distance), normal_x, normal_y
+
+
+def _coarse_indices(count, step):
+    indices = np.arange(0, count, step)
+    return indices if indices[-1] == count - 1 else np.append(indices, count - 1)
+
+
+def _inside_grid(continuous_curves, xs, ys):
+    """Even-odd test of exact_field for every (ys[row], xs[col]), one row at a time"""
+    edges = []
+    for curve in continuous_curves:
+        points = collision_points(curve)
+        if not curve.get("closed", False) or len(points) < 3:
+            continue
+        edges += [(points[i][0], points[i][1], points[i - 1][0], points[i - 1][1])
+                  for i in range(len(points)) if points[i][1] != points[i - 1][1]]
+    inside = np.zeros((len(ys), len(xs)), dtype=bool)
+    if not edges:
+        return inside
+    xi, yi, xj, yj = (np.array(column, dtype=np.float64)[:, np.newaxis] for column in zip(*edges))
+    py = ys[np.newaxis, :]
+    # Les parités des courbes se combinent par ou exclusif : on compte toutes les arêtes ensemble
+    crosses = (yi > py) != (yj > py)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        crossing_x = (xj - xi) * (py - yi) / (yj - yi) + xi
+    for row in range(len(ys)):
+        row_crossings = np.sort(crossing_x[crosses[:, row], row])
+        # px < crossing_x pour un nombre impair d'arêtes
+        inside[row] = (len(row_crossings) - np.searchsorted(row_crossings, xs, side="right")) % 2 == 1
+    return inside
+
+
+def grid_field(continuous_curves, xs, ys):
+    """``exact_field(continuous_curves, xs[np.newaxis, :], ys[:, np.newaxis])``, without the full scan.
+
+    ``xs`` and ``ys`` are ascending axes. The exact distances on a coarse
+    sub-grid (every ``COARSE_STEP`` samples) bound the distance of the
+    samples of each coarse block; a segment is evaluated only on the window
+    of blocks whose box is within that bound of its bounding box. Segments
+    are visited in the same order on every sample as in exact_field, so the
+    results are identical, ties included.
+    """
+    segments = [(x1, y1, x2, y2) for _ci, _si, x1, y1, x2, y2 in wall_segments(continuous_curves)]
+    if not segments:
+        return exact_field(continuous_curves, xs[np.newaxis, :], ys[:, np.newaxis])
+
+    col_nodes = _coarse_indices(len(xs), COARSE_STEP)
+    row_nodes = _coarse_indices(len(ys), COARSE_STEP)
+    coarse, _, _ = exact_field(continuous_curves, xs[col_nodes][np.newaxis, :], ys[row_nodes][:, np.newaxis])
+    coarse = np.abs(coarse)
+    # Bloc entre quatre nœuds : distance de tout échantillon au plus la plus petite
+    # distance d'un coin plus la diagonale du bloc
+    block_left = xs[col_nodes[:-1]]
+    block_right = xs[col_nodes[1:]]
+    block_top = ys[row_nodes[:-1]]
+    block_bottom = ys[row_nodes[1:]]
+    corners = np.minimum(np.minimum(coarse[:-1, :-1], coarse[:-1, 1:]), np.minimum(coarse[1:, :-1], coarse[1:, 1:]))
+    bound = corners + np.hypot((block_right - block_left)[np.newaxis, :], (block_bottom - block_top)[:, np.newaxis])
+
+    best = np.full((len(ys), len(xs)), np.inf)
+    vec_x = np.zeros(best.shape)
+    vec_y = np.zeros(best.shape)
+    for x1, y1, x2, y2 in segments:
+        # Distance entre la boîte du segment et chaque bloc : minore la distance au segment
+        gap_x = np.maximum(0.0, np.maximum(block_left - max(x1, x2), min(x1, x2) - block_right))
+        gap_y = np.maximum(0.0, np.maximum(block_top - max(y1, y2), min(y1, y2) - block_bottom))
+        near = np.hypot(gap_x[np.newaxis, :], gap_y[:, np.newaxis]) <= bound
+        block_rows = np.flatnonzero(near.any(axis=1))
+        block_cols = np.flatnonzero(near.any(axis=0))
+        if not len(block_rows):
+            continue
+        rows = slice(row_nodes[block_rows[0]], row_nodes[block_rows[-1] + 1] + 1)
+        cols = slice(col_nodes[block_cols[0]], col_nodes[block_cols[-1] + 1] + 1)
+        px = xs[cols][np.newaxis, :]
+        py = ys[rows][:, np.newaxis]
+        dx = x2 - x1
+        dy = y2 - y1
+        t = np.clip(((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy), 0.0, 1.0)
+        ex = px - (x1 + t * dx)
+        ey = py - (y1 + t * dy)
+        dist_sq = ex * ex + ey * ey
+        window = best[rows, cols]
+        closer = dist_sq < window
+        window[closer] = dist_sq[closer]
+        vec_x[rows, cols][closer] = ex[closer]
+        vec_y[rows, cols][closer] = ey[closer]
+
+    inside = _inside_grid(continuous_curves, xs, ys)
+    distance = np.sqrt(best)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normal_x = np.where(distance > 0, vec_x / distance, 0.0)
+        normal_y = np.where(distance > 0, vec_y / distance, 0.0)
+    return np.where(inside, -distance, distance), normal_x, normal_y
+
+
+def bake_sdf(continuous_curves, cell_size=DEFAULT_CELL_SIZE, width=TRACK_WIDTH, height=TRACK_HEIGHT,
+             distance_scale=DISTANCE_SCALE):
+    """Build the ``sdf`` section for a list of continuous curves"""
+    xs, ys = _grid_axes(cell_size, width, height)
+    distance, normal_x, normal_y = grid_field(continuous_curves, xs, ys)
+    limit = 32767
+    channels = np.empty(distance.shape + (3,), dtype="<i2")
+    channels[..., 0] = np.clip(np.rint(np.nan_to_num(distance, posinf=limit) * distance_scale), -limit, limit)
+    channels[..., 1] = np.rint(normal_x * NORMAL_SCALE)
+    channels[..., 2] = np.rint(normal_y * NORMAL_SCALE)
+    return {
+        "cellSize": cell_size,
+        "originX": 0,
+        "originY": 0,
+        "cols": len(xs),
+        "rows": len(ys),
+        "distanceScale": distance_scale,
+        "encoding": ENCODING,
+        "channels": list(CHANNELS),
+        "data": base64.b64encode(channels.tobytes()).decode("ascii")
+    }
+
+
+def decode_sdf(sdf):
+    """Return the quantized samples as an int16 array of shape (rows, cols, 3)"""
+    if sdf.get("encoding") != ENCODING:
+        raise ValueError(f"encodage SDF non supporté : {sdf.get('encoding')!r}")
+    raw = base64.b64decode(sdf["data"])
+    return np.frombuffer(raw, dtype="<i2").reshape(sdf["rows"], sdf["cols"], 3)
+
+
+def sample_sdf(sdf, x, y, samples=None):
+    """Bilinear lookup: ``(signed distance, normal_x, normal_y)`` at (x, y).
+
+    Positions outside the grid are clamped to its border. Pass the result of
+    decode_sdf as ``samples`` to avoid decoding on every call.
+    """
+    if samples is None:
+        samples = decode_sdf(sdf)
+    cell_size = sdf["cellSize"]
+    fx = min(max((x - sdf["originX"]) / cell_size, 0.0), sdf["cols"] - 1.0)
+    fy = min(max((y - sdf["originY"]) / cell_size, 0.0), sdf["rows"] - 1.0)
+    col = min(int(fx), sdf["cols"] - 2)
+    row = min(int(fy), sdf["rows"] - 2)
+    tx = fx - col
+    ty = fy - row
+    quad = samples[row:row + 2, col:col + 2].astype(np.float64)
+    top = quad[0, 0] * (1 - tx) + quad[0, 1] * tx
+    bottom = quad[1, 0] * (1 - tx) + quad[1, 1] * tx
+    value = top * (1 - ty) + bottom * ty
+    return (value[0] / sdf["distanceScale"], value[1] / NORMAL_SCALE, value[2] / NORMAL_SCALE)
+
+
+def accuracy_report(sdf, continuous_curves, count=20000, band=48.0, seed=0):
+    """Compare bilinear lookups with exact distances at random positions.
+
+    Returns a dict with the mean / max absolute distance error over all
+    positions and over positions within ``band`` px of a wall, plus the
+    99th percentile and max normal angle error (degrees) in that band. The
+    normal is not checked closer than one cell to a wall, where it flips.
+    """
+    rng = random.Random(seed)
+    width = (sdf["cols"] - 1) * sdf["cellSize"]
+    height = (sdf["rows"] - 1) * sdf["cellSize"]
+    samples = decode_sdf(sdf)
+    xs = np.array([rng.random() * width for _ in range(count)])
+    ys = np.array([rng.random() * height for _ in range(count)])
+    exact_d, exact_nx, exact_ny = exact_field(continuous_curves, xs, ys)
+    approx = np.array([sample_sdf(sdf, x, y, samples) for x, y in zip(xs, ys)])
+
+    errors = np.abs(approx[:, 0] - exact_d)
+    norm = np.hypot(approx[:, 1], approx[:, 2])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cos = (approx[:, 1] * exact_nx + approx[:, 2] * exact_ny) / norm
+    angles = np.degrees(np.arccos(np.clip(np.nan_to_num(cos, nan=1.0), -1.0, 1.0)))
+
+    near = np.abs(exact_d) <= band
+    checked = near & (np.abs(exact_d) > sdf["cellSize"]) & (norm > 0)
+    return {
+        "positions": count,
+        "mean_error": float(errors.mean()),
+        "max_error": float(errors.max()),
+        "near_positions": int(near.sum()),
+        "near_mean_error": float(errors[near].mean()) if near.any() else 0.0,
+        "near_max_error": float(errors[near].max()) if near.any() else 0.0,
+        "near_p99_angle_error": float(np.percentile(angles[checked], 99)) if checked.any() else 0.0,
+        "near_max_angle_error": float(angles[checked].max()) if checked.any() else 0.0,
+    }
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Bake the wall SDF and report its accuracy")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args(argv)
+    cell_size = int(args.cell_size) if float(args.cell_size).is_integer() else args.cell_size
+
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            curves = json.load(f).get("continuousCurves", [])
+        start = time.perf_counter()
+        sdf = bake_sdf(curves, cell_size)
+        baked = time.perf_counter() - start
+        report = accuracy_report(sdf, curves, args.samples)
+        print(f"{path}: {sdf['cols']}x{sdf['rows']} samples, {len(sdf['data']) / 1e6:.2f} MB base64, "
+              f"baked in {baked * 1000:.0f} ms")
+        print(f"  all: mean {report['mean_error']:.3f} px, max {report['max_error']:.3f} px; "
+              f"within 48 px ({report['near_positions']}): mean {report['near_mean_error']:.3f} px, "
+              f"max {report['near_max_error']:.3f} px; normal p99 {report['near_p99_angle_error']:.1f} deg, "
+              f"max {report['near_max_angle_error']:.1f} deg")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
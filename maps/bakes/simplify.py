@@ -0,0 +1,301 @@
+"""Ramer-Douglas-Peucker simplification of walls and void zones.
+
+Every point of a continuous curve adds a segment to the server's wall loop,
+and every point of a void zone an edge to ``isPointInPolygon``. This module
+removes the points that lie within ``tolerance`` world units of the
+simplified polyline:
+
+- open polylines keep both end points, closed ones keep at least 3 points
+  and stay closed (a duplicated closing point is kept as well),
+- a polyline that does not cross itself never gets a crossing: when a
+  simplified segment touches another one, the farthest removed point of its
+  span is put back, until the result is simple again (only the new segments
+  are checked again, against the segments near them on a uniform grid),
+- a polyline that already crosses itself is left untouched.
+"""
+
+import math
+import sys
+import time
+
+DEFAULT_TOLERANCE = 1.0
+# Sections simplifiées, dans l'ordre de l'export
+SECTIONS = ("continuousCurves", "voidZones")
+
+
+def _point_segment_distance(p, a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length_sq))
+    return math.hypot(p[0] - (a[0] + t * dx), p[1] - (a[1] + t * dy))
+
+
+def _orientation(a, b, c):
+    value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (value > 0) - (value < 0)
+
+
+def _on_segment(p, a, b):
+    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+
+def segments_touch(a, b, c, d):
+    """True when the closed segments ab and cd share at least one point"""
+    o1 = _orientation(a, b, c)
+    o2 = _orientation(a, b, d)
+    o3 = _orientation(c, d, a)
+    o4 = _orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+    return ((o1 == 0 and _on_segment(c, a, b)) or (o2 == 0 and _on_segment(d, a, b))
+            or (o3 == 0 and _on_segment(a, c, d)) or (o4 == 0 and _on_segment(b, c, d)))
+
+
+def _spans(indices, closed):
+    """Consecutive index pairs of the polyline (with the closing pair when closed)"""
+    pairs = list(zip(indices, indices[1:]))
+    if closed and len(indices) > 2:
+        pairs.append((indices[-1], indices[0]))
+    return pairs
+
+
+def _span_grid(points, spans):
+    """Bounding boxes of the spans and a uniform grid ``{(col, row): [positions]}`` of them"""
+    boxes = []
+    for a, b in spans:
+        (x1, y1), (x2, y2) = points[a], points[b]
+        boxes.append((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    width = max(box[2] for box in boxes) - left
+    height = max(box[3] for box in boxes) - top
+    # Environ une cellule par segment
+    cell = max(math.sqrt(width * height / len(spans)), max(width, height) / len(spans), 1e-9)
+    cells = []
+    grid = {}
+    for position, (x1, y1, x2, y2) in enumerate(boxes):
+        covered = [(col, row)
+                   for col in range(int((x1 - left) / cell), int((x2 - left) / cell) + 1)
+                   for row in range(int((y1 - top) / cell), int((y2 - top) / cell) + 1)]
+        for key in covered:
+            grid.setdefault(key, []).append(position)
+        cells.append(covered)
+    return boxes, cells, grid
+
+
+def crossing_spans(points, indices, closed, check=None):
+    """Positions (in ``_spans`` order) of the segments touching a non-adjacent segment.
+
+    Only the pairs with at least one position in ``check`` are tested (every
+    pair when None). Segments are bucketed on a uniform grid, so a segment is
+    only compared with those whose bounding box shares a cell with its own.
+    """
+    spans = _spans(indices, closed)
+    count = len(spans)
+    if count < 3:
+        return set()
+    boxes, cells, grid = _span_grid(points, spans)
+    check = range(count) if check is None else check
+    checked = set(check)
+    crossing = set()
+    for i in check:
+        a, b = points[spans[i][0]], points[spans[i][1]]
+        left, top, right, bottom = boxes[i]
+        seen = set()
+        for key in cells[i]:
+            for j in grid[key]:
+                if j in seen or j == i or (j < i and j in checked):
+                    # Déjà testé (depuis l'autre segment s'il est aussi vérifié)
+                    continue
+                seen.add(j)
+                if abs(i - j) == 1 or (closed and {i, j} == {0, count - 1}):
+                    # Segments voisins : ils partagent un sommet
+                    continue
+                other = boxes[j]
+                if other[0] > right or other[2] < left or other[1] > bottom or other[3] < top:
+                    continue
+                if segments_touch(a, b, points[spans[j][0]], points[spans[j][1]]):
+                    crossing.add(i)
+                    crossing.add(j)
+    return crossing
+
+
+def is_simple(points, closed):
+    """True when no two non-adjacent segments of the polyline touch"""
+    if closed and len(points) > 3 and list(points[0]) == list(points[-1]):
+        points = points[:-1]
+    return not crossing_spans(points, list(range(len(points))), closed)
+
+
+def _span_interior(start, end, count):
+    """Original indices strictly between start and end, wrapping for closed polylines"""
+    if end > start:
+        return range(start + 1, end)
+    return [k % count for k in range(start + 1, end + count)]
+
+
+def _farthest(points, start, end, count):
+    best, best_distance = None, -1.0
+    for k in _span_interior(start, end, count):
+        distance = _point_segment_distance(points[k], points[start], points[end])
+        if distance > best_distance:
+            best, best_distance = k, distance
+    return best, best_distance
+
+
+def _rdp(points, start, end, tolerance, count, keep):
+    stack = [(start, end)]
+    while stack:
+        a, b = stack.pop()
+        k, distance = _farthest(points, a, b, count)
+        if k is not None and distance > tolerance:
+            keep.add(k)
+            stack.append((a, k))
+            stack.append((k, b))
+
+
+def _ordered(keep, start):
+    return sorted(keep, key=lambda k: k - start if k >= start else k)
+
+
+def simplify_points(points, closed, tolerance):
+    """Simplify one polyline.
+
+    Returns ``(points, removed, max_deviation)``; ``max_deviation`` is the
+    largest distance between a removed point and the simplified polyline
+    segment that replaces it. Self-intersecting input is returned unchanged
+    with ``removed == 0``.
+    """
+    points = [list(p) for p in points]
+    duplicate_end = closed and len(points) > 3 and points[0] == points[-1]
+    ring = points[:-1] if duplicate_end else points
+    count = len(ring)
+    minimum = 3 if closed else 2
+    if count <= minimum or not is_simple(ring, closed):
+        return points, 0, 0.0
+
+    if closed:
+        # Deux ancres : le premier point et le point le plus éloigné de lui
+        far = max(range(count), key=lambda k: math.hypot(ring[k][0] - ring[0][0], ring[k][1] - ring[0][1]))
+        keep = {0, far}
+        _rdp(ring, 0, far, tolerance, count, keep)
+        _rdp(ring, far, 0, tolerance, count, keep)
+        if len(keep) < 3:
+            ordered = _ordered(keep, 0)
+            best = max((_farthest(ring, a, b, count) for a, b in _spans(ordered, True)), key=lambda r: r[1])
+            keep.add(best[0])
+    else:
+        keep = {0, count - 1}
+        _rdp(ring, 0, count - 1, tolerance, count, keep)
+
+    ordered = _ordered(keep, 0)
+    crossing = crossing_spans(ring, ordered, closed)
+    while crossing:
+        spans = _spans(ordered, closed)
+        for position in crossing:
+            k, _distance = _farthest(ring, spans[position][0], spans[position][1], count)
+            if k is not None:
+                keep.add(k)
+        # Chaque croisement avait un segment découpé : les segments inchangés ne se
+        # touchent pas entre eux, seuls les nouveaux sont revérifiés
+        previous = set(spans)
+        ordered = _ordered(keep, 0)
+        changed = [position for position, span in enumerate(_spans(ordered, closed)) if span not in previous]
+        crossing = crossing_spans(ring, ordered, closed, changed)
+
+    max_deviation = 0.0
+    for a, b in _spans(ordered, closed):
+        _k, distance = _farthest(ring, a, b, count)
+        max_deviation = max(max_deviation, distance)
+
+    result = [ring[k] for k in ordered]
+    if duplicate_end:
+        result.append(list(result[0]))
+    return result, len(points) - len(result), max_deviation
+
+
+def simplify_shapes(shapes, tolerance, closed_default=False):
+    """Simplify a list of ``{"points": ..., "closed": ...}`` dicts in place.
+
+    Returns ``(points_before, removed, max_deviation, skipped)``; ``skipped``
+    counts the self-intersecting shapes left untouched.
+    """
+    before = removed = skipped = 0
+    max_deviation = 0.0
+    for shape in shapes:
+        points = shape.get("points", [])
+        closed = shape.get("closed", closed_default)
+        simplified, count, deviation = simplify_points(points, closed, tolerance)
+        before += len(points)
+        if count:
+            shape["points"] = simplified
+        elif not is_simple(points, closed):
+            skipped += 1
+        removed += count
+        max_deviation = max(max_deviation, deviation)
+    return before, removed, max_deviation, skipped
+
+
+def simplify_map(data, tolerance=DEFAULT_TOLERANCE):
+    """Simplify the walls and void zones of a map document in place.
+
+    Returns a report ``{section: (points_before, removed, max_deviation, skipped)}``.
+    """
+    return {
+        "continuousCurves": simplify_shapes(data.get("continuousCurves", []), tolerance),
+        # Les zones de vide sont toujours fermées
+        "voidZones": simplify_shapes(data.get("voidZones", []), tolerance, closed_default=True),
+    }
+
+
+def format_report(report):
+    """One-line summary of a simplify_map report"""
+    parts = []
+    for section, (before, removed, deviation, skipped) in report.items():
+        text = f"{section}: {before} -> {before - removed} points (écart max {deviation:.2f} px)"
+        if skipped:
+            text += f", {skipped} ignoré(s) car auto-intersectant(s)"
+        parts.append(text)
+    return " ; ".join(parts)
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Report the RDP simplification of walls and void zones")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--tolerance", type=float, action="append",
+                        help="tolerance in world units (repeatable, default 0.5, 1 and 2)")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            original = json.load(f)
+        for tolerance in args.tolerance or (0.5, DEFAULT_TOLERANCE, 2.0):
+            data = json.loads(json.dumps(original))
+            start = time.perf_counter()
+            report = simplify_map(data, tolerance)
+            elapsed = time.perf_counter() - start
+            # Vérifications : topologie et croisements
+            for section in SECTIONS:
+                for before, shape in zip(original.get(section, []), data.get(section, [])):
+                    closed = shape.get("closed", section == "voidZones")
+                    points = shape["points"]
+                    if len(points) < (3 if closed else 2):
+                        print(f"  {section}: polyline reduced to {len(points)} points")
+                        status = 1
+                    if is_simple(before["points"], closed) and not is_simple(points, closed):
+                        print(f"  {section}: simplification introduced a crossing")
+                        status = 1
+            print(f"{path} @ {tolerance:g} px ({elapsed * 1000:.1f} ms): {format_report(report)}")
+            for section, (_before, _removed, deviation, _skipped) in report.items():
+                if deviation > tolerance:
+                    print(f"  {section}: deviation {deviation:.3f} px above the tolerance")
+                    status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+"""Tessellated collision polylines of the continuous curves (``tessellated``).
+
+The editor draws continuous curves as Catmull-Rom splines, the server
+collides against the straight control polygon. This bake writes, next to
+``points``, the polyline of the drawn spline::
+
+    {"points": [...], "type": "continuous", "closed": true,
+     "tessellated": [[x, y], ...]}
+
+Each span gets the fewest chords keeping the spline within ``tolerance``
+world units (``maps.core.spline.span_samples``), so straight spans stay one
+segment. Control points are kept exactly, closed curves wrap like
+``points``. Coordinates are rounded to ``DECIMALS`` decimals.
+
+Once baked, ``tessellated`` is the collision geometry of the curve: the
+bakes run after it in the same compile (``collisionGrid``, ``sdf``,
+``respawnTable``) and the simulator read it instead of ``points``
+(``maps.bakes.collision_grid.collision_points``).
+"""
+
+import math
+import sys
+import time
+
+from maps.core.spline import catmull_rom_point, catmull_rom_spans, tessellate_curve
+
+DEFAULT_TOLERANCE = 0.5
+DECIMALS = 2
+
+
+def _round(value):
+    rounded = round(value, DECIMALS)
+    return int(rounded) if rounded == int(rounded) else rounded
+
+
+def bake_tessellation(continuous_curves, tolerance=DEFAULT_TOLERANCE):
+    """Add ``tessellated`` to every continuous curve in place"""
+    for curve in continuous_curves:
+        path = tessellate_curve(curve.get("points", []), curve.get("closed", False), tolerance)
+        curve["tessellated"] = [[_round(x), _round(y)] for x, y in path]
+
+
+def strip_tessellation(continuous_curves):
+    for curve in continuous_curves:
+        curve.pop("tessellated", None)
+
+
+def _point_polyline_distance(px, py, path, closed):
+    best = math.inf
+    count = len(path)
+    for i in range(count if closed else count - 1):
+        x1, y1 = path[i]
+        x2, y2 = path[(i + 1) % count]
+        dx = x2 - x1
+        dy = y2 - y1
+        length_sq = dx * dx + dy * dy
+        t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+        best = min(best, math.hypot(px - (x1 + t * dx), py - (y1 + t * dy)))
+    return best
+
+
+def max_deviation(curve, samples=50):
+    """Largest distance between the drawn spline (densely sampled) and ``tessellated``"""
+    points = curve.get("points", [])
+    closed = curve.get("closed", False)
+    worst = 0.0
+    for p0, p1, p2, p3 in catmull_rom_spans(points, closed):
+        for k in range(samples + 1):
+            x, y = catmull_rom_point(p0, p1, p2, p3, k / samples)
+            worst = max(worst, _point_polyline_distance(x, y, curve["tessellated"], closed))
+    return worst
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Tessellate continuous curves and check the deviation")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            curves = json.load(f).get("continuousCurves", [])
+        start = time.perf_counter()
+        bake_tessellation(curves, args.tolerance)
+        elapsed = time.perf_counter() - start
+        control = sum(len(c["points"]) - (0 if c.get("closed") else 1) for c in curves if len(c["points"]) > 1)
+        segments = sum(len(c["tessellated"]) - (0 if c.get("closed") else 1) for c in curves if len(c["points"]) > 1)
+        drawn = control * 10
+        worst = max((max_deviation(c) for c in curves if len(c["points"]) > 1), default=0.0)
+        # L'arrondi des coordonnées s'ajoute à la tolérance
+        limit = args.tolerance + 10 ** -DECIMALS
+        print(f"{path}: {control} control segments -> {segments} collision segments "
+              f"(editor draws {drawn}), max deviation {worst:.3f} px "
+              f"(tolerance {args.tolerance:g}), {elapsed * 1000:.1f} ms")
+        status |= worst > limit
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,403 @@
+"""Trigger-line geometry and broadphase grid (checkpoints, boosters, items).
+
+Every tick the server crosses the kart movement with
+``checkpoints[player.nextCheckpoint]`` and the finish line, measures the
+distance to every booster line and to every item box. This bake adds to
+each line record (checkpoints, finishLine, boosters, items)::
+
+    {"x1": ..., "y1": ..., "x2": ..., "y2": ...,
+     "aabb": [minX, minY, maxX, maxY], "length": 136.3,
+     "direction": [dx, dy], "normal": [nx, ny]}
+
+``normal`` is the unit ``(-dy, dx)`` the server dots with the movement to
+tell the crossing direction; item records also get their box ``center``.
+Booster and item lines go into a CSR grid (same layout as
+``collisionGrid``)::
+
+    "triggerGrid": {
+      "cellSize": 100, "originX": -100, "originY": -100, "cols": 18, "rows": 13,
+      "boosterReach": 25, "itemReach": 36,
+      "cellStart": [...],   # cols * rows + 1 offsets, in (kind, index) pairs
+      "entries": [...]      # kind (0 booster, 1 item), index, ...
+    }
+
+A cell lists every booster whose detection capsule and every item whose
+pickup circle overlaps it, sorted by kind then index (the server's loop
+order). A trigger test is then one cell lookup plus the exact test.
+"""
+
+import math
+import random
+import sys
+import time
+
+from maps.game_config import BOOSTER_REACH, COLLISION_GRID_SIZE, ITEM_REACH, TRACK_HEIGHT, TRACK_WIDTH
+from maps.bakes.collision_grid import BAKE_MARGIN, segment_box_distance_sq
+
+BOOSTER = 0
+ITEM = 1
+# Marge des boîtes englobantes : un croisement arrondi doit rester détecté
+AABB_MARGIN = 1e-6
+LINE_SECTIONS = ("checkpoints", "boosters", "items")
+
+
+def _rounded(value):
+    return round(value, 6)
+
+
+def line_geometry(line):
+    """Return the baked fields of one ``x1/y1/x2/y2`` record"""
+    dx = line["x2"] - line["x1"]
+    dy = line["y2"] - line["y1"]
+    length = math.hypot(dx, dy)
+    ux, uy = (dx / length, dy / length) if length else (0.0, 0.0)
+    return {
+        "aabb": [min(line["x1"], line["x2"]), min(line["y1"], line["y2"]),
+                 max(line["x1"], line["x2"]), max(line["y1"], line["y2"])],
+        "length": _rounded(length),
+        "direction": [_rounded(ux), _rounded(uy)],
+        "normal": [_rounded(-uy), _rounded(ux)]
+    }
+
+
+def bake_trigger_lines(data):
+    """Add ``aabb``/``length``/``direction``/``normal`` to every trigger line in place"""
+    for section in LINE_SECTIONS:
+        for line in data.get(section) or []:
+            line.update(line_geometry(line))
+    for item in data.get("items") or []:
+        item["center"] = [(item["x1"] + item["x2"]) / 2, (item["y1"] + item["y2"]) / 2]
+    if data.get("finishLine"):
+        data["finishLine"].update(line_geometry(data["finishLine"]))
+
+
+def strip_trigger_lines(data):
+    lines = [line for section in LINE_SECTIONS for line in data.get(section) or []]
+    if data.get("finishLine"):
+        lines.append(data["finishLine"])
+    for line in lines:
+        for key in ("aabb", "length", "direction", "normal", "center"):
+            line.pop(key, None)
+
+
+def _point_box_distance_sq(px, py, left, top, right, bottom):
+    ex = left - px if px < left else px - right if px > right else 0.0
+    ey = top - py if py < top else py - bottom if py > bottom else 0.0
+    return ex * ex + ey * ey
+
+
+def bake_trigger_grid(boosters, items, cell_size=COLLISION_GRID_SIZE,
+                      booster_reach=BOOSTER_REACH, item_reach=ITEM_REACH):
+    """Build the ``triggerGrid`` section for the booster and item lines"""
+    shapes = []
+    for index, b in enumerate(boosters):
+        shapes.append((BOOSTER, index, b["x1"], b["y1"], b["x2"], b["y2"], booster_reach + BAKE_MARGIN))
+    for index, item in enumerate(items):
+        cx = (item["x1"] + item["x2"]) / 2
+        cy = (item["y1"] + item["y2"]) / 2
+        shapes.append((ITEM, index, cx, cy, cx, cy, item_reach + BAKE_MARGIN))
+
+    min_x, min_y, max_x, max_y = 0, 0, TRACK_WIDTH, TRACK_HEIGHT
+    for _, _, x1, y1, x2, y2, reach in shapes:
+        min_x = min(min_x, x1 - reach, x2 - reach)
+        min_y = min(min_y, y1 - reach, y2 - reach)
+        max_x = max(max_x, x1 + reach, x2 + reach)
+        max_y = max(max_y, y1 + reach, y2 + reach)
+    origin_x = math.floor(min_x / cell_size) * cell_size
+    origin_y = math.floor(min_y / cell_size) * cell_size
+    cols = max(1, math.ceil((max_x - origin_x) / cell_size))
+    rows = max(1, math.ceil((max_y - origin_y) / cell_size))
+
+    cells = [[] for _ in range(cols * rows)]
+    for kind, index, x1, y1, x2, y2, reach in shapes:
+        reach_sq = reach * reach
+        col0 = max(0, int((min(x1, x2) - reach - origin_x) // cell_size))
+        col1 = min(cols - 1, int((max(x1, x2) + reach - origin_x) // cell_size))
+        row0 = max(0, int((min(y1, y2) - reach - origin_y) // cell_size))
+        row1 = min(rows - 1, int((max(y1, y2) + reach - origin_y) // cell_size))
+        for row in range(row0, row1 + 1):
+            top = origin_y + row * cell_size
+            for col in range(col0, col1 + 1):
+                left = origin_x + col * cell_size
+                if x1 == x2 and y1 == y2:
+                    distance_sq = _point_box_distance_sq(x1, y1, left, top, left + cell_size, top + cell_size)
+                else:
+                    distance_sq = segment_box_distance_sq(x1, y1, x2, y2, left, top,
+                                                          left + cell_size, top + cell_size)
+                if distance_sq <= reach_sq:
+                    cells[row * cols + col].append((kind, index))
+
+    cell_start = [0]
+    flat = []
+    for cell in cells:
+        for kind, index in cell:
+            flat.append(kind)
+            flat.append(index)
+        cell_start.append(len(flat) // 2)
+
+    return {
+        "cellSize": cell_size,
+        "originX": origin_x,
+        "originY": origin_y,
+        "cols": cols,
+        "rows": rows,
+        "boosterReach": booster_reach,
+        "itemReach": item_reach,
+        "cellStart": cell_start,
+        "entries": flat
+    }
+
+
+def grid_entries(grid, x, y):
+    """Return the flat (kind, index) slice of the cell containing (x, y)"""
+    cell_size = grid["cellSize"]
+    col = math.floor((x - grid["originX"]) / cell_size)
+    row = math.floor((y - grid["originY"]) / cell_size)
+    if col < 0 or row < 0 or col >= grid["cols"] or row >= grid["rows"]:
+        return ()
+    k = row * grid["cols"] + col
+    start = grid["cellStart"]
+    return grid["entries"][2 * start[k]:2 * start[k + 1]]
+
+
+# --- Références : portage des tests du serveur ---
+
+def line_segments_intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+    """Port of Room.lineSegmentsIntersect"""
+    denom = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    if abs(denom) < 0.0001:
+        return False
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denom
+    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denom
+    return 0 <= t <= 1 and 0 <= u <= 1
+
+
+def point_to_line_distance(px, py, x1, y1, x2, y2):
+    """Port of Room.pointToLineDistance"""
+    a = px - x1
+    b = py - y1
+    c = x2 - x1
+    d = y2 - y1
+    len_sq = c * c + d * d
+    if len_sq == 0:
+        return math.sqrt(a * a + b * b)
+    param = (a * c + b * d) / len_sq
+    if param < 0:
+        xx, yy = x1, y1
+    elif param > 1:
+        xx, yy = x2, y2
+    else:
+        xx, yy = x1 + param * c, y1 + param * d
+    return math.sqrt((px - xx) ** 2 + (py - yy) ** 2)
+
+
+def projection_t(px, py, x1, y1, x2, y2):
+    """``t`` of Room.projectPointOnLine"""
+    dx = x2 - x1
+    dy = y2 - y1
+    len_sq = dx * dx + dy * dy
+    if len_sq == 0:
+        return 0
+    return ((px - x1) * dx + (py - y1) * dy) / len_sq
+
+
+def _booster_triggers(booster, x, y, reach):
+    distance = point_to_line_distance(x, y, booster["x1"], booster["y1"], booster["x2"], booster["y2"])
+    return distance < reach and 0 <= projection_t(x, y, booster["x1"], booster["y1"],
+                                                  booster["x2"], booster["y2"]) <= 1
+
+
+def booster_hits(boosters, x, y, last_index, reach=BOOSTER_REACH):
+    """Room.checkBoosterCollisions: ``(triggered indices, new lastBoosterIndex)``.
+
+    The server's reset branch (``index === lastBoosterIndex``) is unreachable,
+    the booster already skipped, so it is not ported.
+    """
+    triggered = []
+    for index, booster in enumerate(boosters):
+        if index == last_index:
+            continue
+        if _booster_triggers(booster, x, y, reach):
+            triggered.append(index)
+            last_index = index
+    return triggered, last_index
+
+
+def first_item_hit(items, active, x, y, reach=ITEM_REACH):
+    """Room.checkItemBoxCollisions: index of the collected box, or None"""
+    for index, item in enumerate(items):
+        if not active[index]:
+            continue
+        cx = (item["x1"] + item["x2"]) / 2
+        cy = (item["y1"] + item["y2"]) / 2
+        if math.sqrt((x - cx) ** 2 + (y - cy) ** 2) < reach:
+            return index
+    return None
+
+
+def crosses_line(line, last_x, last_y, x, y):
+    """Exact crossing test of the movement with a trigger line"""
+    return line_segments_intersect(last_x, last_y, x, y, line["x1"], line["y1"], line["x2"], line["y2"])
+
+
+# --- Versions indexées ---
+
+def grid_booster_hits(grid, boosters, x, y, last_index):
+    """booster_hits using the grid: only the boosters of the kart's cell are tested"""
+    entries = grid_entries(grid, x, y)
+    triggered = []
+    for k in range(0, len(entries), 2):
+        if entries[k] != BOOSTER:
+            break
+        index = entries[k + 1]
+        if index != last_index and _booster_triggers(boosters[index], x, y, grid["boosterReach"]):
+            triggered.append(index)
+            last_index = index
+    return triggered, last_index
+
+
+def grid_first_item_hit(grid, items, active, x, y):
+    """first_item_hit using the grid and the baked box centers"""
+    entries = grid_entries(grid, x, y)
+    reach = grid["itemReach"]
+    for k in range(0, len(entries), 2):
+        if entries[k] != ITEM:
+            continue
+        index = entries[k + 1]
+        if not active[index]:
+            continue
+        cx, cy = items[index]["center"]
+        if math.sqrt((x - cx) ** 2 + (y - cy) ** 2) < reach:
+            return index
+    return None
+
+
+def aabb_crosses_line(line, last_x, last_y, x, y):
+    """crosses_line with the baked AABB as an early rejection"""
+    min_x, min_y, max_x, max_y = line["aabb"]
+    if (max(last_x, x) < min_x - AABB_MARGIN or min(last_x, x) > max_x + AABB_MARGIN
+            or max(last_y, y) < min_y - AABB_MARGIN or min(last_y, y) > max_y + AABB_MARGIN):
+        return False
+    return crosses_line(line, last_x, last_y, x, y)
+
+
+def crossing_direction(line, last_x, last_y, x, y):
+    """Sign of the dot product between the movement and the baked normal (1, -1 or 0)"""
+    nx, ny = line["normal"]
+    dot = nx * (x - last_x) + ny * (y - last_y)
+    return (dot > 0) - (dot < 0)
+
+
+# --- Tests d'équivalence aléatoires ---
+
+def random_lines(count, rng):
+    """Random trigger lines over the track (for maps without boosters/items)"""
+    lines = []
+    for _ in range(count):
+        x1 = rng.uniform(0, TRACK_WIDTH)
+        y1 = rng.uniform(0, TRACK_HEIGHT)
+        angle = rng.uniform(0, 2 * math.pi)
+        length = rng.choice((0, rng.uniform(20, 200)))
+        lines.append({"x1": x1, "y1": y1, "x2": x1 + length * math.cos(angle), "y2": y1 + length * math.sin(angle)})
+    return lines
+
+
+def _near_line_position(rng, line, spread):
+    t = rng.uniform(-0.2, 1.2)
+    return (line["x1"] + t * (line["x2"] - line["x1"]) + rng.uniform(-spread, spread),
+            line["y1"] + t * (line["y2"] - line["y1"]) + rng.uniform(-spread, spread))
+
+
+def verify_triggers(data, samples=20000, seed=0):
+    """Compare indexed and brute-force trigger tests on random positions.
+
+    Returns ``{"boosters": mismatches, "items": ..., "checkpoints": ...,
+    "directions": ...}`` for a map document already baked in place.
+    """
+    rng = random.Random(seed)
+    boosters = data.get("boosters") or []
+    items = data.get("items") or []
+    gates = list(data.get("checkpoints") or []) + ([data["finishLine"]] if data.get("finishLine") else [])
+    grid = data["triggerGrid"]
+    all_lines = boosters + items + gates
+    mismatches = {"boosters": 0, "items": 0, "checkpoints": 0, "directions": 0}
+
+    for n in range(samples):
+        if all_lines and n % 2:
+            x, y = _near_line_position(rng, rng.choice(all_lines), ITEM_REACH * 1.5)
+        else:
+            x, y = rng.uniform(-50, TRACK_WIDTH + 50), rng.uniform(-50, TRACK_HEIGHT + 50)
+
+        if boosters:
+            last = rng.choice([-1, rng.randrange(len(boosters))])
+            if grid_booster_hits(grid, boosters, x, y, last) != booster_hits(boosters, x, y, last):
+                mismatches["boosters"] += 1
+        if items:
+            active = [rng.random() < 0.8 for _ in items]
+            if grid_first_item_hit(grid, items, active, x, y) != first_item_hit(items, active, x, y):
+                mismatches["items"] += 1
+        if gates:
+            gate = rng.choice(gates)
+            # Déplacements d'un tick (jusqu'à 2x la vitesse max) ou extrémités exactes
+            if n % 5 == 0:
+                last_x, last_y = gate["x1"], gate["y1"]
+            else:
+                angle = rng.uniform(0, 2 * math.pi)
+                step = rng.uniform(0, 8)
+                last_x, last_y = x - step * math.cos(angle), y - step * math.sin(angle)
+            if aabb_crosses_line(gate, last_x, last_y, x, y) != crosses_line(gate, last_x, last_y, x, y):
+                mismatches["checkpoints"] += 1
+            dx = gate["x2"] - gate["x1"]
+            dy = gate["y2"] - gate["y1"]
+            dot = -dy * (x - last_x) + dx * (y - last_y)
+            if gate["length"] and abs(dot) > 1e-6 * gate["length"] and \
+                    crossing_direction(gate, last_x, last_y, x, y) != ((dot > 0) - (dot < 0)):
+                mismatches["directions"] += 1
+    return mismatches
+
+
+def bake_triggers(data):
+    """Bake the line fields and the ``triggerGrid`` of a map document in place"""
+    bake_trigger_lines(data)
+    data["triggerGrid"] = bake_trigger_grid(data.get("boosters") or [], data.get("items") or [])
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Bake trigger lines and check them against the server tests")
+    parser.add_argument("maps", nargs="*")
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="also check N maps of random boosters/items/checkpoints")
+    args = parser.parse_args(argv)
+
+    documents = []
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            documents.append((path, json.load(f)))
+    rng = random.Random(1)
+    for n in range(args.synthetic):
+        documents.append((f"synthetic-{n}", {"boosters": random_lines(40, rng), "items": random_lines(30, rng),
+                                             "checkpoints": random_lines(20, rng)}))
+
+    status = 0
+    for name, data in documents:
+        start = time.perf_counter()
+        bake_triggers(data)
+        baked = time.perf_counter() - start
+        grid = data["triggerGrid"]
+        start = grid["cellStart"]
+        sizes = [start[k + 1] - start[k] for k in range(len(start) - 1)]
+        mismatches = verify_triggers(data, args.samples)
+        total = len(data.get("boosters") or []) + len(data.get("items") or [])
+        print(f"{name}: {total} boosters/items, {grid['cols']}x{grid['rows']} cells, "
+              f"{sum(sizes) / len(sizes):.2f} avg / {max(sizes)} max per cell, baked in {baked * 1000:.1f} ms, "
+              f"{args.samples} positions: "
+              + ", ".join(f"{key} {count}" for key, count in mismatches.items()))
+        status |= any(mismatches.values())
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
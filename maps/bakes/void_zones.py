@@ -0,0 +1,410 @@
+"""Void-zone occupancy bitmap, triangulation and bounding boxes.
+
+``Player.checkVoidZoneCollision`` runs ``isPointInPolygon`` for 9 sample
+points against every closed void zone on every tick. This bake stores:
+
+- per zone (in ``voidZones``): ``aabb`` ``[minX, minY, maxX, maxY]`` and an
+  ear-clipped ``triangles`` list (flat vertex indices, 3 per triangle),
+- ``voidZoneBitmap``: one value per cell of a regular grid, bit-packed::
+
+      "voidZoneBitmap": {
+        "cellSize": 2, "originX": 0, "originY": 0, "cols": 768, "rows": 512,
+        "bits": 4, "mixed": 15, "encoding": "packed-lsb-base64", "data": "..."
+      }
+
+  0 means "in no zone", ``id + 1`` means "inside zone ``id`` only", and
+  ``mixed`` marks cells crossed by a zone edge or covered by several zones.
+  Cell ``k = row * cols + col`` occupies bits ``k * bits`` to
+  ``k * bits + bits - 1`` (least significant bit first).
+
+A cell that no edge touches is entirely inside or entirely outside every
+zone, so reading it gives exactly the even-odd answer; only ``mixed`` cells
+fall back to the exact test. Requires NumPy.
+"""
+
+import base64
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from maps.bakes.collision_grid import segment_box_distance_sq
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+DEFAULT_CELL_SIZE = 2
+ENCODING = "packed-lsb-base64"
+# Rayon et points testés par checkVoidZoneCollision
+KART_RADIUS = 14
+SAMPLE_OFFSETS = ((0, 0), (0.7, 0), (-0.7, 0), (0, 0.7), (0, -0.7),
+                  (0.5, 0.5), (-0.5, 0.5), (0.5, -0.5), (-0.5, -0.5))
+MIN_POINTS_INSIDE = 7
+# Une arête à moins de EDGE_MARGIN d'une cellule la rend « mixte »
+EDGE_MARGIN = 1e-6
+
+
+def point_in_polygon(x, y, points):
+    """Port of isPointInPolygon (even-odd rule)"""
+    inside = False
+    j = len(points) - 1
+    for i in range(len(points)):
+        xi, yi = points[i]
+        xj, yj = points[j]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def points_in_polygon(px, py, points):
+    """Vectorized point_in_polygon over broadcastable coordinate arrays"""
+    px, py = np.broadcast_arrays(np.asarray(px, dtype=np.float64), np.asarray(py, dtype=np.float64))
+    inside = np.zeros(px.shape, dtype=bool)
+    j = len(points) - 1
+    for i in range(len(points)):
+        xi, yi = points[i]
+        xj, yj = points[j]
+        j = i
+        if yi == yj:
+            # (yi > y) != (yj > y) est toujours faux
+            continue
+        inside ^= ((yi > py) != (yj > py)) & (px < (xj - xi) * (py - yi) / (yj - yi) + xi)
+    return inside
+
+
+def polygon_aabb(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _in_triangle(p, a, b, c):
+    """p inside or on the border of the counter-clockwise triangle abc"""
+    return _cross(a, b, p) >= 0 and _cross(b, c, p) >= 0 and _cross(c, a, p) >= 0
+
+
+def _segments_cross(a, b, c, d):
+    d1 = _cross(c, d, a)
+    d2 = _cross(c, d, b)
+    d3 = _cross(a, b, c)
+    d4 = _cross(a, b, d)
+    return ((d1 > 0) != (d2 > 0) and d1 != 0 and d2 != 0
+            and (d3 > 0) != (d4 > 0) and d3 != 0 and d4 != 0)
+
+
+def is_simple(points, count=None):
+    """True when no two non-adjacent edges of the closed polygon cross"""
+    count = len(points) if count is None else count
+    for i in range(count):
+        a, b = points[i], points[(i + 1) % count]
+        for j in range(i + 2, count):
+            if i == 0 and j == count - 1:
+                continue
+            if _segments_cross(a, b, points[j], points[(j + 1) % count]):
+                return False
+    return True
+
+
+def ear_clip(points):
+    """Triangulate a simple polygon by ear clipping.
+
+    Returns a flat list of vertex indices (3 per triangle), or None when the
+    polygon is not simple (no ear can be found).
+    """
+    count = len(points)
+    if count >= 2 and list(points[0]) == list(points[-1]):
+        count -= 1
+    if count < 3:
+        return []
+    if not is_simple(points, count):
+        return None
+    area = sum(points[i][0] * points[(i + 1) % count][1] - points[(i + 1) % count][0] * points[i][1]
+               for i in range(count))
+    remaining = list(range(count)) if area >= 0 else list(range(count - 1, -1, -1))
+    triangles = []
+    guard = 0
+    i = 0
+    while len(remaining) > 3:
+        if guard > len(remaining):
+            return None
+        n = len(remaining)
+        prev, cur, nxt = remaining[(i - 1) % n], remaining[i % n], remaining[(i + 1) % n]
+        a, b, c = points[prev], points[cur], points[nxt]
+        turn = _cross(a, b, c)
+        if turn == 0:
+            # Sommet aligné : on le retire sans créer de triangle plat
+            remaining.pop(i % n)
+            guard = 0
+            continue
+        if turn > 0 and not any(_in_triangle(points[k], a, b, c)
+                                for k in remaining if k not in (prev, cur, nxt)
+                                and list(points[k]) not in (list(a), list(b), list(c))):
+            triangles.extend((prev, cur, nxt))
+            remaining.pop(i % n)
+            guard = 0
+            continue
+        i += 1
+        guard += 1
+    if _cross(points[remaining[0]], points[remaining[1]], points[remaining[2]]) != 0:
+        triangles.extend(remaining)
+    return triangles
+
+
+def _zone_points(zone):
+    return zone.get("points", [])
+
+
+def bake_void_zone_bitmap(void_zones, cell_size=DEFAULT_CELL_SIZE, width=TRACK_WIDTH, height=TRACK_HEIGHT):
+    """Build the ``voidZoneBitmap`` section for the closed void zones"""
+    cols = int(math.ceil(width / cell_size))
+    rows = int(math.ceil(height / cell_size))
+    zone_count = len(void_zones)
+    bits = 1
+    while (1 << bits) - 1 < zone_count + 1:
+        bits *= 2
+    mixed = (1 << bits) - 1
+
+    centers_x = (np.arange(cols) + 0.5) * cell_size
+    centers_y = (np.arange(rows) + 0.5) * cell_size
+    values = np.zeros((rows, cols), dtype=np.uint32)
+    covered = np.zeros((rows, cols), dtype=np.uint8)
+    edge_cells = np.zeros((rows, cols), dtype=bool)
+    margin_sq = EDGE_MARGIN * EDGE_MARGIN
+
+    for zone_id, zone in enumerate(void_zones):
+        points = _zone_points(zone)
+        if not zone.get("closed", False) or len(points) < 3:
+            continue
+        inside = points_in_polygon(centers_x[np.newaxis, :], centers_y[:, np.newaxis], points)
+        values[inside] = zone_id + 1
+        covered += inside
+
+        # Cellules touchées par une arête (y compris l'arête de fermeture)
+        j = len(points) - 1
+        for i in range(len(points)):
+            x1, y1 = points[j]
+            x2, y2 = points[i]
+            j = i
+            col0 = max(0, int((min(x1, x2) - EDGE_MARGIN) // cell_size))
+            col1 = min(cols - 1, int((max(x1, x2) + EDGE_MARGIN) // cell_size))
+            row0 = max(0, int((min(y1, y2) - EDGE_MARGIN) // cell_size))
+            row1 = min(rows - 1, int((max(y1, y2) + EDGE_MARGIN) // cell_size))
+            for row in range(row0, row1 + 1):
+                top = row * cell_size
+                for col in range(col0, col1 + 1):
+                    left = col * cell_size
+                    if segment_box_distance_sq(x1, y1, x2, y2, left, top,
+                                               left + cell_size, top + cell_size) <= margin_sq:
+                        edge_cells[row, col] = True
+
+    values[(covered > 1) | edge_cells] = mixed
+    return {
+        "cellSize": cell_size,
+        "originX": 0,
+        "originY": 0,
+        "cols": cols,
+        "rows": rows,
+        "bits": bits,
+        "mixed": mixed,
+        "encoding": ENCODING,
+        "data": base64.b64encode(_pack(values.ravel(), bits)).decode("ascii")
+    }
+
+
+def _pack(values, bits):
+    per_byte = 8 // bits if bits <= 8 else 0
+    if not per_byte:
+        return values.astype("<u%d" % (bits // 8)).tobytes()
+    padded = np.zeros(-(-len(values) // per_byte) * per_byte, dtype=np.uint8)
+    padded[:len(values)] = values
+    grouped = padded.reshape(-1, per_byte)
+    packed = np.zeros(len(grouped), dtype=np.uint8)
+    for slot in range(per_byte):
+        packed |= (grouped[:, slot] << (slot * bits)).astype(np.uint8)
+    return packed.tobytes()
+
+
+def decode_bitmap(bitmap):
+    """Return the cell values as a (rows, cols) uint32 array"""
+    if bitmap.get("encoding") != ENCODING:
+        raise ValueError(f"encodage de bitmap non supporté : {bitmap.get('encoding')!r}")
+    raw = np.frombuffer(base64.b64decode(bitmap["data"]), dtype=np.uint8)
+    bits = bitmap["bits"]
+    count = bitmap["rows"] * bitmap["cols"]
+    if bits > 8:
+        values = np.frombuffer(raw.tobytes(), dtype="<u%d" % (bits // 8))[:count]
+    else:
+        per_byte = 8 // bits
+        mask = (1 << bits) - 1
+        values = np.stack([(raw >> (slot * bits)) & mask for slot in range(per_byte)], axis=1).ravel()[:count]
+    return values.astype(np.uint32).reshape(bitmap["rows"], bitmap["cols"])
+
+
+def triangulation_error(points, triangles):
+    """Absolute difference between the polygon area and the sum of its triangle areas"""
+    count = len(points)
+    area = abs(sum(points[i][0] * points[(i + 1) % count][1] - points[(i + 1) % count][0] * points[i][1]
+                   for i in range(count))) / 2
+    covered = sum(abs(_cross(points[triangles[k]], points[triangles[k + 1]], points[triangles[k + 2]])) / 2
+                  for k in range(0, len(triangles), 3))
+    return abs(area - covered)
+
+
+def bake_void_zones(void_zones, cell_size=DEFAULT_CELL_SIZE):
+    """Return ``(zones, bitmap)``: zones with ``aabb`` / ``triangles`` added, and the bitmap.
+
+    A zone whose polygon is not simple gets no ``triangles``. The bitmap is
+    None when no zone is closed.
+    """
+    zones = []
+    for zone in void_zones:
+        baked = dict(zone)
+        points = _zone_points(zone)
+        if len(points) >= 3:
+            baked["aabb"] = polygon_aabb(points)
+            triangles = ear_clip(points)
+            if triangles is None:
+                baked.pop("triangles", None)
+            else:
+                baked["triangles"] = triangles
+        zones.append(baked)
+    if not any(zone.get("closed", False) and len(_zone_points(zone)) >= 3 for zone in void_zones):
+        return zones, None
+    return zones, bake_void_zone_bitmap(void_zones, cell_size)
+
+
+def strip_void_zones(void_zones):
+    for zone in void_zones:
+        zone.pop("aabb", None)
+        zone.pop("triangles", None)
+
+
+def zones_at(bitmap, cells, void_zones, x, y):
+    """Indices of the closed zones containing (x, y), using the bitmap first"""
+    col = math.floor((x - bitmap["originX"]) / bitmap["cellSize"])
+    row = math.floor((y - bitmap["originY"]) / bitmap["cellSize"])
+    if 0 <= col < bitmap["cols"] and 0 <= row < bitmap["rows"]:
+        value = int(cells[row, col])
+        if value != bitmap["mixed"]:
+            return [value - 1] if value else []
+    hits = []
+    for zone_id, zone in enumerate(void_zones):
+        if not zone.get("closed", False):
+            continue
+        aabb = zone.get("aabb")
+        if aabb and not (aabb[0] <= x <= aabb[2] and aabb[1] <= y <= aabb[3]):
+            continue
+        if point_in_polygon(x, y, _zone_points(zone)):
+            hits.append(zone_id)
+    return hits
+
+
+def falling_zone(bitmap, cells, void_zones, x, y):
+    """checkVoidZoneCollision through the bitmap: index of the zone the kart falls in, or None"""
+    counts = [0] * len(void_zones)
+    for ox, oy in SAMPLE_OFFSETS:
+        for zone_id in zones_at(bitmap, cells, void_zones, x + KART_RADIUS * ox, y + KART_RADIUS * oy):
+            counts[zone_id] += 1
+    for zone_id, zone in enumerate(void_zones):
+        if zone.get("closed", False) and counts[zone_id] >= MIN_POINTS_INSIDE:
+            return zone_id
+    return None
+
+
+def falling_zone_exact(void_zones, x, y):
+    """Reference: the server's loop with isPointInPolygon"""
+    for zone_id, zone in enumerate(void_zones):
+        if not zone.get("closed", False):
+            continue
+        inside = sum(point_in_polygon(x + KART_RADIUS * ox, y + KART_RADIUS * oy, _zone_points(zone))
+                     for ox, oy in SAMPLE_OFFSETS)
+        if inside >= MIN_POINTS_INSIDE:
+            return zone_id
+    return None
+
+
+def verify_bitmap(bitmap, void_zones, step=1.0, offset=0.37):
+    """Check bitmap reads against exact even-odd tests on a dense sample grid.
+
+    Every position ``(offset + i * step, offset + j * step)`` of the bitmap
+    area is classified through the bitmap (falling back to the exact test on
+    mixed cells) and with the exact test for every zone. Returns
+    ``(positions, mismatches, mixed_positions)``.
+    """
+    cells = decode_bitmap(bitmap)
+    cell_size = bitmap["cellSize"]
+    xs = np.arange(offset, bitmap["cols"] * cell_size, step)
+    ys = np.arange(offset, bitmap["rows"] * cell_size, step)
+    col = np.floor((xs - bitmap["originX"]) / cell_size).astype(int)
+    row = np.floor((ys - bitmap["originY"]) / cell_size).astype(int)
+    read = cells[row[:, np.newaxis], col[np.newaxis, :]]
+    mixed = read == bitmap["mixed"]
+
+    mismatches = 0
+    for zone_id, zone in enumerate(void_zones):
+        if not zone.get("closed", False) or len(_zone_points(zone)) < 3:
+            continue
+        exact = points_in_polygon(xs[np.newaxis, :], ys[:, np.newaxis], _zone_points(zone))
+        from_bitmap = np.where(mixed, exact, read == zone_id + 1)
+        mismatches += int((from_bitmap != exact).sum())
+    return read.size, mismatches, int(mixed.sum())
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Bake and verify void-zone bitmaps")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE)
+    parser.add_argument("--step", type=float, default=1.0, help="spacing of the dense verification grid")
+    parser.add_argument("--karts", type=int, default=5000, help="random kart positions for the 9-point fall test")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            void_zones = json.load(f).get("voidZones", [])
+        start = time.perf_counter()
+        zones, bitmap = bake_void_zones(void_zones, args.cell_size)
+        baked = time.perf_counter() - start
+        if bitmap is None:
+            print(f"{path}: no closed void zone")
+            continue
+        positions, mismatches, mixed = verify_bitmap(bitmap, void_zones, args.step)
+
+        rng = random.Random(0)
+        cells = decode_bitmap(bitmap)
+        falls = 0
+        fall_mismatches = 0
+        for _ in range(args.karts):
+            if zones and rng.random() < 0.7:
+                aabb = rng.choice(zones).get("aabb", [0, 0, TRACK_WIDTH, TRACK_HEIGHT])
+                x = rng.uniform(aabb[0] - 20, aabb[2] + 20)
+                y = rng.uniform(aabb[1] - 20, aabb[3] + 20)
+            else:
+                x, y = rng.uniform(20, TRACK_WIDTH - 20), rng.uniform(20, TRACK_HEIGHT - 20)
+            expected = falling_zone_exact(zones, x, y)
+            falls += expected is not None
+            fall_mismatches += falling_zone(bitmap, cells, zones, x, y) != expected
+
+        untriangulated = sum(1 for z in zones if "triangles" not in z and len(z.get("points", [])) >= 3)
+        area_error = max((triangulation_error(z["points"], z["triangles"]) for z in zones if z.get("triangles")),
+                         default=0.0)
+        print(f"{path}: {len(zones)} zones ({untriangulated} not triangulated, "
+              f"max area error {area_error:.2g} px²), "
+              f"{bitmap['cols']}x{bitmap['rows']} cells x {bitmap['bits']} bits = "
+              f"{len(bitmap['data']) / 1e3:.0f} kB base64, baked in {baked * 1000:.0f} ms")
+        print(f"  dense grid: {positions} positions, {mismatches} mismatches, "
+              f"{100 * mixed / positions:.2f}% on mixed cells; "
+              f"{args.karts} karts: {falls} falls, {fall_mismatches} mismatches")
+        status |= bool(mismatches or fall_mismatches or area_error > 1e-3)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
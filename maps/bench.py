@@ -0,0 +1,472 @@
+"""Editor and map tools benchmarks: ``python -m maps.bench``.
+
+Startup benchmarks run in a fresh interpreter so import and startup costs
+are measured cold, the way a user sees them. The hot-path benchmarks run in
+this process on tracks from ``maps.generate`` with 10³, 10⁴ and 10⁵ wall
+points and thousands of checkpoints, boosters and items, plus a large road
+mesh:
+
+- ``map-import-*`` / ``map-export-*``: the Tk-free parts of import_json and
+  export_json (read, parse, model; document, write). The bakes are timed per
+  stage by ``python -m maps.compile``;
+- ``editor-*``: import into the editor, ``redraw``, picking, drag and undo,
+  road selection/extrusion/undo, on a real Tk canvas.
+
+The editor benchmarks need a display. Without one, ``Xvfb`` is started on a
+spare display when it is installed; otherwise they are skipped.
+
+Every run is appended to ``build/bench/history.jsonl``. ``--save FILE``
+stores the medians as a baseline and ``--compare FILE`` fails when a metric
+is slower than the baseline by more than ``--threshold``.
+"""
+
+import datetime
+import fnmatch
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_EDITOR = os.path.join(_ROOT, "maps", "map_editor.py")
+DEFAULT_MAP = os.path.join(_ROOT, "maps", "nimbusrush.json")
+DEFAULT_HISTORY = os.path.join("build", "bench", "history.jsonl")
+DEFAULT_THRESHOLD = 0.25
+# En dessous de cet écart absolu, une mesure n'est pas une régression (bruit de l'horloge)
+MIN_REGRESSION_MS = 1.0
+
+_IMPORT_SNIPPET = ("import time; start = time.perf_counter(); import {module}; "
+                   "print((time.perf_counter() - start) * 1000)")
+
+# Taille -> (points de murs, checkpoints, boosters et items, quads de route, points de la ligne de course)
+SIZES = {
+    "1k": (1_000, 100, 100, 100, 250),
+    "10k": (10_000, 1_000, 1_000, 1_000, 2_500),
+    "100k": (100_000, 5_000, 5_000, 10_000, 10_000),
+}
+# Bande de route synthétique : ellipse centrée
+_CENTER = (768, 512)
+_RADII = (600, 380)
+
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def start_xvfb(display=":97"):
+    """Start Xvfb on ``display`` and export it in ``DISPLAY``; returns the process or None"""
+    if has_display() or not shutil.which("Xvfb"):
+        return None
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    socket = f"/tmp/.X11-unix/X{display.lstrip(':')}"
+    deadline = time.perf_counter() + 5
+    while not os.path.exists(socket) and process.poll() is None and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    if process.poll() is not None or not os.path.exists(socket):
+        process.kill()
+        return None
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def _run(command):
+    """Run ``command`` from the repository root; returns ``(wall_ms, stdout_lines)``"""
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=_ROOT, capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1000, completed.stdout.splitlines()
+
+
+def bench_import(module):
+    """Import time of ``module`` in a fresh interpreter, in ms"""
+    def run():
+        _wall, lines = _run([sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)])
+        return {"import": float(lines[-1])}
+    return run
+
+
+def bench_first_frame(map_path=None):
+    """Editor time to first frame (and to the loaded map), in ms since the editor module started.
+
+    ``process`` is the wall time of the whole run, interpreter startup included.
+    """
+    def run():
+        command = [sys.executable, _EDITOR, "--first-frame"]
+        if map_path:
+            command += ["--open", map_path]
+        wall, lines = _run(command)
+        result = {"process": wall}
+        for line in lines:
+            for label, key in (("first frame ", "firstFrame"), ("map loaded ", "mapLoaded")):
+                if line.startswith(label):
+                    result[key] = float(line[len(label):].split()[0])
+        return result
+    return run
+
+
+def _track_point(angle, offset):
+    """Point of the road strip ellipse at ``angle``, ``offset`` px outward from its centre line"""
+    return [round(_CENTER[0] + (_RADII[0] + offset) * math.cos(angle), 3),
+            round(_CENTER[1] + (_RADII[1] + offset) * math.sin(angle), 3)]
+
+
+def synthetic_document(size):
+    """Map document of a generated track of ``SIZES[size]`` (``maps.generate``, fixed seed)"""
+    from maps.generate import generate_track
+    wall_points, checkpoints, pads, _road_quads, racing_points = SIZES[size]
+    return generate_track(seed=1, points=wall_points // 2, racing_points=racing_points, checkpoints=checkpoints,
+                          boosters=pads, items=pads, void_zones=4, name=f"synthetic_{size}")
+
+
+def synthetic_road_mesh(size, half_width=40):
+    """``(road_mesh, road_edges, road_faces)`` of a strip of ``SIZES[size]`` quads along the track"""
+    quads = SIZES[size][3]
+    mesh = []
+    edges = []
+    faces = []
+    for k in range(quads + 1):
+        angle = 2 * math.pi * k / (quads + 1)
+        for offset in (-half_width, half_width):
+            x, y = _track_point(angle, offset)
+            mesh.append({"x": x, "y": y, "id": len(mesh)})
+        a, b = 2 * k, 2 * k + 1
+        edges.append((a, b))
+        if k:
+            edges.extend([(a - 2, a), (b - 2, b)])
+            faces.append((a - 2, b - 2, b, a))
+    return mesh, edges, faces
+
+
+_SYNTHETIC_FILES = {}
+
+
+def synthetic_file(size):
+    """Path of the synthetic map of ``size`` written as JSON (once per process)"""
+    if size not in _SYNTHETIC_FILES:
+        from maps.core.writer import write_map
+        fd, path = tempfile.mkstemp(prefix=f"kartrush-bench-{size}-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            write_map(synthetic_document(size), f)
+        _SYNTHETIC_FILES[size] = path
+    return _SYNTHETIC_FILES[size]
+
+
+def _remove_synthetic_files():
+    for path in _SYNTHETIC_FILES.values():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    _SYNTHETIC_FILES.clear()
+
+
+def _ms(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_map_import(size):
+    """Tk-free part of import_json: read, parse and build the model, in ms"""
+    def run():
+        from maps.core import load_map
+        _model, timings = load_map(synthetic_file(size))
+        model_time = timings["total"] - timings["read"] - timings["parse"]
+        return {"read": timings["read"] * 1000, "parse": timings["parse"] * 1000, "model": model_time * 1000}
+    return run
+
+
+def bench_map_export(size):
+    """Tk-free part of export_json without the bakes: document and write, in ms"""
+    def run():
+        from maps.core import build_model, export_document, road_segments
+        from maps.core.writer import write_map
+        model = build_model(synthetic_document(size))
+        mesh, _edges, faces = synthetic_road_mesh(size)
+        start = time.perf_counter()
+        data = export_document(model, road_segments(mesh, faces))
+        result = {"document": _ms(start)}
+        start = time.perf_counter()
+        write_map(data, io.StringIO())
+        result["write"] = _ms(start)
+        return result
+    return run
+
+
+class _Event:
+    """Mouse event passed to the editor handlers"""
+
+    def __init__(self, x, y, state=0):
+        self.x = x
+        self.y = y
+        self.state = state
+
+
+_EDITOR_STATE = {}
+
+
+def _editor(size):
+    """Shared MapEditor, reset to the synthetic map of ``size``"""
+    if "app" not in _EDITOR_STATE:
+        import tkinter as tk
+        from maps.map_editor import MapEditor
+        root = tk.Tk()
+        _EDITOR_STATE["root"] = root
+        _EDITOR_STATE["app"] = MapEditor(root)
+        root.update()
+    app = _EDITOR_STATE["app"]
+    if _EDITOR_STATE.get("size") != size:
+        from maps.core import build_model
+        app.model = build_model(synthetic_document(size))
+        app.road_mesh, app.road_edges, app.road_faces = synthetic_road_mesh(size)
+        _EDITOR_STATE["size"] = size
+    app.viewport.reset()
+    app.mode = "edit"
+    app.selected_object = None
+    app.selected_vertices = []
+    app.actions_stack = []
+    return app
+
+
+def _flush():
+    """Let Tk draw the canvas items created so far"""
+    _EDITOR_STATE["root"].update_idletasks()
+
+
+def _close_editor():
+    if "root" in _EDITOR_STATE:
+        _EDITOR_STATE["root"].destroy()
+    _EDITOR_STATE.clear()
+
+
+def bench_editor_import(size):
+    """import_json without the dialogs: load, apply to the editor and draw, in ms"""
+    def run():
+        from maps.core import MapModel, load_map
+        app = _editor(size)
+        start = time.perf_counter()
+        model, _timings = load_map(synthetic_file(size))
+        result = {"load": _ms(start)}
+        start = time.perf_counter()
+        app.model = MapModel()
+        app.apply_model(model)
+        app.redraw()
+        _flush()
+        result["applyAndDraw"] = _ms(start)
+        # Le mesh de route n'est pas dans le document : la taille suivante le recharge
+        _EDITOR_STATE.pop("size")
+        return result
+    return run
+
+
+def bench_editor_redraw(size):
+    """Full redraw of the canvas, in ms"""
+    def run():
+        app = _editor(size)
+        start = time.perf_counter()
+        app.redraw()
+        _flush()
+        return {"redraw": _ms(start)}
+    return run
+
+
+def bench_editor_pick(size):
+    """Clicks that hit nothing: the selection code scans every object, in ms"""
+    def run():
+        app = _editor(size)
+        app.mode = "modify_curve"
+        start = time.perf_counter()
+        app.on_click(_Event(5, 5))
+        result = {"pickPoint": _ms(start)}
+        app.mode = "edit"
+        start = time.perf_counter()
+        app.on_click(_Event(5, 5))
+        _flush()
+        result["pickObject"] = _ms(start)
+        return result
+    return run
+
+
+def bench_editor_undo(size):
+    """Drag of a wall point (press, move, release) then undo, in ms"""
+    def run():
+        app = _editor(size)
+        app.mode = "modify_curve"
+        x, y = app.continuous_curves[0]["points"][0]
+        start = time.perf_counter()
+        app.on_click(_Event(x, y))
+        app.on_drag(_Event(x + 15, y + 10))
+        app.on_release(_Event(x + 15, y + 10))
+        _flush()
+        result = {"drag": _ms(start)}
+        start = time.perf_counter()
+        app.undo()
+        _flush()
+        result["undo"] = _ms(start)
+        return result
+    return run
+
+
+def bench_editor_road(size):
+    """Road mode: select the end edge, extrude it, undo the extrusion, in ms"""
+    def run():
+        app = _editor(size)
+        app.mode = "road"
+        end = [app.road_mesh[-2], app.road_mesh[-1]]
+        start = time.perf_counter()
+        app.select_road_vertices(end[0]["x"], end[0]["y"])
+        app.select_road_vertices(end[1]["x"], end[1]["y"], shift_held=True)
+        _flush()
+        result = {"select": _ms(start)}
+        start = time.perf_counter()
+        app.start_road_extrude()
+        app.extrude_preview = {"v1": {"x": end[0]["x"] + 20, "y": end[0]["y"]},
+                               "v2": {"x": end[1]["x"] + 20, "y": end[1]["y"]}}
+        app.confirm_road_operation()
+        _flush()
+        result["extrude"] = _ms(start)
+        start = time.perf_counter()
+        app.undo()
+        _flush()
+        result["undo"] = _ms(start)
+        return result
+    return run
+
+
+# (nom, fabrique de la mesure, besoin d'un affichage)
+BENCHMARKS = (
+    ("import-core", bench_import("maps.core"), False),
+    ("import-editor", bench_import("maps.map_editor"), False),
+    ("editor-first-frame", bench_first_frame(), True),
+    ("editor-first-frame-open", bench_first_frame(DEFAULT_MAP), True),
+) + tuple(
+    (f"{name}-{size}", factory(size), needs_display)
+    for size in SIZES
+    for name, factory, needs_display in (
+        ("map-import", bench_map_import, False),
+        ("map-export", bench_map_export, False),
+        ("editor-import", bench_editor_import, True),
+        ("editor-redraw", bench_editor_redraw, True),
+        ("editor-pick", bench_editor_pick, True),
+        ("editor-undo", bench_editor_undo, True),
+        ("editor-road", bench_editor_road, True),
+    )
+)
+
+
+def _selected(name, patterns):
+    return not patterns or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def run_benchmarks(names=None, repeat=5, report=print):
+    """Run the selected benchmarks; returns ``{name: {metric: median_ms}}`` (skipped ones are absent).
+
+    ``names`` are shell-style patterns (``editor-*-10k``).
+    """
+    results = {}
+    try:
+        for name, run, needs_display in BENCHMARKS:
+            if not _selected(name, names):
+                continue
+            if needs_display and not has_display():
+                report(f"{name}: skipped (no display)")
+                continue
+            samples = [run() for _ in range(repeat)]
+            medians = {metric: statistics.median(sample[metric] for sample in samples) for metric in samples[0]}
+            results[name] = medians
+            report(f"{name}: " + ", ".join(f"{metric} {value:.1f} ms" for metric, value in medians.items()))
+    finally:
+        _close_editor()
+        _remove_synthetic_files()
+    return results
+
+
+def _git_commit():
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True,
+                                   text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def results_record(results, repeat):
+    """Results with what is needed to compare runs: date, commit, machine, Python"""
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def append_history(record, path=DEFAULT_HISTORY):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Metrics slower than ``baseline`` by more than ``threshold``: ``[(name, metric, before, after)]``.
+
+    Slowdowns under ``MIN_REGRESSION_MS`` are ignored.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if before is not None and value > before * (1 + threshold) and value - before > MIN_REGRESSION_MS:
+                regressions.append((name, metric, before, value))
+    return regressions
+
+
+def _main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m maps.bench", description="Editor and map tools benchmarks")
+    parser.add_argument("names", nargs="*",
+                        help=f"benchmarks to run, shell patterns allowed ({', '.join(n for n, _r, _d in BENCHMARKS)})")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="runs per benchmark, the median is reported")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="JSON lines file every run is appended to")
+    parser.add_argument("--save", metavar="FILE", help="store this run as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="baseline to compare with (fails on regressions)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default: %(default)s)")
+    parser.add_argument("--no-xvfb", action="store_true", help="do not start Xvfb when there is no display")
+    args = parser.parse_args(argv)
+
+    xvfb = None if args.no_xvfb else start_xvfb()
+    try:
+        results = run_benchmarks(args.names, args.repeat)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+    record = results_record(results, args.repeat)
+    append_history(record, args.history)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline["results"], args.threshold)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.1f} -> {after:.1f} ms (+{(after / before - 1) * 100:.0f} %)")
+        if regressions:
+            return 1
+        print(f"no regression above {args.threshold * 100:.0f} % against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,246 @@
+"""Headless batch compiler: ``python -m maps.compile maps/*.json``.
+
+Every map goes through the same path as an export from the editor, without
+importing Tk: load (``maps.core.loader``), rebuild the document
+(``maps.core.export``), run the bakes (``map_compiler``), write the JSON layout of
+the editor or a ``.kmap`` binary. Maps are compiled in parallel in a
+``ProcessPoolExecutor``, and per-stage timings are printed for each one.
+Outputs are named after the source files: two sources with the same name
+(from different directories) are rejected before anything is compiled.
+
+A map is skipped when the hash of its source, of the enabled options and of
+the compiler sources matches the last build recorded in
+``<out-dir>/.compile-cache.json`` and its output still exists.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maps.map_compiler import BAKES
+
+DEFAULT_OUT_DIR = os.path.join("build", "maps")
+CACHE_NAME = ".compile-cache.json"
+# Bakes qui modifient la géométrie source : seulement avec --enable
+GEOMETRY_EDITS = ("simplify", "racingLineResample")
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def batch_options(enable=(), disable=()):
+    """Every bake enabled except the geometry edits, then the explicit overrides"""
+    options = {key: key not in GEOMETRY_EDITS for key, _label, _enabled, _bake, _strip in BAKES}
+    for key in enable:
+        options[key] = True
+    for key in disable:
+        options[key] = False
+    return options
+
+
+def compiler_fingerprint():
+    """Hash of the sources that produce the compiled output"""
+    digest = hashlib.sha256()
+    names = ["map_compiler.py", "map_binary.py", "game_config.py"]
+    for package in ("core", "bakes"):
+        directory = os.path.join(_PACKAGE_DIR, package)
+        names += [os.path.join(package, name) for name in sorted(os.listdir(directory)) if name.endswith(".py")]
+    for name in names:
+        path = os.path.join(_PACKAGE_DIR, name)
+        if os.path.exists(path):
+            digest.update(name.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def content_hash(raw, options, output_format, fingerprint):
+    digest = hashlib.sha256(raw)
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    digest.update(output_format.encode("utf-8"))
+    digest.update(fingerprint.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_path(source, out_dir, output_format):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(out_dir, stem + (".kmap" if output_format == "kmap" else ".json"))
+
+
+def check_destinations(sources, out_dir, output_format):
+    """Raise ValueError when two different sources would be written to the same output file"""
+    owners = {}
+    for source in sources:
+        destination = output_path(source, out_dir, output_format)
+        owners.setdefault(os.path.normcase(os.path.abspath(destination)), set()).add(os.path.abspath(source))
+    clashes = sorted(paths for paths in owners.values() if len(paths) > 1)
+    if clashes:
+        details = " ; ".join(", ".join(sorted(paths)) for paths in clashes)
+        raise ValueError(f"plusieurs maps portent le même nom et écraseraient la même sortie : {details}")
+
+
+def compile_file(source, destination, options, output_format="json"):
+    """Compile one map file; returns ``(timings, output_size)``.
+
+    ``timings`` maps each stage (``read``, ``parse``, ``model``, ``export``,
+    every enabled bake, ``write``) to seconds, in execution order.
+    """
+    from maps.map_compiler import compile_map
+    from maps.core.export import export_document
+    from maps.core.loader import build_model, parse_map_bytes
+
+    clock = time.perf_counter
+    timings = {}
+    start = clock()
+    with open(source, "rb") as f:
+        raw = f.read()
+    timings["read"] = clock() - start
+
+    stage = clock()
+    data = parse_map_bytes(raw)
+    timings["parse"] = clock() - stage
+
+    stage = clock()
+    model = build_model(data)
+    timings["model"] = clock() - stage
+
+    stage = clock()
+    document = export_document(model)
+    timings["export"] = clock() - stage
+
+    compile_map(document, options, timings)
+
+    stage = clock()
+    # Écriture dans un fichier temporaire puis renommage : pas de sortie tronquée
+    temporary = destination + ".tmp"
+    if output_format == "kmap":
+        from maps.map_binary import write_binary_map
+        write_binary_map(document, temporary)
+    else:
+        from maps.core.writer import write_map
+        with open(temporary, "w", encoding="utf-8") as f:
+            write_map(document, f)
+    os.replace(temporary, destination)
+    timings["write"] = clock() - stage
+    return timings, os.path.getsize(destination)
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def format_stage_timings(timings):
+    return ", ".join(f"{stage} {seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+def compile_maps(sources, out_dir=DEFAULT_OUT_DIR, options=None, output_format="json", jobs=None, force=False,
+                 report=print):
+    """Compile ``sources`` into ``out_dir``; returns ``{source: status}``.
+
+    ``status`` is ``"compiled"``, ``"skipped"`` or the error message; a
+    source that cannot be read gets its error and the others go on. The
+    outputs are named after the sources' base names: a source listed twice
+    is compiled once, and ValueError is raised before anything is compiled
+    when two different sources share a name.
+    """
+    if options is None:
+        options = batch_options()
+    # Même fichier listé deux fois (motifs qui se recoupent) : compilé une fois
+    unique = {}
+    for source in sources:
+        unique.setdefault(os.path.normcase(os.path.abspath(source)), source)
+    sources = list(unique.values())
+    check_destinations(sources, out_dir, output_format)
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.join(out_dir, CACHE_NAME)
+    cache = _load_cache(cache_path)
+    fingerprint = compiler_fingerprint()
+
+    pending = {}
+    results = {}
+    for source in sources:
+        destination = output_path(source, out_dir, output_format)
+        # Une entrée par fichier produit : changer de format ne vide pas le cache de l'autre
+        key = os.path.abspath(destination)
+        try:
+            with open(source, "rb") as f:
+                digest = content_hash(f.read(), options, output_format, fingerprint)
+        except OSError as e:
+            # Source absente ou illisible : signalée, les autres maps sont compilées
+            results[source] = f"{type(e).__name__}: {e}"
+            report(f"{source}: ERROR {results[source]}")
+            continue
+        entry = cache.get(key)
+        if not force and entry and entry.get("hash") == digest and os.path.exists(destination):
+            results[source] = "skipped"
+            report(f"{source}: unchanged, skipped")
+            continue
+        pending[source] = (key, destination, digest)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(compile_file, source, destination, options, output_format): source
+                       for source, (_key, destination, _digest) in pending.items()}
+            for future in as_completed(futures):
+                source = futures[future]
+                key, destination, digest = pending[source]
+                try:
+                    timings, size = future.result()
+                except Exception as e:
+                    results[source] = f"{type(e).__name__}: {e}"
+                    cache.pop(key, None)
+                    report(f"{source}: ERROR {results[source]}")
+                    continue
+                results[source] = "compiled"
+                cache[key] = {"hash": digest, "source": os.path.abspath(source)}
+                total = sum(timings.values())
+                report(f"{source} -> {destination} ({size / 1e3:.0f} kB) in {total * 1000:.0f} ms: "
+                       f"{format_stage_timings(timings)} (ms)")
+        _save_cache(cache_path, cache)
+    return results
+
+
+def _main(argv):
+    import argparse
+    keys = [key for key, _label, _enabled, _bake, _strip in BAKES]
+    parser = argparse.ArgumentParser(prog="python -m maps.compile",
+                                     description="Compile map JSON files with every bake, in parallel")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("-o", "--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--format", choices=("json", "kmap"), default="json")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--enable", action="append", default=[], choices=keys, metavar="BAKE",
+                        help=f"enable a bake ({', '.join(keys)})")
+    parser.add_argument("--disable", action="append", default=[], choices=keys, metavar="BAKE")
+    parser.add_argument("--force", action="store_true", help="ignore the build cache")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        results = compile_maps(args.maps, args.out_dir, batch_options(args.enable, args.disable), args.format,
+                               args.jobs, args.force)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    compiled = sum(1 for status in results.values() if status == "compiled")
+    skipped = sum(1 for status in results.values() if status == "skipped")
+    failed = len(results) - compiled - skipped
+    print(f"{compiled} compiled, {skipped} skipped, {failed} failed "
+          f"in {time.perf_counter() - start:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
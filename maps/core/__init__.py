@@ -0,0 +1,13 @@
+"""Tk-free map core: model, load/export, writer, splines and view transforms.
+
+Everything the editor does to a map that does not need a window lives here,
+so the command line tools and the compiler import it without Tk or PIL.
+``maps.core.writer`` has its own command line checks and is imported
+directly (``from maps.core.writer import write_map``).
+"""
+
+from maps.core.export import export_document, road_segments
+from maps.core.loader import JSON_BACKEND, MapLoadError, build_model, format_timings, load_map, parse_map_bytes
+from maps.core.model import MapModel
+from maps.core.spline import catmull_rom_point, catmull_rom_spans, sample_curve, tessellate_curve
+from maps.core.transform import Viewport
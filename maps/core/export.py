@@ -0,0 +1,78 @@
+"""Build the exported map document from a model.
+
+``export_document`` accepts a MapModel or any object with the same
+attributes (the editor itself), so the editor and the command line compiler
+write exactly the same document.
+"""
+
+import math
+
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+
+def road_segments(road_mesh, road_faces):
+    """Convert the quads of a road mesh to exported road segments.
+
+    Each quad ``(v0, v1, v2, v3)`` becomes the segment between the middles of
+    its edges v0-v1 and v2-v3, as wide as the edge v0-v1.
+    """
+    segments = []
+    for face in road_faces:
+        if len(face) == 4:
+            v0, v1, v2, v3 = (road_mesh[i] for i in face)
+            segments.append({
+                "x1": (v0["x"] + v1["x"]) / 2,
+                "y1": (v0["y"] + v1["y"]) / 2,
+                "x2": (v2["x"] + v3["x"]) / 2,
+                "y2": (v2["y"] + v3["y"]) / 2,
+                "width": math.sqrt((v0["x"] - v1["x"])**2 + (v0["y"] - v1["y"])**2)
+            })
+    return segments
+
+
+def _road_records(roads):
+    return [{"x1": r["x1"], "y1": r["y1"], "x2": r["x2"], "y2": r["y2"], "width": r["width"]} for r in roads]
+
+
+def export_document(model, roads=None):
+    """Return the map document of ``model``.
+
+    ``roads`` replaces ``model.roads`` (the editor passes the segments of its
+    road mesh).
+    """
+    data = {
+        "id": model.map_id,
+        "name": model.map_name,
+        "width": TRACK_WIDTH,
+        "height": TRACK_HEIGHT,
+        "music": model.music_key,
+        "background": model.background_key,
+        "raceSettings": model.race_settings,
+        "spawnPoints": [{"x": sp["x"], "y": sp["y"], "angle": sp.get("angle", 0)}
+                        for sp in model.spawnpoints],
+        "walls": [{"x": r["x"], "y": r["y"], "width": r["width"], "height": r["height"], "angle": r.get("angle", 0)}
+                  for r in model.rectangles],
+        "curves": [{"points": c["points"]} for c in model.curves],
+        "continuousCurves": [{"points": cc["points"], "type": "continuous", "closed": cc.get("closed", False)}
+                             for cc in model.continuous_curves],
+        "checkpoints": [{"x1": c["x1"], "y1": c["y1"], "x2": c["x2"], "y2": c["y2"]}
+                        for c in model.checkpoints],
+        "finishLine": {"x1": model.finish_line["x1"], "y1": model.finish_line["y1"],
+                       "x2": model.finish_line["x2"], "y2": model.finish_line["y2"]}
+                      if model.finish_line else None,
+        "boosters": [{"x1": b["x1"], "y1": b["y1"], "x2": b["x2"], "y2": b["y2"]}
+                     for b in model.boosters],
+        "items": [{"x1": i["x1"], "y1": i["y1"], "x2": i["x2"], "y2": i["y2"]}
+                  for i in model.items],
+        "voidZones": [{"points": vz["points"], "closed": True}
+                      for vz in model.void_zones],
+        "roads": _road_records(model.roads if roads is None else roads)
+    }
+
+    if model.racing_line:
+        # Points au format [x, y] (l'éditeur peut stocker des tuples)
+        data["racingLine"] = {
+            "points": [[p[0], p[1]] if isinstance(p, tuple) else p for p in model.racing_line["points"]],
+            "totalLength": model.racing_line.get("totalLength", 0)
+        }
+    return data
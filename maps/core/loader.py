@@ -0,0 +1,311 @@
+"""Fast map loader: parse, validate and convert a map JSON in a single pass.
+
+Parsing uses ``orjson`` when it is installed and falls back to the standard
+``json`` module otherwise. Each section is validated while the editor records
+are built, so no per-element copies are made, and legacy rectangle
+checkpoints/boosters/items are converted to lines on the fly.
+"""
+
+import json
+import math
+import time
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+from maps.core.model import MapModel
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+_NUMBERS = (int, float)
+
+
+class MapLoadError(ValueError):
+    """Raised when a map document does not match the expected schema"""
+
+
+def parse_map_bytes(raw):
+    """Decode a map document from bytes with the fastest available backend"""
+    try:
+        if orjson is not None:
+            return orjson.loads(raw)
+        return json.loads(raw)
+    except ValueError as e:
+        raise MapLoadError(f"JSON invalide : {e}") from e
+
+
+def _number(value, where):
+    if type(value) not in _NUMBERS:
+        raise MapLoadError(f"{where} : nombre attendu, trouvé {value!r}")
+    return value
+
+
+def _field(record, key, where, default=None):
+    value = record.get(key, default)
+    if value is None:
+        raise MapLoadError(f"{where}.{key} : valeur manquante")
+    return _number(value, f"{where}.{key}")
+
+
+def _string(value, where):
+    if not isinstance(value, str):
+        raise MapLoadError(f"{where} : texte attendu, trouvé {value!r}")
+    return value
+
+
+def _records(data, key):
+    """Return the list stored under ``key`` (missing or null means empty)"""
+    value = data.get(key)
+    if value is None:
+        return []
+    if type(value) is not list:
+        raise MapLoadError(f"{key} : liste attendue")
+    for i, record in enumerate(value):
+        if type(record) is not dict:
+            raise MapLoadError(f"{key}[{i}] : objet attendu")
+    return value
+
+
+def _points(record, where, minimum=0):
+    """Validate a list of [x, y] points in place and return it"""
+    points = record.get("points", [])
+    if type(points) is not list:
+        raise MapLoadError(f"{where}.points : liste attendue")
+    for i, point in enumerate(points):
+        if type(point) is not list or len(point) != 2 \
+                or type(point[0]) not in _NUMBERS or type(point[1]) not in _NUMBERS:
+            raise MapLoadError(f"{where}.points[{i}] : point [x, y] attendu, trouvé {point!r}")
+    if len(points) < minimum:
+        raise MapLoadError(f"{where}.points : au moins {minimum} points attendus")
+    return points
+
+
+def _line(record, where, kind):
+    return {
+        "x1": _field(record, "x1", where),
+        "y1": _field(record, "y1", where),
+        "x2": _field(record, "x2", where),
+        "y2": _field(record, "y2", where),
+        "type": kind
+    }
+
+
+def _gate_rect_to_line(rect, where, kind):
+    """Ancien format rectangle de checkpoint / ligne d'arrivée : ligne le long de la hauteur"""
+    x, y = _field(rect, "x", where), _field(rect, "y", where)
+    width, height = _field(rect, "width", where), _field(rect, "height", where)
+    cx = x + width / 2
+    cy = y + height / 2
+    angle = (_field(rect, "angle", where, 0) + 90) * math.pi / 180
+    half_length = height / 2
+    return {
+        "x1": cx - math.cos(angle) * half_length,
+        "y1": cy - math.sin(angle) * half_length,
+        "x2": cx + math.cos(angle) * half_length,
+        "y2": cy + math.sin(angle) * half_length,
+        "type": kind
+    }
+
+
+def _pad_rect_to_line(rect, where, kind):
+    """Ancien format rectangle de booster / item : ligne le long du plus grand côté"""
+    x, y = _field(rect, "x", where), _field(rect, "y", where)
+    width, height = _field(rect, "width", where), _field(rect, "height", where)
+    cx = x + width / 2
+    cy = y + height / 2
+    angle = _field(rect, "angle", where, 0) * math.pi / 180
+    half_length = max(width, height) / 2
+    return {
+        "x1": cx - math.cos(angle) * half_length,
+        "y1": cy - math.sin(angle) * half_length,
+        "x2": cx + math.cos(angle) * half_length,
+        "y2": cy + math.sin(angle) * half_length,
+        "type": kind
+    }
+
+
+def _load_spawn_points(model, data):
+    for i, sp in enumerate(_records(data, "spawnPoints")):
+        where = f"spawnPoints[{i}]"
+        model.spawnpoints.append({
+            "x": _field(sp, "x", where),
+            "y": _field(sp, "y", where),
+            "angle": _field(sp, "angle", where, 0),
+            "type": "spawnpoint",
+            "width": 30,
+            "height": 20
+        })
+
+
+def _load_walls(model, data):
+    for i, wall in enumerate(_records(data, "walls")):
+        where = f"walls[{i}]"
+        model.rectangles.append({
+            "x": _field(wall, "x", where),
+            "y": _field(wall, "y", where),
+            "width": _field(wall, "width", where),
+            "height": _field(wall, "height", where),
+            "angle": _field(wall, "angle", where, 0),
+            "type": "wall"
+        })
+
+
+def _load_curves(model, data):
+    for i, curve in enumerate(_records(data, "curves")):
+        model.curves.append({"points": _points(curve, f"curves[{i}]"), "type": "curve"})
+
+
+def _load_continuous_curves(model, data):
+    for i, curve in enumerate(_records(data, "continuousCurves")):
+        model.continuous_curves.append({
+            "points": _points(curve, f"continuousCurves[{i}]"),
+            "type": "continuous_curve",
+            "closed": bool(curve.get("closed", False))
+        })
+
+
+def _load_void_zones(model, data):
+    for i, zone in enumerate(_records(data, "voidZones")):
+        model.void_zones.append({
+            "points": _points(zone, f"voidZones[{i}]"),
+            "type": "void_zone",
+            "closed": True
+        })
+
+
+def _load_roads(model, data):
+    for i, road in enumerate(_records(data, "roads")):
+        where = f"roads[{i}]"
+        model.roads.append({
+            "x1": _field(road, "x1", where, 0),
+            "y1": _field(road, "y1", where, 0),
+            "x2": _field(road, "x2", where, 0),
+            "y2": _field(road, "y2", where, 0),
+            "width": _field(road, "width", where, 80),
+            "type": "road"
+        })
+
+
+def _load_checkpoints(model, data):
+    for i, cp in enumerate(_records(data, "checkpoints")):
+        where = f"checkpoints[{i}]"
+        if "width" in cp:
+            model.checkpoints.append(_gate_rect_to_line(cp, where, "checkpoint"))
+        else:
+            model.checkpoints.append(_line(cp, where, "checkpoint"))
+
+
+def _load_finish_line(model, data):
+    fl = data.get("finishLine")
+    if not fl:
+        return
+    if type(fl) is not dict:
+        raise MapLoadError("finishLine : objet attendu")
+    if "width" in fl:
+        model.finish_line = _gate_rect_to_line(fl, "finishLine", "finish")
+    else:
+        model.finish_line = _line(fl, "finishLine", "finish")
+
+
+def _load_pads(key, attribute, kind):
+    def load(model, data):
+        target = getattr(model, attribute)
+        for i, pad in enumerate(_records(data, key)):
+            where = f"{key}[{i}]"
+            if "width" in pad:
+                target.append(_pad_rect_to_line(pad, where, kind))
+            else:
+                target.append(_line(pad, where, kind))
+    return load
+
+
+def _load_racing_line(model, data):
+    racing_line = data.get("racingLine")
+    if not racing_line:
+        return
+    if type(racing_line) is not dict:
+        raise MapLoadError("racingLine : objet attendu")
+    model.racing_line = {
+        "points": _points(racing_line, "racingLine"),
+        "totalLength": _field(racing_line, "totalLength", "racingLine", 0),
+        "type": "racing_line"
+    }
+
+
+# (section du document, fonction de chargement), dans l'ordre de l'ancien import
+SECTIONS = (
+    ("walls", _load_walls),
+    ("curves", _load_curves),
+    ("continuousCurves", _load_continuous_curves),
+    ("voidZones", _load_void_zones),
+    ("roads", _load_roads),
+    ("checkpoints", _load_checkpoints),
+    ("finishLine", _load_finish_line),
+    ("spawnPoints", _load_spawn_points),
+    ("boosters", _load_pads("boosters", "boosters", "booster")),
+    ("items", _load_pads("items", "items", "item")),
+    ("racingLine", _load_racing_line),
+)
+
+
+def build_model(data, timings=None):
+    """Validate a parsed map document and build a MapModel from it.
+
+    When ``timings`` is a dict, the time spent on each section (seconds) is
+    stored in it under the section name.
+    """
+    if type(data) is not dict:
+        raise MapLoadError("la map doit être un objet JSON")
+    clock = time.perf_counter
+    start = clock()
+
+    model = MapModel()
+    model.map_id = _string(data.get("id", "imported_track"), "id")
+    model.map_name = _string(data.get("name", "imported_track"), "name")
+    model.background_key = _string(data.get("background", "assets/background.png"), "background")
+    model.music_key = _string(data.get("music", "assets/audio/theme.mp3"), "music")
+    if "raceSettings" in data:
+        settings = data["raceSettings"]
+        if type(settings) is not dict:
+            raise MapLoadError("raceSettings : objet attendu")
+        for key, value in settings.items():
+            _number(value, f"raceSettings.{key}")
+        model.race_settings = settings
+    if timings is not None:
+        timings["settings"] = clock() - start
+
+    for name, load in SECTIONS:
+        section_start = clock()
+        load(model, data)
+        if timings is not None:
+            timings[name] = clock() - section_start
+    return model
+
+
+def load_map(path):
+    """Load a map file; returns ``(model, timings)``.
+
+    ``timings`` maps ``"read"``, ``"parse"``, every section name and
+    ``"total"`` to the time spent on them, in seconds.
+    """
+    clock = time.perf_counter
+    timings = {}
+    start = clock()
+    with open(path, "rb") as f:
+        raw = f.read()
+    timings["read"] = clock() - start
+
+    parse_start = clock()
+    data = parse_map_bytes(raw)
+    timings["parse"] = clock() - parse_start
+
+    model = build_model(data, timings)
+    timings["total"] = clock() - start
+    return model, timings
+
+
+def format_timings(timings):
+    """One-line summary of load timings, in milliseconds"""
+    return ", ".join(f"{name}: {seconds * 1000:.1f} ms" for name, seconds in timings.items())
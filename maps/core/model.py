@@ -0,0 +1,47 @@
+"""In-memory model of a map, shared by the editor and the command line tools.
+
+Objects are kept in the editor's native form: dicts tagged with a ``"type"``
+key (``"wall"``, ``"checkpoint"``, ``"continuous_curve"``...), points as
+``[x, y]`` lists or ``(x, y)`` tuples.
+"""
+
+DEFAULT_RACE_SETTINGS = {
+    "laps": 3,
+    "maxTime": 300000,
+    "maxTimeWarning": 240000
+}
+
+
+class MapModel:
+    """Editable content of a map"""
+
+    SCALAR_ATTRIBUTES = ("map_id", "map_name", "background_key", "music_key", "race_settings",
+                         "finish_line", "racing_line")
+    # Object lists, in the order import/export walk them
+    LIST_ATTRIBUTES = ("spawnpoints", "rectangles", "curves", "continuous_curves", "checkpoints",
+                       "boosters", "items", "void_zones", "roads")
+    # Road mesh edited in the editor (vertices {"x", "y"}, index pairs, index quads)
+    MESH_ATTRIBUTES = ("road_mesh", "road_edges", "road_faces")
+    ATTRIBUTES = SCALAR_ATTRIBUTES + LIST_ATTRIBUTES + MESH_ATTRIBUTES
+
+    def __init__(self):
+        self.map_id = "custom_track"
+        self.map_name = "custom_track"
+        self.background_key = "assets/background.png"
+        self.music_key = "assets/audio/theme.mp3"
+        self.race_settings = dict(DEFAULT_RACE_SETTINGS)
+
+        self.spawnpoints = []
+        self.rectangles = []
+        self.curves = []
+        self.continuous_curves = []
+        self.checkpoints = []
+        self.boosters = []
+        self.items = []
+        self.void_zones = []
+        self.roads = []
+        self.road_mesh = []
+        self.road_edges = []
+        self.road_faces = []
+        self.finish_line = None
+        self.racing_line = None
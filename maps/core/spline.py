@@ -0,0 +1,86 @@
+"""Catmull-Rom spline kernels for continuous curves.
+
+``MapEditor.draw_continuous_curve`` draws every span ``points[i] ->
+points[i + 1]`` as a uniform Catmull-Rom segment. The neighbours wrap around
+for closed curves and are clamped to the ends for open ones.
+"""
+
+import math
+
+# Échantillons par segment utilisés pour le dessin dans l'éditeur
+DRAW_SAMPLES = 10
+MAX_SAMPLES = 64
+
+
+def catmull_rom_spans(points, closed):
+    """Yield the ``(p0, p1, p2, p3)`` control points of each drawn span"""
+    count = len(points)
+    span_count = count if closed else count - 1
+    for i in range(span_count):
+        if closed:
+            yield points[(i - 1) % count], points[i], points[(i + 1) % count], points[(i + 2) % count]
+        else:
+            yield points[max(0, i - 1)], points[i], points[min(count - 1, i + 1)], points[min(count - 1, i + 2)]
+
+
+def catmull_rom_point(p0, p1, p2, p3, t):
+    """Point at parameter ``t`` in [0, 1] of the span from p1 to p2"""
+    t2 = t * t
+    t3 = t2 * t
+    x = 0.5 * ((2 * p1[0]) +
+               (-p0[0] + p2[0]) * t +
+               (2*p0[0] - 5*p1[0] + 4*p2[0] - p3[0]) * t2 +
+               (-p0[0] + 3*p1[0] - 3*p2[0] + p3[0]) * t3)
+    y = 0.5 * ((2 * p1[1]) +
+               (-p0[1] + p2[1]) * t +
+               (2*p0[1] - 5*p1[1] + 4*p2[1] - p3[1]) * t2 +
+               (-p0[1] + 3*p1[1] - 3*p2[1] + p3[1]) * t3)
+    return x, y
+
+
+def span_samples(p0, p1, p2, p3, tolerance, max_samples=MAX_SAMPLES):
+    """Number of chords keeping the span within ``tolerance`` of its polyline.
+
+    The chord error over a parameter step ``h`` is at most ``h² / 8`` times the
+    largest second derivative, which is linear in ``t`` and so peaks at an end.
+    """
+    # C''(t) = a2 + 3 * a3 * t (le facteur 0.5 de la formule est inclus)
+    a2x = 2*p0[0] - 5*p1[0] + 4*p2[0] - p3[0]
+    a2y = 2*p0[1] - 5*p1[1] + 4*p2[1] - p3[1]
+    a3x = -p0[0] + 3*p1[0] - 3*p2[0] + p3[0]
+    a3y = -p0[1] + 3*p1[1] - 3*p2[1] + p3[1]
+    curvature = max(math.hypot(a2x, a2y), math.hypot(a2x + 3 * a3x, a2y + 3 * a3y))
+    if curvature == 0 or tolerance <= 0:
+        return 1 if curvature == 0 else max_samples
+    return max(1, min(max_samples, math.ceil(math.sqrt(curvature / (8 * tolerance)))))
+
+
+def sample_curve(points, closed, samples=DRAW_SAMPLES):
+    """Fixed sampling as drawn by the editor: ``samples + 1`` points per span"""
+    path = []
+    for p0, p1, p2, p3 in catmull_rom_spans(points, closed):
+        for k in range(samples + 1):
+            path.append(catmull_rom_point(p0, p1, p2, p3, k / samples))
+    if not closed and points:
+        path.append(tuple(points[-1]))
+    return path
+
+
+def tessellate_curve(points, closed, tolerance):
+    """Adaptive polyline of the drawn spline, within ``tolerance`` of it.
+
+    Control points are kept exactly; closed curves do not repeat their first
+    point (the last segment wraps, like ``points``).
+    """
+    if len(points) < 2:
+        return [list(p) for p in points]
+    path = []
+    for p0, p1, p2, p3 in catmull_rom_spans(points, closed):
+        path.append([p1[0], p1[1]])
+        samples = span_samples(p0, p1, p2, p3, tolerance)
+        for k in range(1, samples):
+            x, y = catmull_rom_point(p0, p1, p2, p3, k / samples)
+            path.append([x, y])
+    if not closed:
+        path.append([points[-1][0], points[-1][1]])
+    return path
@@ -0,0 +1,28 @@
+"""World/screen coordinate transforms of the editor canvas."""
+
+
+class Viewport:
+    """Zoom and pan of a view: ``screen = world * zoom_level + pan``"""
+
+    def __init__(self, zoom_level=1.0, pan_x=0, pan_y=0):
+        self.zoom_level = zoom_level
+        self.pan_x = pan_x
+        self.pan_y = pan_y
+
+    def screen_to_world(self, x, y):
+        return (x - self.pan_x) / self.zoom_level, (y - self.pan_y) / self.zoom_level
+
+    def world_to_screen(self, x, y):
+        return x * self.zoom_level + self.pan_x, y * self.zoom_level + self.pan_y
+
+    def zoom_at(self, factor, screen_x, screen_y):
+        """Zoom by ``factor``, keeping the world point under (screen_x, screen_y) fixed"""
+        world_x, world_y = self.screen_to_world(screen_x, screen_y)
+        self.zoom_level *= factor
+        self.pan_x = screen_x - world_x * self.zoom_level
+        self.pan_y = screen_y - world_y * self.zoom_level
+
+    def reset(self):
+        self.zoom_level = 1.0
+        self.pan_x = 0
+        self.pan_y = 0
@@ -0,0 +1,232 @@
+"""Per-map server cost report: ``python -m maps.cost``.
+
+Estimates how much collision and progress work a map costs the backend for
+each racing player on each tick, with the brute-force loops of
+``Room.update`` and with the baked structures of ``maps.map_compiler``:
+
+- ``walls``: ``checkWallCollisions`` tests every segment of every continuous
+  curve; with ``collisionGrid``, only the segments of the kart's cell,
+- ``voidZones``: ``checkVoidZoneCollision`` runs ``isPointInPolygon`` for 9
+  sample points against every closed zone (one test per edge); with
+  ``voidZoneBitmap``, one lookup per sample point plus the exact test, limited
+  to the zones whose box contains it, for the points in ``mixed`` cells,
+- ``boosters`` / ``items``: one test per booster and item box; with
+  ``triggerGrid``, the entries of the kart's cell,
+- ``racingLine``: ``calculateTrackProgress`` scans every segment; with the
+  ``progressGrid``, the candidates of the kart's cell,
+- ``raceProgress``: the finish line and the next checkpoint, two segment
+  intersections either way.
+
+Counts are elementary tests (segment distance, polygon edge, line
+intersection), averaged over positions every ``SAMPLE_SPACING`` px along the
+racing line, where karts spend their time, or along the middles of the
+finish line and checkpoints when the map has none. The wall worst case is
+the most loaded of these positions. Requires NumPy (void-zone bitmap).
+"""
+
+import copy
+import math
+import sys
+
+from maps.bakes.collision_grid import grid_candidates, wall_segments
+from maps.bakes.racing_line import candidate_counts, preprocess_racing_line
+from maps.bakes.triggers import BOOSTER, ITEM, grid_entries
+from maps.bakes.void_zones import KART_RADIUS, SAMPLE_OFFSETS, decode_bitmap
+from maps.game_config import TICK_RATE, TRACK_HEIGHT, TRACK_WIDTH
+from maps.map_compiler import BAKES, compile_map
+
+DEFAULT_PLAYERS = 8
+SAMPLE_SPACING = 8
+# Bakes dont le coût est estimé ; les autres options sont désactivées
+COST_BAKES = ("collisionGrid", "voidZones", "triggers", "racingLineProgress")
+# Positions échantillonnées : libellé du rapport
+SOURCES = {
+    "racingLine": "le long de la ligne de course",
+    "checkpoints": "le long des checkpoints",
+    "track": "sur toute la piste",
+}
+# (clé, libellé du rapport)
+CHECKS = (
+    ("walls", "Murs"),
+    ("voidZones", "Zones de vide"),
+    ("boosters", "Boosters"),
+    ("items", "Items"),
+    ("racingLine", "Ligne de course"),
+    ("raceProgress", "Arrivée/checkpoint"),
+)
+
+
+def _polyline_positions(points, closed, spacing):
+    count = len(points)
+    positions = []
+    for i in range(count if closed else count - 1):
+        (x1, y1), (x2, y2) = points[i], points[(i + 1) % count]
+        steps = max(1, math.ceil(math.hypot(x2 - x1, y2 - y1) / spacing))
+        positions += [(x1 + (x2 - x1) * k / steps, y1 + (y2 - y1) * k / steps) for k in range(steps)]
+    if not closed:
+        positions.append(tuple(points[-1]))
+    return positions
+
+
+def sample_positions(data, spacing=SAMPLE_SPACING):
+    """Positions where the karts drive, and where they come from.
+
+    Returns ``(positions, source)``: every ``spacing`` px along the racing
+    line (``"racingLine"``), else along the loop through the middles of the
+    finish line and checkpoints (``"checkpoints"``), else on a lattice over
+    the whole track (``"track"``).
+    """
+    racing_line = data.get("racingLine")
+    if racing_line and len(racing_line.get("points", [])) >= 2:
+        points, closed, _distances, _total = preprocess_racing_line(racing_line)
+        return _polyline_positions(points, closed, spacing), "racingLine"
+    gates = ([data["finishLine"]] if data.get("finishLine") else []) + list(data.get("checkpoints") or [])
+    if len(gates) >= 2:
+        middles = [((g["x1"] + g["x2"]) / 2, (g["y1"] + g["y2"]) / 2) for g in gates]
+        return _polyline_positions(middles, True, spacing), "checkpoints"
+    return [(x + spacing / 2, y + spacing / 2)
+            for y in range(0, TRACK_HEIGHT, spacing) for x in range(0, TRACK_WIDTH, spacing)], "track"
+
+
+def _void_zone_work(baked, positions):
+    """Average edge tests (and bitmap lookups) of checkVoidZoneCollision with the bitmap"""
+    zones = baked.get("voidZones") or []
+    bitmap = baked.get("voidZoneBitmap")
+    if not bitmap:
+        return 0.0
+    cells = decode_bitmap(bitmap)
+    total = 0
+    for x, y in positions:
+        for ox, oy in SAMPLE_OFFSETS:
+            px, py = x + KART_RADIUS * ox, y + KART_RADIUS * oy
+            total += 1
+            col = math.floor((px - bitmap["originX"]) / bitmap["cellSize"])
+            row = math.floor((py - bitmap["originY"]) / bitmap["cellSize"])
+            if 0 <= col < bitmap["cols"] and 0 <= row < bitmap["rows"] and int(cells[row, col]) != bitmap["mixed"]:
+                continue
+            # Cellule mixte ou hors bitmap : test exact des zones dont la boîte contient le point
+            for zone in zones:
+                aabb = zone.get("aabb")
+                if zone.get("closed", False) and aabb and aabb[0] <= px <= aabb[2] and aabb[1] <= py <= aabb[3]:
+                    total += len(zone["points"])
+    return total / len(positions)
+
+
+def estimate_cost(data):
+    """Cost report of a map document (not modified).
+
+    Returns a dict with the map's sizes (``wallSegments``, ``voidVertices``,
+    ``checkpoints``...), the collision grid statistics and ``work``:
+    ``{check: (brute force, baked)}`` average tests per player per tick.
+    """
+    baked = compile_map(copy.deepcopy(data), {key: key in COST_BAKES for key, *_ in BAKES})
+    positions, source = sample_positions(data)
+
+    curves = data.get("continuousCurves", [])
+    wall_count = sum(1 for _ in wall_segments(curves))
+    grid = baked["collisionGrid"]
+    start = grid["cellStart"]
+    cell_sizes = [start[k + 1] - start[k] for k in range(len(start) - 1)]
+    wall_counts = [len(grid_candidates(grid, x, y)) // 2 for x, y in positions]
+    worst = max(range(len(positions)), key=wall_counts.__getitem__)
+
+    closed_zones = [zone for zone in data.get("voidZones") or [] if zone.get("closed", False)]
+    void_vertices = sum(len(zone.get("points", [])) for zone in closed_zones)
+
+    boosters = data.get("boosters") or []
+    items = data.get("items") or []
+    trigger_grid = baked["triggerGrid"]
+    trigger_kinds = [grid_entries(trigger_grid, x, y)[0::2] for x, y in positions]
+
+    racing_line = baked.get("racingLine")
+    line_segments = 0
+    line_work = (0.0, 0.0)
+    if racing_line and len(racing_line.get("points", [])) >= 2:
+        progress_grid = racing_line["progressGrid"]
+        line_segments = progress_grid["segmentCount"]
+        line_work = (line_segments, sum(candidate_counts(progress_grid, positions)) / len(positions))
+
+    line_tests = bool(data.get("finishLine")) + bool(data.get("checkpoints"))
+    return {
+        "positions": len(positions),
+        "source": source,
+        "wallSegments": wall_count,
+        "gridCells": len(cell_sizes),
+        "segmentsPerCell": sum(cell_sizes) / len(cell_sizes),
+        "segmentsPerCellMax": max(cell_sizes),
+        "worstSegments": wall_counts[worst],
+        "worstPosition": positions[worst],
+        "voidZones": len(closed_zones),
+        "voidVertices": void_vertices,
+        "checkpoints": len(data.get("checkpoints") or []),
+        "boosters": len(boosters),
+        "items": len(items),
+        "racingLineSegments": line_segments,
+        "work": {
+            "walls": (wall_count, sum(wall_counts) / len(positions)),
+            "voidZones": (len(SAMPLE_OFFSETS) * void_vertices, _void_zone_work(baked, positions)),
+            "boosters": (len(boosters), sum(kinds.count(BOOSTER) for kinds in trigger_kinds) / len(positions)),
+            "items": (len(items), sum(kinds.count(ITEM) for kinds in trigger_kinds) / len(positions)),
+            "racingLine": line_work,
+            "raceProgress": (line_tests, line_tests),
+        },
+    }
+
+
+def total_work(report):
+    """Tests per player per tick, brute force and baked"""
+    work = report["work"].values()
+    return sum(brute for brute, _ in work), sum(baked for _, baked in work)
+
+
+def format_cost(report, players=DEFAULT_PLAYERS):
+    """Text report, one line per item"""
+    brute, baked = total_work(report)
+    x, y = report["worstPosition"]
+    where = SOURCES[report["source"]]
+    lines = [
+        f"Segments de collision : {report['wallSegments']}",
+        f"Grille de collision : {report['gridCells']} cellules, {report['segmentsPerCell']:.1f} segments "
+        f"par cellule en moyenne, {report['segmentsPerCellMax']} au maximum",
+        f"Pire position {where} : {report['worstSegments']} segments en ({x:.0f}, {y:.0f})",
+        f"Zones de vide fermées : {report['voidZones']} ({report['voidVertices']} sommets)",
+        f"Checkpoints : {report['checkpoints']}, boosters : {report['boosters']}, items : {report['items']}, "
+        f"segments de la ligne de course : {report['racingLineSegments']}",
+        f"Tests par joueur et par tick ({report['positions']} positions {where}) :",
+    ]
+    for key, label in CHECKS:
+        before, after = report["work"][key]
+        lines.append(f"  {label} : {before:.0f} -> {after:.1f}")
+    saved = 1 - baked / brute if brute else 0.0
+    lines.append(f"  Total : {brute:.0f} -> {baked:.1f} ({saved:.0%} de moins avec les précalculs)")
+    lines.append(f"Pour {players} joueurs à {TICK_RATE} ticks/s : {brute * players * TICK_RATE:,.0f} -> "
+                 f"{baked * players * TICK_RATE:,.0f} tests/s".replace(",", " "))
+    return lines
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(prog="python -m maps.cost",
+                                     description="Estimate the per-tick server cost of maps, with and without bakes")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS)
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    reports = {}
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            reports[path] = estimate_cost(json.load(f))
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return 0
+    for path, report in reports.items():
+        print(f"{path}:")
+        for line in format_cost(report, args.players):
+            print(f"  {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
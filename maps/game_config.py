@@ -0,0 +1,24 @@
+"""Gameplay constants mirrored from ``GAME_CONFIG`` in backend/server.js.
+
+Offline bakes must use the same values as the server, keep both in sync.
+"""
+
+TICK_RATE = 60
+TRACK_WIDTH = 1536
+TRACK_HEIGHT = 1024
+KART_SIZE = 20
+MAX_SPEED = 4
+ACCELERATION = 0.2
+FRICTION = 0.98
+TURN_SPEED = 0.075
+COLLISION_GRID_SIZE = 100
+
+# minDist de Room.checkWallCollisions : rayon du kart + 4
+WALL_CLEARANCE = KART_SIZE + 4
+
+# Room.checkBoosterCollisions : 5 px de chaque côté de la ligne + rayon du kart
+BOOSTER_WIDTH = 5
+BOOSTER_REACH = BOOSTER_WIDTH + KART_SIZE
+# Room.checkItemBoxCollisions : rayon de la boîte + rayon du kart
+ITEM_BOX_RADIUS = 16
+ITEM_REACH = ITEM_BOX_RADIUS + KART_SIZE
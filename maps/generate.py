@@ -0,0 +1,325 @@
+"""Procedural track generator: ``python -m maps.generate -o track.json``.
+
+A track is a closed loop around the centre of the map whose radius is
+perturbed by a few random harmonics (``complexity``). The loop is
+star-shaped, so it never crosses itself; a generation is rejected and
+retried with smaller harmonics when the track would fold (radius of
+curvature under the half width) or two stretches of it would come closer
+than a track width.
+
+From the centre line the generator derives, in the exported layout:
+
+- the inner and outer walls, two closed continuous curves of ``points``
+  control points each,
+- the racing line (``racing_points`` points, closed),
+- ``checkpoints`` gates evenly spaced by arc length, in driving order, and
+  the finish line at the start of the loop,
+- a spawn group of six karts in two rows of three just behind the finish
+  line, facing the driving direction, front row first; the rows are
+  narrowed (then moved closer to the line) until every slot is at least
+  ``WALL_CLEARANCE`` from the walls, both at the stored corner the server
+  spawns at and at the centre the editor draws,
+- boosters and rows of item boxes across the track, and optionally void
+  zones kept clear of the track.
+
+The same arguments and ``seed`` always give the same document.
+"""
+
+import bisect
+import math
+import random
+import sys
+import time
+
+from maps.bakes.collision_grid import brute_force_hits
+from maps.core.model import DEFAULT_RACE_SETTINGS
+from maps.game_config import KART_SIZE, TRACK_HEIGHT, TRACK_WIDTH, WALL_CLEARANCE
+
+DEFAULT_TRACK_WIDTH = 120
+DEFAULT_POINTS = 120
+# Échantillons de la ligne médiane pour les longueurs d'arc et la validation
+CENTER_SAMPLES = 4096
+MAX_ATTEMPTS = 20
+# Longueur des lignes de booster / item posées par l'éditeur
+PAD_LENGTH = 32
+# Marge entre la piste et le bord de la map
+BORDER_MARGIN = 20
+# Rangées de la grille de départ derrière la ligne d'arrivée, et écart latéral
+SPAWN_ROWS = (40, 85)
+SPAWN_SPACING = 35
+# Facteur appliqué aux écarts de la grille de départ tant qu'un emplacement touche un mur
+SPAWN_SHRINK = 0.9
+
+
+class _CenterLine:
+    """Dense closed polyline of the centre line, addressed by arc length"""
+
+    def __init__(self, points):
+        self.points = points
+        self.lengths = [0.0]
+        count = len(points)
+        for i in range(count):
+            (x1, y1), (x2, y2) = points[i], points[(i + 1) % count]
+            self.lengths.append(self.lengths[-1] + math.hypot(x2 - x1, y2 - y1))
+        self.total = self.lengths[-1]
+
+    def at(self, s):
+        """``(x, y, tx, ty)``: position and unit tangent at arc length ``s`` (wraps around)"""
+        s %= self.total
+        i = min(bisect.bisect_right(self.lengths, s) - 1, len(self.points) - 1)
+        (x1, y1), (x2, y2) = self.points[i], self.points[(i + 1) % len(self.points)]
+        length = self.lengths[i + 1] - self.lengths[i]
+        t = (s - self.lengths[i]) / length if length else 0.0
+        return x1 + t * (x2 - x1), y1 + t * (y2 - y1), (x2 - x1) / length, (y2 - y1) / length
+
+    def offset(self, s, lateral, forward=0.0):
+        """Point ``lateral`` px to the outside of the loop and ``forward`` px ahead of arc length ``s``"""
+        x, y, tx, ty = self.at(s)
+        # Boucle parcourue dans le sens des angles croissants : l'extérieur est (ty, -tx)
+        return x + ty * lateral + tx * forward, y - tx * lateral + ty * forward
+
+
+def _center_points(rng, complexity, amplitude, width, height, half_width):
+    """Centre line samples of a star-shaped loop with ``complexity`` random harmonics"""
+    harmonics = [(k, rng.uniform(0.3, 1.0) / k, rng.uniform(0, 2 * math.pi))
+                 for k in range(2, complexity + 2)]
+    norm = sum(a for _k, a, _phase in harmonics) or 1.0
+    # Amplitude totale bornée : le rayon reste positif, la boucle ne se croise pas
+    harmonics = [(k, a * amplitude / norm, phase) for k, a, phase in harmonics]
+    rx = width / 2 - half_width - BORDER_MARGIN
+    ry = height / 2 - half_width - BORDER_MARGIN
+    scale = 1 / (1 + amplitude)
+    points = []
+    for i in range(CENTER_SAMPLES):
+        angle = 2 * math.pi * i / CENTER_SAMPLES
+        radius = scale * (1 + sum(a * math.cos(k * angle + phase) for k, a, phase in harmonics))
+        points.append((width / 2 + rx * radius * math.cos(angle), height / 2 + ry * radius * math.sin(angle)))
+    return points
+
+
+def _min_curvature_radius(points):
+    best = math.inf
+    count = len(points)
+    for i in range(count):
+        (ax, ay), (bx, by), (cx, cy) = points[i - 1], points[i], points[(i + 1) % count]
+        cross = (bx - ax) * (cy - by) - (by - ay) * (cx - bx)
+        if cross:
+            # Rayon du cercle passant par les trois points
+            best = min(best, math.hypot(bx - ax, by - ay) * math.hypot(cx - bx, cy - by)
+                       * math.hypot(cx - ax, cy - ay) / (2 * abs(cross)))
+    return best
+
+
+def _has_close_stretches(center, clearance, step=8):
+    """Do two parts of the loop, apart along it, come closer than ``clearance``?"""
+    grid = {}
+    indices = range(0, len(center.points), step)
+    for i in indices:
+        x, y = center.points[i]
+        grid.setdefault((int(x // clearance), int(y // clearance)), []).append(i)
+    # Deux échantillons plus proches que ça le long de la boucle sont voisins, pas deux passages
+    min_arc = 2 * clearance
+    for i in indices:
+        xi, yi = center.points[i]
+        col, row = int(xi // clearance), int(yi // clearance)
+        for dc in (-1, 0, 1):
+            for dr in (-1, 0, 1):
+                for j in grid.get((col + dc, row + dr), ()):
+                    arc = abs(center.lengths[j] - center.lengths[i])
+                    if j > i and min(arc, center.total - arc) >= min_arc:
+                        xj, yj = center.points[j]
+                        if math.hypot(xj - xi, yj - yi) < clearance:
+                            return True
+    return False
+
+
+def _round(value):
+    return round(value, 3)
+
+
+def _line(a, b):
+    return {"x1": _round(a[0]), "y1": _round(a[1]), "x2": _round(b[0]), "y2": _round(b[1])}
+
+
+def _gate(center, s, half_length):
+    return _line(center.offset(s, -half_length), center.offset(s, half_length))
+
+
+def spawn_is_clear(continuous_curves, spawn):
+    """True when the server's wall test passes at the slot's corner and at its centre"""
+    x, y = spawn["x"], spawn["y"]
+    return not brute_force_hits(continuous_curves, x, y) and not brute_force_hits(continuous_curves, x + 15, y + 10)
+
+
+def _spawn_grid(center, lateral, rows):
+    # Même convention que l'éditeur : coin haut gauche d'un rectangle 30x20, angle en degrés.
+    # Les rangées suivent la ligne médiane : dans un virage, elles restent au milieu de la piste
+    _x, _y, tx, ty = center.at(0)
+    angle = round(math.degrees(math.atan2(ty, tx)), 1) % 360
+    spawns = []
+    for back in rows:
+        for column in (-1, 0, 1):
+            # Le serveur place le kart au coin, l'éditeur le dessine au centre :
+            # la case est centrée entre les deux pour garder les deux loin des murs
+            x, y = center.offset(-back, column * lateral)
+            spawns.append({"x": _round(x - 7.5), "y": _round(y - 5), "angle": angle})
+    return spawns
+
+
+def _spawn_points(center, half_width, continuous_curves):
+    """Spawn grid whose slots all pass ``spawn_is_clear``; raises ValueError if none fits"""
+    lateral = min(SPAWN_SPACING, (half_width - KART_SIZE) / 1.5)
+    rows = SPAWN_ROWS
+    # Resserrer l'écart latéral d'abord (jusqu'à une seule file sur une piste
+    # étroite), puis rapprocher les rangées de la ligne d'arrivée
+    grids = []
+    while lateral >= 1:
+        grids.append((lateral, rows))
+        lateral *= SPAWN_SHRINK
+    while rows[1] - rows[0] >= 1:
+        grids.append((0, rows))
+        rows = (rows[0] * SPAWN_SHRINK, rows[1] * SPAWN_SHRINK)
+    for lateral, rows in grids:
+        spawns = _spawn_grid(center, lateral, rows)
+        if all(spawn_is_clear(continuous_curves, spawn) for spawn in spawns):
+            return spawns
+    raise ValueError(f"no spawn grid clear of the walls (clearance {WALL_CLEARANCE})")
+
+
+def _void_zones(rng, center, count, vertices, half_width, width, height):
+    """Small polygons away from the track (``vertices`` points each)"""
+    zones = []
+    placed = []
+    clearance = half_width + 2 * KART_SIZE
+    for _attempt in range(count * 50):
+        if len(zones) == count:
+            break
+        radius = rng.uniform(20, 60)
+        cx = rng.uniform(radius, width - radius)
+        cy = rng.uniform(radius, height - radius)
+        if any(math.hypot(x - cx, y - cy) < radius + clearance for x, y in center.points[::8]):
+            continue
+        if any(math.hypot(x - cx, y - cy) < radius + r for x, y, r in placed):
+            continue
+        placed.append((cx, cy, radius))
+        points = []
+        for k in range(vertices):
+            angle = 2 * math.pi * k / vertices
+            r = radius * rng.uniform(0.7, 1.0)
+            points.append([_round(cx + r * math.cos(angle)), _round(cy + r * math.sin(angle))])
+        zones.append({"points": points, "closed": True})
+    return zones
+
+
+def generate_track(seed=0, points=DEFAULT_POINTS, racing_points=None, checkpoints=16, boosters=6, items=12,
+                   void_zones=0, void_zone_points=8, complexity=4, amplitude=0.35,
+                   track_width=DEFAULT_TRACK_WIDTH, width=TRACK_WIDTH, height=TRACK_HEIGHT, name=None):
+    """Return a generated map document (``export_document`` layout).
+
+    ``points`` is the number of control points of each wall; ``racing_points``
+    defaults to one point every 40 px. ``items`` counts item boxes, placed in
+    rows of three. Raises ValueError when no valid track fits the map, or no
+    spawn slot fits between its walls.
+    """
+    rng = random.Random(seed)
+    half_width = track_width / 2
+    for _attempt in range(MAX_ATTEMPTS):
+        center = _CenterLine(_center_points(rng, complexity, amplitude, width, height, half_width))
+        if (_min_curvature_radius(center.points) > half_width * 1.2
+                and not _has_close_stretches(center, track_width + 2 * KART_SIZE)):
+            break
+        # Boucle repliée : harmoniques plus faibles au prochain essai
+        amplitude *= 0.8
+    else:
+        raise ValueError(f"no valid track of width {track_width} fits a {width}x{height} map")
+
+    total = center.total
+    if racing_points is None:
+        racing_points = max(8, round(total / 40))
+    inner = [list(map(_round, center.offset(total * i / points, -half_width))) for i in range(points)]
+    outer = [list(map(_round, center.offset(total * i / points, half_width))) for i in range(points)]
+    racing = [list(map(_round, center.offset(total * i / racing_points, 0))) for i in range(racing_points)]
+    # Point de fermeture dupliqué : preprocessRacingLine le retire et ferme la ligne
+    racing.append(list(racing[0]))
+
+    # Les lignes débordent un peu sur les murs pour ne laisser aucun passage
+    gate_half = half_width + 4
+    pad_half = PAD_LENGTH / 2
+    lateral = half_width - KART_SIZE
+    booster_lines = []
+    for i in range(boosters):
+        s = total * (i + 0.5) / boosters
+        offset = rng.uniform(-lateral + pad_half, lateral - pad_half)
+        booster_lines.append(_line(center.offset(s, offset - pad_half), center.offset(s, offset + pad_half)))
+    item_lines = []
+    rows = math.ceil(items / 3)
+    for i in range(items):
+        s = total * (i // 3 + 0.25) / rows
+        offset = (i % 3 - 1) * lateral * 0.6
+        item_lines.append(_line(center.offset(s, offset - pad_half), center.offset(s, offset + pad_half)))
+
+    continuous_curves = [{"points": inner, "type": "continuous", "closed": True},
+                         {"points": outer, "type": "continuous", "closed": True}]
+    track_id = name or f"generated_{seed}"
+    return {
+        "id": track_id,
+        "name": track_id,
+        "width": width,
+        "height": height,
+        "music": "assets/audio/theme.mp3",
+        "background": "assets/background.png",
+        "raceSettings": dict(DEFAULT_RACE_SETTINGS),
+        "spawnPoints": _spawn_points(center, half_width, continuous_curves),
+        "walls": [],
+        "curves": [],
+        "continuousCurves": continuous_curves,
+        "checkpoints": [_gate(center, total * (i + 1) / (checkpoints + 1), gate_half) for i in range(checkpoints)],
+        "finishLine": _gate(center, 0, gate_half),
+        "boosters": booster_lines,
+        "items": item_lines,
+        "voidZones": _void_zones(rng, center, void_zones, void_zone_points, half_width, width, height),
+        "roads": [],
+        "racingLine": {"points": racing, "totalLength": _round(total)}
+    }
+
+
+def _main(argv):
+    import argparse
+    from maps.core.loader import build_model
+    from maps.core.writer import write_map
+    parser = argparse.ArgumentParser(prog="python -m maps.generate", description="Generate a random valid track")
+    parser.add_argument("-o", "--output", required=True, help="map JSON to write ({seed} is replaced)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--count", type=int, default=1, help="tracks to generate, with consecutive seeds")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="control points per wall")
+    parser.add_argument("--racing-points", type=int, default=None, help="default: one every 40 px")
+    parser.add_argument("--checkpoints", type=int, default=16)
+    parser.add_argument("--boosters", type=int, default=6)
+    parser.add_argument("--items", type=int, default=12, help="item boxes, in rows of three")
+    parser.add_argument("--void-zones", type=int, default=0)
+    parser.add_argument("--void-zone-points", type=int, default=8)
+    parser.add_argument("--complexity", type=int, default=4, help="random harmonics of the loop")
+    parser.add_argument("--track-width", type=float, default=DEFAULT_TRACK_WIDTH)
+    args = parser.parse_args(argv)
+    if args.count > 1 and "{seed}" not in args.output:
+        parser.error("--count needs {seed} in --output")
+
+    for seed in range(args.seed, args.seed + args.count):
+        start = time.perf_counter()
+        data = generate_track(seed, args.points, args.racing_points, args.checkpoints, args.boosters, args.items,
+                              args.void_zones, args.void_zone_points, args.complexity,
+                              track_width=args.track_width)
+        generated = time.perf_counter() - start
+        # Le chargeur de l'éditeur doit accepter la map telle quelle
+        build_model(data)
+        path = args.output.format(seed=seed)
+        with open(path, "w", encoding="utf-8") as f:
+            write_map(data, f)
+        print(f"{path}: {len(data['continuousCurves'][0]['points'])} points per wall, "
+              f"{len(data['racingLine']['points'])} racing-line points, {len(data['checkpoints'])} checkpoints, "
+              f"lap {data['racingLine']['totalLength']:.0f} px, generated in {generated * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,143 @@
+"""Map compiler: adds the optional baked sections to an exported map document.
+
+Each bake reads the plain map sections and writes its results into the
+document (a new top-level key, or extra fields of an existing section). The
+server ignores keys it does not know, so every bake is optional.
+
+Every bake is off by default: the editor's plain export stays byte-identical
+to the hand-written layout, and the bakes are enabled in its export
+settings or run by ``python -m maps.compile`` (all on).
+"""
+
+import time
+
+from maps.bakes.collision_grid import bake_collision_grid
+from maps.bakes.racing_line import DEFAULT_SPACING, bake_racing_line, resample_racing_line, strip_racing_line
+from maps.bakes.simplify import DEFAULT_TOLERANCE, simplify_map
+from maps.bakes.tessellate import DEFAULT_TOLERANCE as TESSELLATION_TOLERANCE
+from maps.bakes.tessellate import bake_tessellation, strip_tessellation
+from maps.bakes.triggers import bake_triggers, strip_trigger_lines
+
+
+def _simplify(data):
+    return simplify_map(data, DEFAULT_TOLERANCE)
+
+
+def _tessellate(data):
+    bake_tessellation(data.get("continuousCurves", []), TESSELLATION_TOLERANCE)
+
+
+def _strip_tessellation(data):
+    strip_tessellation(data.get("continuousCurves", []))
+
+
+def _collision_grid(data):
+    data["collisionGrid"] = bake_collision_grid(data.get("continuousCurves", []))
+
+
+def _sdf(data):
+    # NumPy n'est nécessaire que pour ce bake
+    from maps.bakes.sdf import bake_sdf
+    data["sdf"] = bake_sdf(data.get("continuousCurves", []))
+
+
+def _void_zones(data):
+    # NumPy n'est nécessaire que pour ce bake
+    from maps.bakes.void_zones import bake_void_zones
+    zones, bitmap = bake_void_zones(data.get("voidZones", []))
+    data["voidZones"] = zones
+    if bitmap is None:
+        data.pop("voidZoneBitmap", None)
+    else:
+        data["voidZoneBitmap"] = bitmap
+
+
+def _strip_void_zones(data):
+    from maps.bakes.void_zones import strip_void_zones
+    data.pop("voidZoneBitmap", None)
+    strip_void_zones(data.get("voidZones", []))
+
+
+def _strip_triggers(data):
+    data.pop("triggerGrid", None)
+    strip_trigger_lines(data)
+
+
+def _racing_line(data):
+    if data.get("racingLine"):
+        data["racingLine"] = bake_racing_line(data["racingLine"])
+
+
+def _resample_racing_line(data):
+    if data.get("racingLine"):
+        data["racingLine"] = resample_racing_line(data["racingLine"])
+
+
+def _strip_racing_line(data):
+    if data.get("racingLine"):
+        strip_racing_line(data["racingLine"])
+
+
+def _respawn(data):
+    from maps.bakes.respawn import bake_respawn_table
+    if data.get("checkpoints"):
+        data["respawnTable"] = bake_respawn_table(data)
+    else:
+        data.pop("respawnTable", None)
+
+
+def _pop(key):
+    return lambda data: data.pop(key, None)
+
+
+def _keep(data):
+    pass
+
+
+# (option, libellé dans l'éditeur, activé par défaut, bake, suppression du résultat)
+BAKES = (
+    # En premier : les autres bakes utilisent les points simplifiés
+    ("simplify", f"Simplifier murs et zones de vide ({DEFAULT_TOLERANCE:g} px)", False, _simplify, _keep),
+    ("tessellate", f"Polylignes de collision des courbes ({TESSELLATION_TOLERANCE:g} px)", False,
+     _tessellate, _strip_tessellation),
+    ("collisionGrid", "Grille de collision des murs", False, _collision_grid, _pop("collisionGrid")),
+    ("sdf", "Champ de distance aux murs (~3 Mo)", False, _sdf, _pop("sdf")),
+    ("voidZones", "Bitmap, triangles et boîtes des zones de vide (~300 ko)", False,
+     _void_zones, _strip_void_zones),
+    ("triggers", "Boîtes, normales et grille des checkpoints/boosters/items", False,
+     bake_triggers, _strip_triggers),
+    # Avant racingLineProgress : les distances sont calculées sur les points rééchantillonnés
+    ("racingLineResample", f"Ligne de course à espacement constant ({DEFAULT_SPACING} px)", False,
+     _resample_racing_line, _keep),
+    ("racingLineProgress", "Distances et grille de la ligne de course", False, _racing_line, _strip_racing_line),
+    # Après sdf et voidZones : les positions sont vérifiées avec ces données quand elles existent
+    ("respawnTable", "Positions de respawn par checkpoint", False, _respawn, _pop("respawnTable")),
+)
+
+
+def default_export_options():
+    """Options of the export dialog: option name -> enabled"""
+    return {key: enabled for key, _label, enabled, _bake, _strip in BAKES}
+
+
+def compile_map(data, options=None, timings=None, reports=None):
+    """Run the enabled bakes on ``data`` in place and return it.
+
+    ``options`` maps option names to booleans (defaults when None); the
+    results of disabled bakes are removed. When ``timings`` is a dict, the
+    duration of each bake is stored in it; when ``reports`` is a dict, so is
+    the value returned by bakes that return one.
+    """
+    if options is None:
+        options = default_export_options()
+    for key, _label, enabled, bake, strip in BAKES:
+        if not options.get(key, enabled):
+            strip(data)
+            continue
+        start = time.perf_counter()
+        report = bake(data)
+        if reports is not None and report is not None:
+            reports[key] = report
+        if timings is not None:
+            timings[key] = time.perf_counter() - start
+    return data
@@ -1,17 +1,100 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, simpledialog, scrolledtext
-from PIL import Image, ImageTk
-import json
+import copy
 import math
+import os
 import traceback
 import sys
+import threading
+import time
+
+# Origine du temps jusqu'à la première image (--first-frame)
+_START = time.perf_counter()
+
+if __package__ in (None, ""):
+    # Lancé comme script (python maps/map_editor.py) : rendre le package maps importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maps.bakes.collision_grid import bake_collision_grid
+from maps.bakes.racing_line import DEFAULT_SPACING, MIN_SPACING, preprocess_racing_line, resample_points
+from maps.bakes.simplify import DEFAULT_TOLERANCE, format_report, is_simple, simplify_points
+from maps.map_compiler import BAKES, compile_map, default_export_options
+from maps.core import (JSON_BACKEND, MapModel, Viewport, export_document, format_timings, load_map,
+                        road_segments, sample_curve)
+from maps.core.writer import write_map
+from maps.game_config import KART_SIZE, TICK_RATE
+
+# PIL et les modules de dialogue Tk sont importés à la première utilisation :
+# ils ne servent pas à afficher la première image
+
+# Essai de la map par des bots (maps/simulate.py, importé au lancement de l'essai)
+TEST_DRIVE_BOTS = 4
+TEST_DRIVE_SPEED = 4  # Secondes de course simulées par seconde réelle
+TEST_DRIVE_FRAME_MS = 33
+TEST_DRIVE_MAX_TICKS = 5 * 60 * TICK_RATE
+TEST_DRIVE_COLORS = ("#00e5ff", "#ff4081", "#ffea00", "#76ff03", "#e040fb", "#ff9100", "#ffffff", "#40c4ff")
+# Événements de la simulation marqués sur la map : (libellé, couleur)
+TEST_DRIVE_INCIDENTS = {
+    "fall": ("chute", "#ff6b35"),
+    "death": ("détruit", "red"),
+    "stuck": ("bloqué", "magenta"),
+    "missedCheckpoint": ("checkpoint manqué", "yellow"),
+    "wrongWay": ("sens inverse", "cyan"),
+}
+
+# Carte de coût des collisions : opacité des cellules les moins et les plus chargées
+HEATMAP_ALPHA = (60, 170)
+
+
+def _heat_color(count, peak):
+    """Couleur RGBA d'une cellule de la grille de collision : transparent, puis jaune -> rouge"""
+    if not count:
+        return (0, 0, 0, 0)
+    t = count / peak
+    return (255, int(230 * (1 - t)), 0, int(HEATMAP_ALPHA[0] + (HEATMAP_ALPHA[1] - HEATMAP_ALPHA[0]) * t))
+
+class EditTransaction:
+    """Opération interactive annulable (grab, rotate, drag de point...).
+
+    Chaque emplacement suivi est un couple (conteneur, clé) : on mémorise sa
+    valeur au début puis à la fin de l'opération, quel que soit le nombre
+    d'événements souris entre les deux.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.slots = []
+        self.before = []
+        self.after = None
+        self.updates = 0
+
+    @staticmethod
+    def _snapshot(value):
+        # Les listes (points, sélection, mesh) sont modifiées en place ailleurs
+        return list(value) if isinstance(value, list) else value
+
+    def track(self, container, key):
+        """Suivre un emplacement ; seule la première valeur vue est conservée"""
+        for c, k in self.slots:
+            if c is container and k == key:
+                return
+        self.slots.append((container, key))
+        self.before.append(self._snapshot(container[key]))
+
+    def update(self):
+        self.updates += 1
+
+    def commit(self):
+        """Capturer l'état final ; retourne False si rien n'a changé"""
+        self.after = [self._snapshot(c[k]) for c, k in self.slots]
+        return self.after != self.before
+
+    def revert(self):
+        for (c, k), value in zip(self.slots, self.before):
+            c[k] = self._snapshot(value)
 
-print("Démarrage du Map Editor...")
 
 class MapEditor:
     def __init__(self, root):
-        print("Initialisation de MapEditor...")
-        
         self.root = root
         self.root.title("Map Editor - Professional Edition")
 
@@ -27,10 +110,8 @@ class MapEditor:
         self.canvas = tk.Canvas(left_frame, width=1536, height=1024, bg="black")
         self.canvas.pack()
         
-        # Zoom and pan variables
-        self.zoom_level = 1.0
-        self.pan_x = 0
-        self.pan_y = 0
+        # Zoom and pan (zoom_level, pan_x, pan_y délèguent à self.viewport)
+        self.viewport = Viewport()
         self.is_panning = False
         self.pan_start_x = 0
         self.pan_start_y = 0
@@ -43,17 +124,12 @@ class MapEditor:
         self.background_image = None
         self.background_pil_image = None  # Store PIL image for dynamic scaling
         self.background_path = None
-        self.background_key = "assets/background.png"  # Clé par défaut mise à jour
-        self.music_key = "assets/audio/theme.mp3"  # Musique par défaut
-        self.map_name = "custom_track"  # Nom par défaut
-        self.map_id = "custom_track"  # ID par défaut
-        
-        # Paramètres de course
-        self.race_settings = {
-            "laps": 3,
-            "maxTime": 300000,
-            "maxTimeWarning": 240000
-        }
+        # Contenu de la map (id, nom, fond, musique, paramètres de course, objets) :
+        # les attributs correspondants de l'éditeur délèguent à self.model
+        self.model = MapModel()
+
+        # Précalculs ajoutés à l'export (voir maps/map_compiler.py)
+        self.export_options = default_export_options()
 
         self.mode = "wall"  # wall, curve, finish, checkpoint, edit, modify_curve, spawnpoint, spawnpoint_horizontal, booster, item, continuous_curve, racing_line, void_zone, road
         self.current_curve = []
@@ -63,23 +139,17 @@ class MapEditor:
         self.is_drawing_void_zone = False
         self.is_drawing_racing_line = False  # Pour la ligne de course
         self.current_racing_line = []  # Points de la ligne de course en cours
-        self.rectangles = []
-        self.curves = []
-        self.continuous_curves = []  # Nouveau : pour stocker les courbes continues comme un seul objet
-        self.void_zones = []  # Pour stocker les zones de vide (chute)
-        self.checkpoints = []  # Maintenant des lignes
-        self.spawnpoints = []
-        self.boosters = []  # Maintenant des lignes
-        self.items = []  # Maintenant des lignes
-        self.finish_line = None  # Maintenant une ligne
-        self.racing_line = None  # Ligne de course pour le calcul des positions
         self.actions_stack = []
-        
+        self.active_transaction = None  # Opération interactive en cours (EditTransaction)
+        self.simplify_preview = []  # Polylignes simplifiées affichées avant validation
+        self.test_drive = None  # Essai en cours : thread de simulation et dernière image (start_test_drive)
+        self.test_drive_markers = []  # Incidents du dernier essai : (type, x, y)
+        self.show_cost_heatmap = False
+        self.cost_heatmap = {}  # Image de la carte de coût et clés de cache (draw_cost_heatmap)
+        self.telemetry = None  # Heatmaps du log de télémétrie chargé (maps/telemetry.py)
+
         # Road drawing (Blender-style)
-        self.road_mesh = []  # List of connected road vertices
-        self.road_edges = []  # List of edges (pairs of vertex indices)
-        self.road_faces = []  # List of road segments (quads defined by 4 vertex indices)
-        self.roads = []  # Initialize roads list for compatibility
+        # road_mesh, road_edges et road_faces sont dans self.model
         self.selected_vertices = []  # Currently selected vertices
         self.road_edit_mode = None  # 'extrude', 'scale', 'rotate', 'grab'
         self.road_width = 80  # Default road width
@@ -113,14 +183,13 @@ class MapEditor:
         
         tk.Label(self.log_frame, text="Console Log:", bg="gray20", fg="white", font=("Arial", 10, "bold")).pack(fill=tk.X)
         
+        from tkinter import scrolledtext
         self.log_text = scrolledtext.ScrolledText(self.log_frame, height=15, bg="black", fg="lime", 
                                                    font=("Consolas", 9), wrap=tk.WORD)
         self.log_text.pack(fill=tk.BOTH, expand=True)
         
         self.log("Map Editor démarré avec succès - Résolution 1536x1024")
         self.update_info()
-        
-        print("MapEditor initialisé avec succès")
     
     def log(self, message):
         """Ajouter un message au log"""
@@ -150,6 +219,14 @@ class MapEditor:
                  bg="#2ecc71", fg="white", width=20).pack(pady=2)
         tk.Button(section_frame, text="⚙️ Paramètres map", command=self.map_settings, 
                  bg="#95a5a6", fg="white", width=20).pack(pady=2)
+        tk.Button(section_frame, text="🧮 Options d'export", command=self.export_settings, 
+                 bg="#95a5a6", fg="white", width=20).pack(pady=2)
+        tk.Button(section_frame, text="📊 Coût serveur", command=self.cost_report,
+                 bg="#95a5a6", fg="white", width=20).pack(pady=2)
+        tk.Button(section_frame, text="🔥 Carte de coût", command=self.toggle_cost_heatmap,
+                 bg="#95a5a6", fg="white", width=20).pack(pady=2)
+        tk.Button(section_frame, text="📈 Télémétrie", command=self.cycle_telemetry,
+                 bg="#95a5a6", fg="white", width=20).pack(pady=2)
         
         # Section Outils de création
         creation_frame = tk.LabelFrame(parent_frame, text="CRÉATION", bg="gray20", fg="white",
@@ -196,6 +273,13 @@ class MapEditor:
                  bg="#34495e", fg="white", width=20).pack(pady=2)
         tk.Button(edit_frame, text="🔧 Modifier courbe", command=lambda: self.set_mode("modify_curve"), 
                  bg="#34495e", fg="white", width=20).pack(pady=2)
+        tk.Button(edit_frame, text="📏 Rééchantillonner ligne", command=self.resample_racing_line, 
+                 bg="#34495e", fg="white", width=20).pack(pady=2)
+        tk.Button(edit_frame, text="✂️ Simplifier murs/zones", command=self.simplify_shapes, 
+                 bg="#34495e", fg="white", width=20).pack(pady=2)
+        self.test_drive_button = tk.Button(edit_frame, text="🤖 Essai par des bots", command=self.toggle_test_drive,
+                                           bg="#34495e", fg="white", width=20)
+        self.test_drive_button.pack(pady=2)
         tk.Button(edit_frame, text="↩️ Annuler (Ctrl+Z)", command=self.undo, 
                  bg="#95a5a6", fg="white", width=20).pack(pady=2)
         tk.Button(edit_frame, text="🗑️ Tout effacer", command=self.clear_all, 
@@ -240,15 +324,11 @@ class MapEditor:
     
     def screen_to_world(self, x, y):
         """Convert screen coordinates to world coordinates"""
-        world_x = (x - self.pan_x) / self.zoom_level
-        world_y = (y - self.pan_y) / self.zoom_level
-        return world_x, world_y
+        return self.viewport.screen_to_world(x, y)
     
     def world_to_screen(self, x, y):
         """Convert world coordinates to screen coordinates"""
-        screen_x = x * self.zoom_level + self.pan_x
-        screen_y = y * self.zoom_level + self.pan_y
-        return screen_x, screen_y
+        return self.viewport.world_to_screen(x, y)
     
     def on_mouse_wheel(self, event):
         """Handle mouse wheel for zooming"""
@@ -263,18 +343,9 @@ class MapEditor:
             zoom_factor = 1.1
         
         # Limit zoom level
-        new_zoom = self.zoom_level * zoom_factor
-        if 0.1 <= new_zoom <= 5.0:
-            # Get world coordinates before zoom
-            world_x, world_y = self.screen_to_world(mouse_x, mouse_y)
-            
-            # Update zoom level
-            self.zoom_level = new_zoom
-            
-            # Adjust pan to keep mouse position stable
-            self.pan_x = mouse_x - world_x * self.zoom_level
-            self.pan_y = mouse_y - world_y * self.zoom_level
-            
+        if 0.1 <= self.zoom_level * zoom_factor <= 5.0:
+            # Le point sous la souris reste fixe
+            self.viewport.zoom_at(zoom_factor, mouse_x, mouse_y)
             self.update_info()
             self.redraw()
     
@@ -297,9 +368,7 @@ class MapEditor:
     
     def reset_zoom(self):
         """Reset zoom to 100%"""
-        self.zoom_level = 1.0
-        self.pan_x = 0
-        self.pan_y = 0
+        self.viewport.reset()
         self.update_info()
         self.redraw()
     
@@ -307,16 +376,7 @@ class MapEditor:
         """Zoom in by 10%"""
         if self.zoom_level < 5.0:
             # Zoom towards center of canvas
-            center_x = self.canvas.winfo_width() / 2
-            center_y = self.canvas.winfo_height() / 2
-            world_x, world_y = self.screen_to_world(center_x, center_y)
-            
-            self.zoom_level *= 1.1
-            
-            # Adjust pan to keep center stable
-            self.pan_x = center_x - world_x * self.zoom_level
-            self.pan_y = center_y - world_y * self.zoom_level
-            
+            self.viewport.zoom_at(1.1, self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2)
             self.update_info()
             self.redraw()
     
@@ -324,16 +384,7 @@ class MapEditor:
         """Zoom out by 10%"""
         if self.zoom_level > 0.1:
             # Zoom towards center of canvas
-            center_x = self.canvas.winfo_width() / 2
-            center_y = self.canvas.winfo_height() / 2
-            world_x, world_y = self.screen_to_world(center_x, center_y)
-            
-            self.zoom_level *= 0.9
-            
-            # Adjust pan to keep center stable
-            self.pan_x = center_x - world_x * self.zoom_level
-            self.pan_y = center_y - world_y * self.zoom_level
-            
+            self.viewport.zoom_at(0.9, self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2)
             self.update_info()
             self.redraw()
     
@@ -346,6 +397,7 @@ class MapEditor:
             
             # Only update if zoom has changed significantly
             if not hasattr(self, '_last_bg_zoom') or abs(self._last_bg_zoom - self.zoom_level) > 0.05:
+                from PIL import Image, ImageTk
                 scaled_image = self.background_pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
                 self.background_image = ImageTk.PhotoImage(scaled_image)
                 self._last_bg_zoom = self.zoom_level
@@ -430,8 +482,202 @@ class MapEditor:
             self.log(f"Erreur dans set_mode: {str(e)}")
             traceback.print_exc()
 
+    def export_settings(self):
+        """Dialogue pour choisir les précalculs ajoutés au JSON exporté"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Options d'export")
+
+        tk.Label(dialog, text="PRÉCALCULS", font=("Arial", 10, "bold")).pack(padx=20, pady=10)
+        variables = {}
+        for key, label, _enabled, _bake, _strip in BAKES:
+            variables[key] = tk.BooleanVar(value=self.export_options.get(key, False))
+            tk.Checkbutton(dialog, text=f"{label} ({key})", variable=variables[key]).pack(anchor="w", padx=20)
+
+        def save_options():
+            for key, var in variables.items():
+                self.export_options[key] = var.get()
+            dialog.destroy()
+
+        tk.Button(dialog, text="Sauvegarder", command=save_options, bg="#2ecc71", fg="white").pack(pady=15)
+
+    def cost_report(self):
+        """Panneau du coût serveur de la map courante (maps/cost.py), calculé en arrière-plan"""
+        from tkinter import messagebox
+        try:
+            # NumPy (bitmap des zones de vide) n'est importé qu'ici
+            from maps.cost import estimate_cost, format_cost
+            # Copie : le calcul ne doit pas lire les points pendant qu'ils sont modifiés
+            document = copy.deepcopy(export_document(self, self.export_road_segments()))
+        except Exception as e:
+            self.log(f"Erreur du rapport de coût : {str(e)}")
+            messagebox.showerror("Erreur", f"Erreur du rapport de coût : {str(e)}")
+            traceback.print_exc()
+            return
+        self.log("Coût serveur : calcul en cours...")
+        result = {}
+
+        def worker():
+            try:
+                result["lines"] = format_cost(estimate_cost(document))
+            except Exception as e:
+                result["error"] = e
+                traceback.print_exc()
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(15, self.poll_cost_report, thread, result)
+
+    def poll_cost_report(self, thread, result):
+        """Attendre la fin du calcul du coût sans bloquer la boucle Tk"""
+        from tkinter import messagebox
+        if thread.is_alive():
+            self.root.after(15, self.poll_cost_report, thread, result)
+            return
+        if "error" in result:
+            e = result["error"]
+            self.log(f"Erreur du rapport de coût : {str(e)}")
+            messagebox.showerror("Erreur", f"Erreur du rapport de coût : {str(e)}")
+            return
+        lines = result["lines"]
+        self.log("Coût serveur - " + lines[-2].strip())
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Coût serveur de la map")
+        tk.Label(dialog, text="COÛT PAR JOUEUR ET PAR TICK", font=("Arial", 10, "bold")).pack(padx=20, pady=10)
+        text = tk.Text(dialog, width=90, height=len(lines) + 1, font=("Consolas", 9), bg="black", fg="lime")
+        text.insert(tk.END, "\n".join(lines))
+        text.config(state=tk.DISABLED)
+        text.pack(padx=10)
+        tk.Button(dialog, text="Fermer", command=dialog.destroy, bg="#95a5a6", fg="white").pack(pady=15)
+
+    def toggle_cost_heatmap(self):
+        self.show_cost_heatmap = not self.show_cost_heatmap
+        self.log(f"Carte de coût des collisions {'affichée' if self.show_cost_heatmap else 'masquée'}")
+        self.redraw()
+
+    def draw_cost_heatmap(self):
+        """Calque semi-transparent du nombre de segments testés par cellule de la grille de collision.
+
+        Une image d'un pixel par cellule est calculée quand les murs changent ;
+        seule sa partie visible est agrandie et convertie pour le canvas, et
+        seulement quand la vue change.
+        """
+        from PIL import Image
+        curves = self.continuous_curves
+        key = tuple((tuple(map(tuple, c.get("points", []))), c.get("closed", False)) for c in curves)
+        heatmap = self.cost_heatmap
+        if heatmap.get("key") != key:
+            grid = bake_collision_grid(curves)
+            start = grid["cellStart"]
+            counts = [start[k + 1] - start[k] for k in range(len(start) - 1)]
+            peak = max(counts) or 1
+            cells = Image.new("RGBA", (grid["cols"], grid["rows"]))
+            cells.putdata([_heat_color(count, peak) for count in counts])
+            heatmap.clear()
+            heatmap.update(key=key, grid=grid, cells=cells, peak=peak)
+        grid = heatmap["grid"]
+        self.draw_cell_image(heatmap, heatmap["cells"], grid["originX"], grid["originY"], grid["cellSize"])
+        self.canvas.create_text(10, 10, anchor="nw", fill="yellow", font=("Arial", 10, "bold"),
+                                text=f"Coût des collisions : {heatmap['peak']} segments max par cellule "
+                                     f"de {grid['cellSize']} px")
+
+    def draw_cell_image(self, cache, cells, origin_x, origin_y, size, resample="NEAREST"):
+        """Dessine une image d'un pixel par cellule de grille, agrandie sur la partie visible.
+
+        L'image convertie pour le canvas est gardée dans cache (clés "view"
+        et "image") tant que la vue ne change pas.
+        """
+        from PIL import Image, ImageTk
+        # Cellules visibles (l'image agrandie ne dépasse pas le canvas d'une cellule)
+        width = max(self.canvas.winfo_width(), 2)
+        height = max(self.canvas.winfo_height(), 2)
+        left, top = self.screen_to_world(0, 0)
+        right, bottom = self.screen_to_world(width, height)
+        col0 = max(0, math.floor((left - origin_x) / size))
+        row0 = max(0, math.floor((top - origin_y) / size))
+        col1 = min(cells.width, math.ceil((right - origin_x) / size))
+        row1 = min(cells.height, math.ceil((bottom - origin_y) / size))
+        if col0 >= col1 or row0 >= row1:
+            return
+        x0, y0 = self.world_to_screen(origin_x + col0 * size, origin_y + row0 * size)
+        x1, y1 = self.world_to_screen(origin_x + col1 * size, origin_y + row1 * size)
+        view = (id(cells), col0, row0, col1, row1, max(1, round(x1 - x0)), max(1, round(y1 - y0)))
+        if cache.get("view") != view:
+            visible = cells.crop(view[1:5]).resize(view[5:], getattr(Image.Resampling, resample))
+            cache["image"] = ImageTk.PhotoImage(visible)
+            cache["view"] = view
+        self.canvas.create_image(x0, y0, image=cache["image"], anchor="nw")
+
+    def cycle_telemetry(self):
+        """Charge un log de télémétrie, puis alterne densité, crashs, chutes et masqué"""
+        if self.telemetry and self.telemetry["kind"]:
+            from maps.telemetry import KINDS
+            kinds = list(KINDS)
+            index = kinds.index(self.telemetry["kind"]) + 1
+            self.telemetry["kind"] = kinds[index] if index < len(kinds) else None
+            self.log(f"Télémétrie : {self.telemetry['kind'] or 'masquée'}")
+            self.redraw()
+            return
+
+        from tkinter import filedialog, messagebox
+        file_path = filedialog.askopenfilename(filetypes=[("NDJSON", "*.ndjson *.jsonl"), ("Tous", "*.*")])
+        if not file_path:
+            return
+        try:
+            # NumPy n'est nécessaire que pour la télémétrie
+            from maps.telemetry import ingest_log
+        except ImportError as e:
+            messagebox.showerror("Télémétrie", f"La télémétrie nécessite NumPy : {e}")
+            return
+        self.log(f"Télémétrie : lecture de {os.path.basename(file_path)} (carte {self.map_id})...")
+        result = {}
+
+        def worker():
+            try:
+                result["histograms"], result["stats"] = ingest_log(file_path, self.map_id)
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(15, self.poll_telemetry, thread, result, file_path)
+
+    def poll_telemetry(self, thread, result, file_path):
+        """Attendre la fin de la lecture du log sans bloquer la boucle Tk"""
+        from maps.telemetry import DEFAULT_CELL_SIZE, KINDS, heatmap_cells
+        if thread.is_alive():
+            self.root.after(15, self.poll_telemetry, thread, result, file_path)
+            return
+        if "error" in result:
+            self.log(f"Erreur de télémétrie : {str(result['error'])}")
+            return
+        stats = result["stats"]
+        histograms = result["histograms"]
+        self.log(f"Télémétrie : {stats['records']} enregistrements, {stats['lines']} lignes lues "
+                 f"({stats['bytes'] / 1e6:.1f} Mo en {stats['seconds']:.2f} s), {stats['badLines']} invalides, "
+                 f"cache : {stats['cached'] or 'absent'} - "
+                 + ", ".join(f"{kind}: {int(counts.sum())}" for kind, counts in histograms.items()))
+        self.telemetry = {
+            "path": file_path,
+            "kind": next(iter(KINDS)),
+            "cellSize": DEFAULT_CELL_SIZE,
+            "cells": {kind: heatmap_cells(histograms[kind], color) for kind, (_event, color) in KINDS.items()},
+            "totals": {kind: int(counts.sum()) for kind, counts in histograms.items()},
+        }
+        self.redraw()
+
+    def draw_telemetry(self):
+        """Heatmap de télémétrie affichée (une image en cache, comme la carte de coût)"""
+        telemetry = self.telemetry
+        kind = telemetry["kind"]
+        self.draw_cell_image(telemetry, telemetry["cells"][kind], 0, 0, telemetry["cellSize"], "BILINEAR")
+        self.canvas.create_text(10, 28, anchor="nw", fill="white", font=("Arial", 10, "bold"),
+                                text=f"Télémétrie {os.path.basename(telemetry['path'])} : {kind} "
+                                     f"({telemetry['totals'][kind]})")
+
     def map_settings(self):
         """Dialogue pour configurer les paramètres de la map"""
+        from tkinter import messagebox
         dialog = tk.Toplevel(self.root)
         dialog.title("Paramètres de la map")
         dialog.geometry("400x450")
@@ -507,8 +753,10 @@ class MapEditor:
         tk.Button(dialog, text="Sauvegarder", command=save_settings, bg="#2ecc71", fg="white").grid(row=10, column=0, columnspan=2, pady=20)
 
     def load_image(self):
+        from tkinter import filedialog
         path = filedialog.askopenfilename(filetypes=[("Image files", "*.png;*.jpg;*.jpeg")])
         if path:
+            from PIL import Image
             self.background_path = path
             # Store original image for dynamic scaling
             self.background_pil_image = Image.open(path).resize((1536, 1024))
@@ -594,6 +842,249 @@ class MapEditor:
         self.redraw()
         self.update_info()
     
+    def resample_racing_line(self):
+        """Rééchantillonne la ligne de course avec un espacement constant entre les points"""
+        from tkinter import messagebox, simpledialog
+        if not self.racing_line or len(self.racing_line["points"]) < 2:
+            messagebox.showinfo("Ligne de course", "Aucune ligne de course à rééchantillonner")
+            return
+        spacing = simpledialog.askfloat("Rééchantillonnage", "Espacement entre les points (px) :",
+                                        initialvalue=DEFAULT_SPACING, minvalue=MIN_SPACING)
+        if spacing is None:
+            return
+
+        points, closed, _, _ = preprocess_racing_line(self.racing_line)
+        resampled, actual = resample_points(points, closed, spacing)
+        # closed n'est pas exporté : le point de fermeture en double garde la
+        # ligne fermée pour preprocessRacingLine (comme resample_racing_line)
+        exported = resampled + [list(resampled[0])] if closed else resampled
+        _points, _closed, _distances, total_length = preprocess_racing_line({"points": exported, "closed": closed})
+
+        self.begin_transaction("resample_racing_line", [(self.model.__dict__, "racing_line")])
+        self.racing_line = {
+            "points": exported,
+            "totalLength": total_length,
+            "type": "racing_line",
+            "closed": closed
+        }
+        self.commit_transaction()
+        self.log(f"Ligne de course rééchantillonnée : {len(points)} -> {len(resampled)} points, "
+                 f"espacement {actual:.2f} px, longueur {total_length:.2f}")
+        self.redraw()
+        self.update_info()
+
+    def simplify_shapes(self):
+        """Simplifie (Ramer-Douglas-Peucker) les courbes continues et zones de vide.
+
+        Ne traite que l'objet sélectionné si c'est une courbe continue ou une
+        zone de vide. Le résultat est affiché en aperçu avant validation.
+        """
+        from tkinter import messagebox, simpledialog
+        shapes = [(cc, cc.get("closed", False)) for cc in self.continuous_curves]
+        shapes += [(vz, True) for vz in self.void_zones]
+        if isinstance(self.selected_object, tuple):
+            shapes = [(shape, closed) for shape, closed in shapes if shape is self.selected_object[0]] or shapes
+        if not shapes:
+            messagebox.showinfo("Simplification", "Aucune courbe continue ni zone de vide à simplifier")
+            return
+        tolerance = simpledialog.askfloat("Simplification", "Tolérance (px) :",
+                                          initialvalue=DEFAULT_TOLERANCE, minvalue=0.0)
+        if tolerance is None:
+            return
+
+        changes = []
+        before = removed = skipped = 0
+        max_deviation = 0.0
+        for shape, closed in shapes:
+            points, count, deviation = simplify_points(shape["points"], closed, tolerance)
+            before += len(shape["points"])
+            removed += count
+            max_deviation = max(max_deviation, deviation)
+            if count:
+                changes.append((shape, points, closed))
+            elif not is_simple(shape["points"], closed):
+                skipped += 1
+
+        summary = (f"{before} -> {before - removed} points ({removed} supprimés), "
+                   f"écart max {max_deviation:.2f} px")
+        if skipped:
+            summary += f", {skipped} forme(s) auto-intersectante(s) ignorée(s)"
+        if not changes:
+            self.log(f"Simplification ({tolerance:g} px) : aucun point à supprimer")
+            messagebox.showinfo("Simplification", summary)
+            return
+
+        # Aperçu : les polylignes simplifiées sont dessinées par-dessus les originales
+        self.simplify_preview = [(points, closed) for _shape, points, closed in changes]
+        self.redraw()
+        self.root.update_idletasks()
+        apply = messagebox.askyesno("Simplification", summary + "\n\nAppliquer la simplification ?")
+        self.simplify_preview = []
+
+        if apply:
+            self.begin_transaction("simplify", [(shape, "points") for shape, _points, _closed in changes])
+            for shape, points, _closed in changes:
+                shape["points"] = points
+            self.commit_transaction()
+            self.selected_object = None
+            self.log(f"Simplification ({tolerance:g} px) : {summary}")
+        self.redraw()
+        self.update_info()
+
+    def draw_simplify_preview(self):
+        """Dessine l'aperçu de la simplification en pointillés"""
+        for points, closed in self.simplify_preview:
+            coords = [self.world_to_screen(p[0], p[1]) for p in points]
+            if closed:
+                coords.append(coords[0])
+            for (x1, y1), (x2, y2) in zip(coords, coords[1:]):
+                self.canvas.create_line(x1, y1, x2, y2, fill="cyan", width=2, dash=(4, 2))
+            for x, y in coords:
+                self.canvas.create_oval(x-3, y-3, x+3, y+3, fill="cyan", outline="")
+
+    def toggle_test_drive(self):
+        if self.test_drive:
+            self.test_drive["stop"].set()
+        else:
+            self.start_test_drive()
+
+    def start_test_drive(self):
+        """Lance quelques bots sur la map courante, en temps accéléré.
+
+        La simulation (maps/simulate.py, port de la logique du serveur) tourne
+        dans un thread sur une copie exportée de la map ; poll_test_drive
+        déplace les karts sur le canvas et marque les chutes, blocages et
+        checkpoints manqués au fil de l'eau.
+        """
+        from tkinter import messagebox
+        try:
+            from maps.simulate import Simulation
+        except ImportError as e:
+            messagebox.showerror("Essai", f"L'essai par des bots nécessite NumPy : {e}")
+            return
+        try:
+            sim = Simulation(export_document(self, self.export_road_segments()), bots=TEST_DRIVE_BOTS)
+        except ValueError as e:
+            messagebox.showerror("Essai", f"Essai impossible : {e}")
+            return
+
+        state = {"stop": threading.Event(), "lock": threading.Lock(), "frame": None, "events": [],
+                 "items": [], "fell": set(), "summary": None, "error": None}
+
+        def worker():
+            frame_ticks = max(1, round(TEST_DRIVE_SPEED * TICK_RATE * TEST_DRIVE_FRAME_MS / 1000))
+            published = 0
+            deadline = time.perf_counter()
+            try:
+                while not state["stop"].is_set() and sim.tick < TEST_DRIVE_MAX_TICKS and not sim.finished.all():
+                    sim.run(frame_ticks)
+                    frame = (sim.tick, sim.x.tolist(), sim.y.tolist(), sim.angle.tolist(),
+                             (sim.dead | sim.falling).tolist())
+                    with state["lock"]:
+                        state["frame"] = frame
+                        state["events"].extend(sim.events[published:])
+                    published = len(sim.events)
+                    # Cadence fixe ; si la simulation prend du retard, on repart de maintenant
+                    deadline += TEST_DRIVE_FRAME_MS / 1000
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        state["stop"].wait(delay)
+                    else:
+                        deadline = time.perf_counter()
+                state["summary"] = sim.summary()
+            except Exception as e:
+                state["error"] = e
+
+        self.test_drive_markers = []
+        self.test_drive = state
+        state["thread"] = threading.Thread(target=worker, daemon=True)
+        state["thread"].start()
+        self.test_drive_button.config(text="⏹️ Arrêter l'essai")
+        self.log(f"Essai : {TEST_DRIVE_BOTS} bots, temps x{TEST_DRIVE_SPEED}, "
+                 f"{len(sim.waypoints)} points de passage")
+        self.redraw()
+        self.root.after(TEST_DRIVE_FRAME_MS, self.poll_test_drive)
+
+    def poll_test_drive(self):
+        """Affiche la dernière image de l'essai et ses nouveaux incidents"""
+        state = self.test_drive
+        if state is None:
+            return
+        # Lu avant de vider la file : les derniers événements du thread ne sont pas perdus
+        alive = state["thread"].is_alive()
+        with state["lock"]:
+            events, state["events"] = state["events"], []
+        for tick, kind, bot, x, y, detail in events:
+            if kind == "fall":
+                state["fell"].add(bot)
+            elif kind == "death" and bot in state["fell"]:
+                # Fin de la chute déjà marquée
+                state["fell"].discard(bot)
+                continue
+            if kind in TEST_DRIVE_INCIDENTS:
+                self.test_drive_markers.append((kind, x, y))
+                self.draw_test_drive_marker(kind, x, y)
+                what = TEST_DRIVE_INCIDENTS[kind][0]
+                if kind == "missedCheckpoint":
+                    what += f" ({detail + 1})"
+                self.log(f"Essai {tick / TICK_RATE:.1f} s - bot {bot + 1} : {what} en ({x:.0f}, {y:.0f})")
+            elif kind in ("lap", "finish"):
+                self.log(f"Essai {tick / TICK_RATE:.1f} s - bot {bot + 1} : "
+                         f"{'arrivée' if kind == 'finish' else f'tour {detail - 1} bouclé'}")
+        self.draw_test_drive_karts()
+
+        if alive:
+            self.root.after(TEST_DRIVE_FRAME_MS, self.poll_test_drive)
+            return
+        self.test_drive = None
+        self.test_drive_button.config(text="🤖 Essai par des bots")
+        if state["error"] is not None:
+            self.log(f"Erreur pendant l'essai : {state['error']}")
+        elif state["summary"]:
+            report = state["summary"]
+            self.log(f"Essai terminé ({report['ticks'] / TICK_RATE:.0f} s de course) - "
+                     f"tours: {report['laps']:.1f} en moyenne, arrivés: {report['finished']}/{TEST_DRIVE_BOTS}, "
+                     f"chutes: {report['falls']}, morts: {report['deaths']}, blocages: {report['stuck']}, "
+                     f"checkpoints manqués: {report['missedCheckpoints']}")
+        self.redraw()
+
+    def draw_test_drive(self):
+        """Dessine le calque de l'essai : incidents puis karts"""
+        for kind, x, y in self.test_drive_markers:
+            self.draw_test_drive_marker(kind, x, y)
+        if self.test_drive:
+            # redraw a effacé le canvas : les karts sont recréés
+            self.test_drive["items"] = []
+            self.draw_test_drive_karts()
+
+    def draw_test_drive_marker(self, kind, x, y):
+        sx, sy = self.world_to_screen(x, y)
+        color = TEST_DRIVE_INCIDENTS[kind][1]
+        self.canvas.create_line(sx-6, sy-6, sx+6, sy+6, fill=color, width=2, tags="test_drive")
+        self.canvas.create_line(sx-6, sy+6, sx+6, sy-6, fill=color, width=2, tags="test_drive")
+
+    def draw_test_drive_karts(self):
+        """Place les karts de l'essai ; les items existants sont seulement déplacés"""
+        frame = self.test_drive and self.test_drive["frame"]
+        if not frame:
+            return
+        _tick, xs, ys, angles, out = frame
+        items = self.test_drive["items"]
+        radius = max(4, KART_SIZE / 2 * self.zoom_level)
+        for k, (x, y, angle) in enumerate(zip(xs, ys, angles)):
+            sx, sy = self.world_to_screen(x, y)
+            nose = (sx + math.cos(angle) * radius * 2, sy + math.sin(angle) * radius * 2)
+            color = "gray50" if out[k] else TEST_DRIVE_COLORS[k % len(TEST_DRIVE_COLORS)]
+            if k < len(items):
+                body, heading = items[k]
+                self.canvas.coords(body, sx-radius, sy-radius, sx+radius, sy+radius)
+                self.canvas.itemconfig(body, fill=color)
+                self.canvas.coords(heading, sx, sy, *nose)
+            else:
+                items.append((self.canvas.create_oval(sx-radius, sy-radius, sx+radius, sy+radius,
+                                                      fill=color, outline="black", tags="test_drive"),
+                              self.canvas.create_line(sx, sy, *nose, fill="white", width=2, tags="test_drive")))
+
     def stop_void_zone(self):
         """Arrête le dessin de la zone de vide"""
         if self.is_drawing_void_zone and len(self.current_void_zone) >= 3:
@@ -614,6 +1105,7 @@ class MapEditor:
         self.update_info()
 
     def clear_all(self):
+        from tkinter import messagebox
         if messagebox.askyesno("Confirmation", "Êtes-vous sûr de vouloir tout effacer ?"):
             self.rectangles = []
             self.curves = []
@@ -636,6 +1128,7 @@ class MapEditor:
             self.current_continuous_curve = []
             self.current_void_zone = []
             self.current_racing_line = []
+            self.test_drive_markers = []
             self.is_drawing_continuous = False
             self.is_drawing_void_zone = False
             self.is_drawing_racing_line = False
@@ -784,6 +1277,7 @@ class MapEditor:
                             "v2": {"x": v2["x"] + dx, "y": v2["y"] + dy}
                         }
                     
+                    self.update_transaction()
                     self.redraw()
                     
             elif self.road_edit_mode == "grab":
@@ -799,6 +1293,7 @@ class MapEditor:
                         self.road_mesh[v_id]["x"] = self.original_positions[i]["x"] + dx
                         self.road_mesh[v_id]["y"] = self.original_positions[i]["y"] + dy
                     
+                    self.update_transaction()
                     self.redraw()
                     
             elif self.road_edit_mode == "scale":
@@ -815,6 +1310,7 @@ class MapEditor:
                         self.road_mesh[v_id]["x"] = self.scale_center[0] + (orig["x"] - self.scale_center[0]) * scale_factor
                         self.road_mesh[v_id]["y"] = self.scale_center[1] + (orig["y"] - self.scale_center[1]) * scale_factor
                     
+                    self.update_transaction()
                     self.redraw()
                     
             elif self.road_edit_mode == "rotate":
@@ -840,6 +1336,7 @@ class MapEditor:
                         self.road_mesh[v_id]["x"] = cx + dx * cos_a - dy * sin_a
                         self.road_mesh[v_id]["y"] = cy + dx * sin_a + dy * cos_a
                     
+                    self.update_transaction()
                     self.redraw()
         
         # Changer le curseur selon la position
@@ -1015,6 +1512,7 @@ class MapEditor:
                     delta_angle = math.degrees(angle2 - angle1)
                     self.selected_object["angle"] = (self.edit_original_state.get("angle", 0) + delta_angle) % 360
                 
+            self.update_transaction()
             self.redraw()
 
     def on_click(self, event):
@@ -1315,6 +1813,7 @@ class MapEditor:
                     # Start creating the first road segment
                     self.is_drawing_road = True
                     self.drag_start = (world_x, world_y)
+                    self.begin_transaction("road_segment", self.road_transaction_slots())
                 elif self.road_edit_mode:
                     # Confirm current operation
                     self.confirm_road_operation()
@@ -1403,6 +1902,7 @@ class MapEditor:
                     for i, point in enumerate(curve["points"]):
                         if math.dist((world_x, world_y), point) < 15 / self.zoom_level:
                             self.selected_object = (curve, i)
+                            self.begin_transaction("modify_curve", [(curve["points"], i)])
                             self.log(f"Point de courbe sélectionné")
                             return
                 
@@ -1411,6 +1911,7 @@ class MapEditor:
                     for i, point in enumerate(curve["points"]):
                         if math.dist((world_x, world_y), point) < 15 / self.zoom_level:
                             self.selected_object = (curve, i)
+                            self.begin_transaction("modify_curve", [(curve["points"], i)])
                             self.log(f"Point de courbe continue sélectionné")
                             return
                 
@@ -1419,6 +1920,7 @@ class MapEditor:
                     for i, point in enumerate(zone["points"]):
                         if math.dist((world_x, world_y), point) < 15 / self.zoom_level:
                             self.selected_object = (zone, i)
+                            self.begin_transaction("modify_curve", [(zone["points"], i)])
                             self.log(f"Point de zone de vide sélectionné")
                             return
                 
@@ -1427,6 +1929,7 @@ class MapEditor:
                     for i, point in enumerate(self.racing_line["points"]):
                         if math.dist((world_x, world_y), point) < 15 / self.zoom_level:
                             self.selected_object = (self.racing_line, i)
+                            self.begin_transaction("modify_curve", [(self.racing_line["points"], i)])
                             self.log(f"Point de ligne de course sélectionné")
                             return
                             
@@ -1445,6 +1948,7 @@ class MapEditor:
             # car on ne duplique plus le dernier point
             curve["points"][point_index] = (world_x, world_y)
             
+            self.update_transaction()
             self.redraw()
         elif self.mode == "road" and self.is_drawing_road:
             # Update mouse position for preview
@@ -1452,6 +1956,9 @@ class MapEditor:
             self.redraw()
 
     def on_release(self, event):
+        if self.mode == "modify_curve" and self.active_transaction:
+            self.commit_transaction()
+        
         if self.mode == "road" and self.is_drawing_road:
             # Create the first road segment as a mesh
             self.is_drawing_road = False
@@ -1499,6 +2006,8 @@ class MapEditor:
                     self.log(f"Premier segment de route créé")
                     self.update_info()
                     self.redraw()
+            
+            self.commit_transaction()
     
     def on_right_click(self, event):
         if self.edit_mode:
@@ -1511,6 +2020,7 @@ class MapEditor:
             self.resize_handle = handle
             self.edit_start_pos = self.mouse_pos
             self.edit_original_state = self.selected_object.copy()
+            self.begin_transaction("resize", [(self.selected_object, key) for key in self.selected_object])
             self.update_info()
 
     def start_edit_operation(self, operation):
@@ -1518,6 +2028,7 @@ class MapEditor:
             self.edit_mode = operation
             self.edit_start_pos = self.mouse_pos
             self.edit_original_state = self.selected_object.copy()
+            slots = [(self.selected_object, key) for key in self.selected_object]
             
             # Pour la rotation groupée des spawn points, sauvegarder l'état de tout le groupe
             if operation == 'rotate' and self.selected_object.get("type") == "spawnpoint" and "group_id" in self.selected_object:
@@ -1526,31 +2037,23 @@ class MapEditor:
                 for sp in self.spawnpoints:
                     if sp.get("group_id") == group_id:
                         self.edit_group_states[id(sp)] = sp.copy()
+                        slots.append((sp, "angle"))
             
+            self.begin_transaction(operation, slots)
             self.update_info()
 
     def confirm_edit_operation(self):
         if self.edit_mode and self.selected_object:
-            self.actions_stack.append(("edit", (self.selected_object, self.edit_original_state)))
+            self.commit_transaction()
             self.edit_mode = None
             self.edit_start_pos = None
             self.edit_original_state = None
             self.update_info()
 
     def cancel_edit_operation(self):
-        if self.edit_mode and self.selected_object and self.edit_original_state:
-            # Restaurer l'état original
-            for key, value in self.edit_original_state.items():
-                self.selected_object[key] = value
-            
-            # Pour la rotation groupée, restaurer tout le groupe
-            if self.edit_mode == 'rotate' and hasattr(self, 'edit_group_states'):
-                for sp in self.spawnpoints:
-                    original_state = self.edit_group_states.get(id(sp))
-                    if original_state:
-                        for key, value in original_state.items():
-                            sp[key] = value
-            
+        if self.edit_mode and self.selected_object and self.active_transaction:
+            # Restaurer l'état original (objet et, pour la rotation groupée, tout le groupe)
+            self.cancel_transaction()
             self.redraw()
         self.edit_mode = None
         self.edit_start_pos = None
@@ -1942,51 +2445,9 @@ class MapEditor:
         if len(points) < 2:
             return
             
-        # Créer un chemin lisse à travers tous les points
-        # Utiliser l'interpolation de Catmull-Rom pour une courbe lisse
-        path_points = []
-        
-        # Déterminer le nombre de segments à dessiner
-        is_closed = curve.get("closed", False)
-        num_segments = len(points) if is_closed else len(points) - 1
-        
-        for i in range(num_segments):
-            # Pour une courbe fermée, on boucle sur les indices
-            if is_closed:
-                p0 = points[(i - 1) % len(points)]
-                p1 = points[i]
-                p2 = points[(i + 1) % len(points)]
-                p3 = points[(i + 2) % len(points)]
-            else:
-                # Pour une courbe ouverte, on limite aux bornes
-                p0 = points[max(0, i-1)]
-                p1 = points[i]
-                p2 = points[min(len(points)-1, i+1)]
-                p3 = points[min(len(points)-1, i+2)]
-            
-            # Générer des points intermédiaires
-            for t in range(0, 11):  # 11 points entre chaque paire
-                t = t / 10.0
-                
-                # Interpolation de Catmull-Rom
-                t2 = t * t
-                t3 = t2 * t
-                
-                x = 0.5 * ((2 * p1[0]) +
-                          (-p0[0] + p2[0]) * t +
-                          (2*p0[0] - 5*p1[0] + 4*p2[0] - p3[0]) * t2 +
-                          (-p0[0] + 3*p1[0] - 3*p2[0] + p3[0]) * t3)
-                
-                y = 0.5 * ((2 * p1[1]) +
-                          (-p0[1] + p2[1]) * t +
-                          (2*p0[1] - 5*p1[1] + 4*p2[1] - p3[1]) * t2 +
-                          (-p0[1] + 3*p1[1] - 3*p2[1] + p3[1]) * t3)
-                
-                path_points.append((x, y))
-        
-        # Pour une courbe non fermée, ajouter le dernier point
-        if not is_closed:
-            path_points.append(points[-1])
+        # Chemin lisse à travers tous les points (interpolation de Catmull-Rom,
+        # 11 points par segment ; courbe ouverte : le dernier point est ajouté)
+        path_points = sample_curve(points, curve.get("closed", False))
         
         # Dessiner la courbe comme une ligne continue épaisse
         for i in range(len(path_points) - 1):
@@ -2106,6 +2567,12 @@ class MapEditor:
                 # Apply zoom and pan to background image
                 img_x, img_y = self.world_to_screen(0, 0)
                 self.canvas.create_image(img_x, img_y, image=self.background_image, anchor="nw")
+
+            # Sous les murs : les segments restent visibles sur les zones chargées
+            if self.show_cost_heatmap:
+                self.draw_cost_heatmap()
+            if self.telemetry and self.telemetry["kind"]:
+                self.draw_telemetry()
             
             # Dessiner tous les éléments
             for rect in self.rectangles:
@@ -2134,6 +2601,9 @@ class MapEditor:
                 selected = (self.selected_object and isinstance(self.selected_object, tuple) and 
                            self.selected_object[0] == void_zone)
                 self.draw_void_zone(void_zone, selected)
+
+            if self.simplify_preview:
+                self.draw_simplify_preview()
                 
             # Draw road mesh
             self.draw_road_mesh()
@@ -2324,15 +2794,62 @@ class MapEditor:
                     px, py = self.world_to_screen(point[0], point[1])
                     self.canvas.create_oval(px-5, py-5, px+5, py+5, 
                                           fill=color, outline="white", tags="temp_racing_line")
+
+            # Calque de l'essai par des bots, au-dessus de tout le reste
+            if self.test_drive_markers or self.test_drive:
+                self.draw_test_drive()
                 
         except Exception as e:
             self.log(f"Erreur dans redraw: {str(e)}")
             traceback.print_exc()
 
+    def begin_transaction(self, label, slots):
+        """Démarre une opération interactive : mémorise l'état de départ des emplacements"""
+        if self.active_transaction:
+            self.commit_transaction()
+        self.active_transaction = EditTransaction(label)
+        for container, key in slots:
+            self.active_transaction.track(container, key)
+        return self.active_transaction
+
+    def update_transaction(self):
+        """Signale un nouvel événement de l'opération en cours (aucune entrée d'historique)"""
+        if self.active_transaction:
+            self.active_transaction.update()
+
+    def commit_transaction(self):
+        """Termine l'opération : une seule entrée d'historique (état de départ + état final)"""
+        txn = self.active_transaction
+        self.active_transaction = None
+        if txn and txn.commit():
+            self.actions_stack.append(("transaction", txn))
+        return txn
+
+    def cancel_transaction(self):
+        """Annule l'opération en cours en restaurant l'état de départ"""
+        txn = self.active_transaction
+        self.active_transaction = None
+        if txn:
+            txn.revert()
+        return txn
+
+    def road_transaction_slots(self):
+        """Emplacements couvrant toute la topologie de la route (création, extrusion)"""
+        return [(self.road_mesh, slice(None)), (self.road_edges, slice(None)),
+                (self.road_faces, slice(None)), (self.__dict__, "selected_vertices")]
+
+    def vertex_transaction_slots(self):
+        """Emplacements couvrant la position des vertices sélectionnés (grab, scale, rotate)"""
+        slots = []
+        for v_id in self.selected_vertices:
+            slots.append((self.road_mesh[v_id], "x"))
+            slots.append((self.road_mesh[v_id], "y"))
+        return slots
+
     def undo(self):
         if self.actions_stack:
             action, data = self.actions_stack.pop()
-            
+
             if action == "add_wall":
                 self.rectangles.remove(data)
             elif action == "remove_wall":
@@ -2377,10 +2894,8 @@ class MapEditor:
                 self.items.remove(data)
             elif action == "remove_item":
                 self.items.append(data)
-            elif action == "edit":
-                obj, old_state = data
-                for key, value in old_state.items():
-                    obj[key] = value
+            elif action == "transaction":
+                data.revert()
             elif action == "add_racing_line":
                 self.racing_line = None
             elif action == "remove_racing_line":
@@ -2389,237 +2904,89 @@ class MapEditor:
             self.redraw()
 
     def import_json(self):
-        """Importer une map depuis un fichier JSON"""
+        """Importer une map depuis un fichier JSON (lecture et validation en arrière-plan)"""
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(defaultextension=".json", 
                                               filetypes=[("JSON files", "*.json")])
         if file_path:
+            self.open_map(file_path)
+
+    def open_map(self, file_path, interactive=True, on_done=None):
+        """Charger une map en arrière-plan.
+
+        Sans interactive (--open), pas de confirmation ni de dialogue : le
+        résultat va seulement dans le log. on_done est appelé à la fin du
+        chargement, réussi ou non.
+        """
+        self.log(f"Import de {os.path.basename(file_path)} ({JSON_BACKEND})...")
+        result = {}
+
+        def worker():
             try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                
-                # Réinitialiser
+                result["model"], result["timings"] = load_map(file_path)
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(15, self.poll_import, thread, result, interactive, on_done)
+
+    def poll_import(self, thread, result, interactive=True, on_done=None):
+        """Attendre la fin du chargement sans bloquer la boucle Tk"""
+        from tkinter import messagebox
+        if thread.is_alive():
+            self.root.after(15, self.poll_import, thread, result, interactive, on_done)
+            return
+        if on_done is not None:
+            # Après les redessins mis en attente par l'import ci-dessous
+            self.root.after(0, self.root.after_idle, on_done)
+        if "error" in result:
+            e = result["error"]
+            self.log(f"Erreur lors de l'import : {str(e)}")
+            if interactive:
+                messagebox.showerror("Erreur", f"Erreur lors de l'import : {str(e)}")
+            return
+        try:
+            # Réinitialiser (l'éditeur est vide au lancement avec --open)
+            if interactive:
                 self.clear_all()
-                
-                # Charger les paramètres
-                self.map_id = data.get("id", "imported_track")
-                self.map_name = data.get("name", "imported_track")
-                self.background_key = data.get("background", "assets/background.png")
-                self.music_key = data.get("music", "assets/audio/theme.mp3")
-                
-                # Charger les paramètres de course
-                if "raceSettings" in data:
-                    self.race_settings = data["raceSettings"]
-                
-                # Charger les murs
-                for wall in data.get("walls", []):
-                    wall["type"] = "wall"
-                    self.rectangles.append(wall)
-                
-                # Charger les courbes
-                for curve_data in data.get("curves", []):
-                    curve = {"points": curve_data.get("points", []), "type": "curve"}
-                    self.curves.append(curve)
-                
-                # Charger les courbes continues
-                for cc_data in data.get("continuousCurves", []):
-                    cc = {
-                        "points": cc_data.get("points", []),
-                        "type": "continuous_curve",
-                        "closed": cc_data.get("closed", False)
-                    }
-                    self.continuous_curves.append(cc)
-                
-                # Charger les zones de vide
-                for vz_data in data.get("voidZones", []):
-                    vz = {
-                        "points": vz_data.get("points", []),
-                        "type": "void_zone",
-                        "closed": True
-                    }
-                    self.void_zones.append(vz)
-                
-                # Charger les routes
-                for road_data in data.get("roads", []):
-                    road = {
-                        "x1": road_data.get("x1", 0),
-                        "y1": road_data.get("y1", 0),
-                        "x2": road_data.get("x2", 0),
-                        "y2": road_data.get("y2", 0),
-                        "width": road_data.get("width", 80),
-                        "type": "road"
-                    }
-                    self.roads.append(road)
-                
-                # Charger les checkpoints
-                for cp in data.get("checkpoints", []):
-                    # Convertir l'ancien format rectangle en ligne si nécessaire
-                    if "width" in cp:
-                        # Ancien format - convertir en ligne
-                        cx = cp["x"] + cp["width"] / 2
-                        cy = cp["y"] + cp["height"] / 2
-                        angle = (cp.get("angle", 0) + 90) * math.pi / 180
-                        half_length = cp["height"] / 2
-                        
-                        checkpoint = {
-                            "x1": cx - math.cos(angle) * half_length,
-                            "y1": cy - math.sin(angle) * half_length,
-                            "x2": cx + math.cos(angle) * half_length,
-                            "y2": cy + math.sin(angle) * half_length,
-                            "type": "checkpoint"
-                        }
-                    else:
-                        # Nouveau format ligne
-                        checkpoint = cp.copy()
-                        checkpoint["type"] = "checkpoint"
-                    
-                    self.checkpoints.append(checkpoint)
-                
-                # Charger la ligne d'arrivée
-                if data.get("finishLine"):
-                    fl = data["finishLine"]
-                    # Convertir l'ancien format si nécessaire
-                    if "width" in fl:
-                        cx = fl["x"] + fl["width"] / 2
-                        cy = fl["y"] + fl["height"] / 2
-                        angle = (fl.get("angle", 0) + 90) * math.pi / 180
-                        half_length = fl["height"] / 2
-                        
-                        self.finish_line = {
-                            "x1": cx - math.cos(angle) * half_length,
-                            "y1": cy - math.sin(angle) * half_length,
-                            "x2": cx + math.cos(angle) * half_length,
-                            "y2": cy + math.sin(angle) * half_length,
-                            "type": "finish"
-                        }
-                    else:
-                        # Nouveau format ligne
-                        self.finish_line = fl.copy()
-                        self.finish_line["type"] = "finish"
-                
-                # Charger les spawn points
-                for sp in data.get("spawnPoints", []):
-                    sp["type"] = "spawnpoint"
-                    sp["width"] = 30
-                    sp["height"] = 20
-                    self.spawnpoints.append(sp)
-                
-                # Charger les boosters
-                for booster in data.get("boosters", []):
-                    # Convertir l'ancien format rectangle en ligne si nécessaire
-                    if "width" in booster:
-                        # Ancien format - convertir en ligne
-                        cx = booster["x"] + booster["width"] / 2
-                        cy = booster["y"] + booster["height"] / 2
-                        angle = booster.get("angle", 0) * math.pi / 180
-                        half_length = max(booster["width"], booster["height"]) / 2
-                        
-                        booster_line = {
-                            "x1": cx - math.cos(angle) * half_length,
-                            "y1": cy - math.sin(angle) * half_length,
-                            "x2": cx + math.cos(angle) * half_length,
-                            "y2": cy + math.sin(angle) * half_length,
-                            "type": "booster"
-                        }
-                        self.boosters.append(booster_line)
-                    else:
-                        # Nouveau format ligne
-                        booster["type"] = "booster"
-                        self.boosters.append(booster)
-                
-                # Charger les items
-                for item in data.get("items", []):
-                    # Convertir l'ancien format rectangle en ligne si nécessaire
-                    if "width" in item:
-                        # Ancien format - convertir en ligne
-                        cx = item["x"] + item["width"] / 2
-                        cy = item["y"] + item["height"] / 2
-                        angle = item.get("angle", 0) * math.pi / 180
-                        half_length = max(item["width"], item["height"]) / 2
-                        
-                        item_line = {
-                            "x1": cx - math.cos(angle) * half_length,
-                            "y1": cy - math.sin(angle) * half_length,
-                            "x2": cx + math.cos(angle) * half_length,
-                            "y2": cy + math.sin(angle) * half_length,
-                            "type": "item"
-                        }
-                        self.items.append(item_line)
-                    else:
-                        # Nouveau format ligne
-                        item["type"] = "item"
-                        self.items.append(item)
-                
-                # Charger la ligne de course
-                if "racingLine" in data:
-                    self.racing_line = {
-                        "points": data["racingLine"].get("points", []),
-                        "totalLength": data["racingLine"].get("totalLength", 0),
-                        "type": "racing_line"
-                    }
-                    self.log(f"Ligne de course importée avec {len(self.racing_line['points'])} points")
-                
-                self.redraw()
-                self.update_info()
+            self.apply_model(result["model"])
+            self.log(f"Import - {format_timings(result['timings'])}")
+            if self.racing_line:
+                self.log(f"Ligne de course importée avec {len(self.racing_line['points'])} points")
+
+            self.redraw()
+            self.update_info()
+            if interactive:
                 messagebox.showinfo("Import", "Map importée avec succès !")
-                
-            except Exception as e:
-                self.log(f"Erreur lors de l'import : {str(e)}")
+
+        except Exception as e:
+            self.log(f"Erreur lors de l'import : {str(e)}")
+            if interactive:
                 messagebox.showerror("Erreur", f"Erreur lors de l'import : {str(e)}")
 
+    def apply_model(self, model):
+        """Ajouter le contenu d'un MapModel chargé à la map courante"""
+        self.map_id = model.map_id
+        self.map_name = model.map_name
+        self.background_key = model.background_key
+        self.music_key = model.music_key
+        self.race_settings = model.race_settings
+        for attribute in MapModel.LIST_ATTRIBUTES:
+            getattr(self, attribute).extend(getattr(model, attribute))
+        if model.finish_line:
+            self.finish_line = model.finish_line
+        if model.racing_line:
+            self.racing_line = model.racing_line
+
     def export_json(self):
+        from tkinter import filedialog, messagebox
         try:
-            # Convertir les courbes continues en format exportable
-            continuous_curves_export = []
-            for cc in self.continuous_curves:
-                continuous_curves_export.append({
-                    "points": cc["points"],
-                    "type": "continuous",
-                    "closed": cc.get("closed", False)
-                })
-                
-            # Préparer les données selon le format demandé
-            data = {
-                "id": self.map_id,
-                "name": self.map_name,
-                "width": 1536,  # NOUVELLE RÉSOLUTION
-                "height": 1024,  # NOUVELLE RÉSOLUTION
-                "music": self.music_key,
-                "background": self.background_key,
-                "raceSettings": self.race_settings,
-                "spawnPoints": [{"x": sp["x"], "y": sp["y"], "angle": sp.get("angle", 0)} 
-                               for sp in self.spawnpoints],
-                "walls": [{"x": r["x"], "y": r["y"], "width": r["width"], "height": r["height"], "angle": r.get("angle", 0)} 
-                         for r in self.rectangles],
-                "curves": [{"points": c["points"]} for c in self.curves],
-                "continuousCurves": continuous_curves_export,
-                "checkpoints": [{"x1": c["x1"], "y1": c["y1"], "x2": c["x2"], "y2": c["y2"]} 
-                               for c in self.checkpoints],
-                "finishLine": {"x1": self.finish_line["x1"], "y1": self.finish_line["y1"], "x2": self.finish_line["x2"], "y2": self.finish_line["y2"]} 
-                             if self.finish_line else None,
-                "boosters": [{"x1": b["x1"], "y1": b["y1"], "x2": b["x2"], "y2": b["y2"]} 
-                            for b in self.boosters],
-                "items": [{"x1": i["x1"], "y1": i["y1"], "x2": i["x2"], "y2": i["y2"]} 
-                         for i in self.items],
-                "voidZones": [{"points": vz["points"], "closed": True} 
-                            for vz in self.void_zones],
-                "roads": self.export_road_segments()
-            }
-            
-            # Ajouter la ligne de course si elle existe
+            # Document commun à l'éditeur et au compilateur en ligne de commande
+            data = export_document(self, self.export_road_segments())
             if self.racing_line:
-                # S'assurer que les points sont dans le bon format
-                racing_points = []
-                for point in self.racing_line["points"]:
-                    if isinstance(point, tuple):
-                        racing_points.append([point[0], point[1]])
-                    else:
-                        racing_points.append(point)
-                
-                data["racingLine"] = {
-                    "points": racing_points,
-                    "totalLength": self.racing_line.get("totalLength", 0)
-                }
-                self.log(f"Racing line ajoutée à l'export: {len(racing_points)} points, longueur: {self.racing_line.get('totalLength', 0):.2f}")
+                self.log(f"Racing line ajoutée à l'export: {len(data['racingLine']['points'])} points, "
+                         f"longueur: {self.racing_line.get('totalLength', 0):.2f}")
             else:
                 self.log("Pas de ligne de course à exporter")
             
@@ -2630,110 +2997,57 @@ class MapEditor:
             
             file_path = filedialog.asksaveasfilename(defaultextension=".json", 
                                                     filetypes=[("JSON files", "*.json")])
-            if file_path:
-                # Export avec indentation propre mais coordonnées sur une ligne
-                json_str = json.dumps(data, indent=2)
-                
-                # Remplacer les coordonnées multi-lignes par des coordonnées sur une ligne
-                import re
-                
-                # Pour les spawnPoints
-                json_str = re.sub(r'{\s*"x":\s*(\d+),\s*"y":\s*(\d+),\s*"angle":\s*(\d+)\s*}', 
-                                 r'{"x": \1, "y": \2, "angle": \3}', json_str)
-                
-                # Pour les walls
-                json_str = re.sub(r'{\s*"x":\s*(\d+),\s*"y":\s*(\d+),\s*"width":\s*(\d+),\s*"height":\s*(\d+),\s*"angle":\s*(\d+)\s*}', 
-                                 r'{"x": \1, "y": \2, "width": \3, "height": \4, "angle": \5}', json_str)
-                
-                # Pour les checkpoints, boosters, items et finishLine
-                json_str = re.sub(r'{\s*"x1":\s*(\d+(?:\.\d+)?),\s*"y1":\s*(\d+(?:\.\d+)?),\s*"x2":\s*(\d+(?:\.\d+)?),\s*"y2":\s*(\d+(?:\.\d+)?)\s*}', 
-                                 r'{"x1": \1, "y1": \2, "x2": \3, "y2": \4}', json_str)
-                
-                # Pour les points dans les courbes et la ligne de course - format individuel
-                json_str = re.sub(r'\[\s*(\d+(?:\.\d+)?),\s*(\d+(?:\.\d+)?)\s*\]', r'[\1, \2]', json_str)
-                
-                # Pour mettre tous les tableaux de points sur une seule ligne
-                # Approche plus robuste avec gestion correcte des arrays imbriqués
-                def format_points_arrays(json_str):
-                    lines = json_str.split('\n')
-                    result = []
-                    i = 0
-                    
-                    while i < len(lines):
-                        line = lines[i].rstrip()
-                        
-                        # Chercher une ligne avec "points": [
-                        if '"points": [' in line:
-                            indent = len(line) - len(line.lstrip())
-                            indent_str = ' ' * indent
-                            
-                            # Si la ligne se termine par ], c'est déjà sur une ligne
-                            if line.rstrip().endswith(']') or line.rstrip().endswith('],'):
-                                result.append(line)
-                                i += 1
-                                continue
-                            
-                            # Collecter tous les points jusqu'au ] de fermeture
-                            points = []
-                            i += 1
-                            
-                            while i < len(lines):
-                                point_line = lines[i].strip()
-                                
-                                # Extraire les coordonnées [x, y]
-                                point_match = re.match(r'\[(\d+(?:\.\d+)?),\s*(\d+(?:\.\d+)?)\],?', point_line)
-                                if point_match:
-                                    x, y = point_match.groups()
-                                    points.append(f'[{x}, {y}]')
-                                    i += 1
-                                elif point_line.startswith(']'):
-                                    # Fin du tableau de points
-                                    # Construire la ligne finale
-                                    if points:
-                                        points_str = ', '.join(points)
-                                        if point_line.endswith(','):
-                                            result.append(f'{indent_str}"points": [{points_str}],')
-                                        else:
-                                            result.append(f'{indent_str}"points": [{points_str}]')
-                                    else:
-                                        result.append(f'{indent_str}"points": []')
-                                    
-                                    # Si la ligne contient autre chose après ], l'ajouter
-                                    remaining = point_line[1:].strip()
-                                    if remaining and remaining != ',':
-                                        result.append(indent_str + remaining)
-                                    
-                                    i += 1
-                                    break
-                                else:
-                                    # Ligne inattendue, arrêter
-                                    result.append(line)  # Ajouter la ligne "points": [
-                                    break
-                        else:
-                            result.append(line)
-                            i += 1
-                    
-                    return '\n'.join(result)
-                
-                # Appliquer le formatage
-                json_str = format_points_arrays(json_str)
-                
-                # Vérifier si racingLine est dans le JSON
-                if "racingLine" in json_str:
-                    self.log("✓ Racing line trouvée dans le JSON exporté")
-                else:
-                    self.log("✗ Racing line NON trouvée dans le JSON exporté")
-                
-                with open(file_path, "w") as f:
-                    f.write(json_str)
-                
-                messagebox.showinfo("Export", f"Map exportée avec succès dans {file_path}")
-                self.log(f"Map exportée avec succès : {file_path}")
-                
+            if not file_path:
+                return
+            # Le document est lu (et modifié par les précalculs) en arrière-plan :
+            # il ne doit pas partager ses listes de points avec la map en cours d'édition
+            options = dict(self.export_options)
+            data = copy.deepcopy(data)
         except Exception as e:
             self.log(f"Erreur lors de l'export : {str(e)}")
             messagebox.showerror("Erreur", f"Erreur lors de l'export : {str(e)}")
             traceback.print_exc()
+            return
+
+        result = {}
+
+        def worker():
+            try:
+                # Précalculs optionnels (grille de collision...) puis export en une
+                # seule passe : indentation propre, points et lignes sur une ligne
+                result["timings"] = {}
+                result["reports"] = {}
+                compile_map(data, options, result["timings"], result["reports"])
+                with open(file_path, "w") as f:
+                    write_map(data, f)
+            except Exception as e:
+                result["error"] = e
+                traceback.print_exc()
+
+        if any(options.values()):
+            self.log("Précalculs et écriture de la map en arrière-plan...")
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self.root.after(15, self.poll_export, thread, result, file_path)
+
+    def poll_export(self, thread, result, file_path):
+        """Attendre la fin des précalculs et de l'écriture sans bloquer la boucle Tk"""
+        from tkinter import messagebox
+        if thread.is_alive():
+            self.root.after(15, self.poll_export, thread, result, file_path)
+            return
+        if "error" in result:
+            e = result["error"]
+            self.log(f"Erreur lors de l'export : {str(e)}")
+            messagebox.showerror("Erreur", f"Erreur lors de l'export : {str(e)}")
+            return
+        if "simplify" in result["reports"]:
+            self.log("Simplification - " + format_report(result["reports"]["simplify"]))
+        if result["timings"]:
+            self.log("Précalculs - " + ", ".join(f"{key}: {seconds * 1000:.1f} ms"
+                                                for key, seconds in result["timings"].items()))
+        messagebox.showinfo("Export", f"Map exportée avec succès dans {file_path}")
+        self.log(f"Map exportée avec succès : {file_path}")
 
     def draw_road_mesh(self):
         """Draw the road segments and vertices"""
@@ -2840,6 +3154,7 @@ class MapEditor:
         if len(self.selected_vertices) >= 2 and not self.road_edit_mode:
             self.road_edit_mode = "extrude"
             self.extrude_preview = None
+            self.begin_transaction("extrude", self.road_transaction_slots())
             self.log("Mode extrusion - Déplacez la souris et cliquez pour confirmer")
             self.update_info()
     
@@ -2849,6 +3164,7 @@ class MapEditor:
             self.road_edit_mode = "grab"
             self.edit_start_pos = self.mouse_pos
             self.original_positions = [self.road_mesh[v_id].copy() for v_id in self.selected_vertices]
+            self.begin_transaction("grab", self.vertex_transaction_slots())
             self.log("Mode déplacement - Déplacez la souris et cliquez pour confirmer")
             self.update_info()
     
@@ -2858,6 +3174,7 @@ class MapEditor:
             self.road_edit_mode = "scale"
             self.edit_start_pos = self.mouse_pos
             self.original_positions = [self.road_mesh[v_id].copy() for v_id in self.selected_vertices]
+            self.begin_transaction("scale", self.vertex_transaction_slots())
             
             # Calculate center of selected vertices
             cx = sum(v["x"] for v in self.original_positions) / len(self.original_positions)
@@ -2873,6 +3190,7 @@ class MapEditor:
             self.road_edit_mode = "rotate"
             self.edit_start_pos = self.mouse_pos
             self.original_positions = [self.road_mesh[v_id].copy() for v_id in self.selected_vertices]
+            self.begin_transaction("rotate", self.vertex_transaction_slots())
             
             # Calculate center of selected vertices
             cx = sum(v["x"] for v in self.original_positions) / len(self.original_positions)
@@ -3029,6 +3347,8 @@ class MapEditor:
                 
                 self.log("Segment extrudé")
         
+        if self.road_edit_mode:
+            self.commit_transaction()
         self.road_edit_mode = None
         self.extrude_preview = None
         self.update_info()
@@ -3036,10 +3356,9 @@ class MapEditor:
     
     def cancel_road_operation(self):
         """Cancel current road operation"""
-        if self.road_edit_mode in ["grab", "scale", "rotate"] and hasattr(self, 'original_positions'):
-            # Restore original positions
-            for i, v_id in enumerate(self.selected_vertices):
-                self.road_mesh[v_id] = self.original_positions[i]
+        if self.road_edit_mode:
+            # Restore the state captured when the operation started
+            self.cancel_transaction()
         
         self.road_edit_mode = None
         self.extrude_preview = None
@@ -3261,44 +3580,59 @@ class MapEditor:
     
     def export_road_segments(self):
         """Convert road mesh to exportable format"""
-        segments = []
-        
-        # Convert each face (quad) to a road segment
-        for face in self.road_faces:
-            if len(face) == 4:
-                # Get the 4 vertices of the quad
-                v0 = self.road_mesh[face[0]]
-                v1 = self.road_mesh[face[1]]
-                v2 = self.road_mesh[face[2]]
-                v3 = self.road_mesh[face[3]]
-                
-                # Calculate center points of the two edges
-                # Assuming v0-v1 and v2-v3 are the parallel edges
-                x1 = (v0["x"] + v1["x"]) / 2
-                y1 = (v0["y"] + v1["y"]) / 2
-                x2 = (v2["x"] + v3["x"]) / 2
-                y2 = (v2["y"] + v3["y"]) / 2
-                
-                # Calculate width (distance between parallel edges)
-                width = math.sqrt((v0["x"] - v1["x"])**2 + (v0["y"] - v1["y"])**2)
-                
-                segments.append({
-                    "x1": x1,
-                    "y1": y1,
-                    "x2": x2,
-                    "y2": y2,
-                    "width": width
-                })
-        
-        return segments
+        return road_segments(self.road_mesh, self.road_faces)
+
+    def after_first_frame(self, callback):
+        """Appeler callback une fois la fenêtre affichée et dessinée une première fois"""
+        def on_expose(event):
+            self.canvas.unbind("<Expose>", binding)
+            # Les redessins en attente passent avant le callback
+            self.root.after_idle(callback)
+
+        binding = self.canvas.bind("<Expose>", on_expose, add="+")
+
+def _delegate(target, name):
+    """Attribut de l'éditeur stocké dans self.<target> (modèle ou vue)"""
+    return property(lambda self: getattr(getattr(self, target), name),
+                    lambda self, value: setattr(getattr(self, target), name, value))
+
+
+for _name in MapModel.ATTRIBUTES:
+    setattr(MapEditor, _name, _delegate("model", _name))
+for _name in ("zoom_level", "pan_x", "pan_y"):
+    setattr(MapEditor, _name, _delegate("viewport", _name))
+
+
+def _parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="KartRush map editor")
+    parser.add_argument("--open", metavar="MAP", help="map JSON loaded in the background after the first frame")
+    parser.add_argument("--first-frame", action="store_true",
+                        help="print the time to the first frame (and to the loaded map with --open), then quit")
+    return parser.parse_args(argv)
+
+
+def _on_first_frame(root, app, args):
+    if args.first_frame:
+        print(f"first frame {(time.perf_counter() - _START) * 1000:.1f} ms", flush=True)
+
+    def loaded():
+        # on_done passe après le redraw de la map chargée
+        print(f"map loaded {(time.perf_counter() - _START) * 1000:.1f} ms", flush=True)
+        root.destroy()
+
+    if args.open:
+        app.open_map(args.open, interactive=False, on_done=loaded if args.first_frame else None)
+    elif args.first_frame:
+        root.destroy()
+
 
 if __name__ == "__main__":
     try:
-        print("Création de la fenêtre Tkinter...")
+        args = _parse_args(sys.argv[1:])
         root = tk.Tk()
-        print("Création de l'application MapEditor...")
         app = MapEditor(root)
-        print("Lancement de la boucle principale...")
+        app.after_first_frame(lambda: _on_first_frame(root, app, args))
         root.mainloop()
     except Exception as e:
         print(f"ERREUR FATALE: {str(e)}")
@@ -0,0 +1,158 @@
+"""Memory-mapped, zero-copy access to binary maps (``.kmap``).
+
+Opening a map only reads its header, block table and JSON skeleton; every
+coordinate block is exposed as a read-only NumPy view over the mapping, so
+pages are loaded by the OS only when a block is actually touched.
+Fixed-point blocks (written with ``fixed_point=True``) are the exception:
+they are divided into a float64 copy when accessed; ``raw`` gives their
+stored integers as a view instead.
+
+Requires NumPy (the plain reader in ``maps.map_binary`` does not).
+"""
+
+import mmap
+import os
+import sys
+import time
+
+import numpy  # noqa: F401  (block_array a besoin de NumPy)
+
+from maps.map_binary import (BLOCK_KEY, RECORDS_KEY, MapBinaryError, block_array, block_raw, decode_map,
+                             read_header)
+
+
+def _block_paths(value, path, out):
+    """Map document paths (``continuousCurves[0].points``) to block references"""
+    if type(value) is dict:
+        if BLOCK_KEY in value:
+            out[path] = (value[BLOCK_KEY], value.get(RECORDS_KEY))
+            return
+        for key, item in value.items():
+            _block_paths(item, f"{path}.{key}" if path else key, out)
+    elif type(value) is list:
+        for i, item in enumerate(value):
+            _block_paths(item, f"{path}[{i}]", out)
+
+
+class MappedMap:
+    """Read-only view of a binary map file backed by mmap"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # mmap refuse un fichier vide avec une ValueError nue
+            if not os.fstat(f.fileno()).st_size:
+                raise MapBinaryError(f"{path} est vide")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.skeleton, self.blocks = read_header(self._mmap)
+            self.paths = {}
+            _block_paths(self.skeleton, "", self.paths)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the mapping; views still referenced keep it alive until collected"""
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def block(self, index):
+        """Return block ``index`` as a (rows, columns) NumPy view, without copying (fixed-point blocks excepted)"""
+        if self._mmap is None:
+            raise MapBinaryError(f"{self.path} est fermé")
+        block = self.blocks[index]
+        return block_array(self._mmap, block).reshape(block.rows, block.columns)
+
+    def raw(self, index):
+        """Return ``(view, scale)`` for block ``index``: the stored values as a
+        (rows, columns) view, always without copying, and their divisor"""
+        if self._mmap is None:
+            raise MapBinaryError(f"{self.path} est fermé")
+        block = self.blocks[index]
+        view, scale = block_raw(self._mmap, block)
+        return view.reshape(block.rows, block.columns), scale
+
+    def array(self, path):
+        """Return the block stored at a document path, e.g. ``racingLine.points``.
+
+        Flat numeric arrays (``collisionGrid.cellStart``...) come back 1-D.
+        """
+        try:
+            index, keys = self.paths[path]
+        except KeyError:
+            raise KeyError(f"aucun bloc à {path!r}") from None
+        view = self.block(index)
+        if keys is None and view.shape[1] == 1:
+            return view.reshape(-1)
+        return view
+
+    def columns(self, path):
+        """Record keys of a record-table block (None for points arrays)"""
+        return self.paths[path][1]
+
+    def get(self, key, default=None):
+        """Top-level value from the skeleton (scalars and small objects)"""
+        return self.skeleton.get(key, default)
+
+    def document(self):
+        """Decode the full JSON document (copies everything; for conversions only)"""
+        return decode_map(self._mmap)
+
+
+def open_map(path):
+    return MappedMap(path)
+
+
+def _main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect binary maps through mmap")
+    parser.add_argument("maps", nargs="*", help=".kmap files to inspect")
+    parser.add_argument("--bench", type=int, nargs="+", metavar="POINTS",
+                        help="time open + one block access on synthetic maps of these sizes")
+    args = parser.parse_args(argv)
+
+    for path in args.maps:
+        with MappedMap(path) as m:
+            points = sum(m.blocks[index].rows for index, keys in m.paths.values() if keys is None)
+            print(f"{path}: {m.get('name')!r}, {len(m.blocks)} blocks, {points} points")
+            for block_path, (index, keys) in m.paths.items():
+                view = m.block(index)
+                label = ",".join(keys) if keys else "x,y" if view.shape[1] == 2 else "value"
+                print(f"  {block_path}: {view.shape[0]} x ({label}) {view.dtype}")
+                del view
+
+    if args.bench:
+        import tempfile
+        from maps.map_binary import write_binary_map
+        from maps.core.writer import synthetic_map
+        for size in args.bench:
+            fd, tmp = tempfile.mkstemp(suffix=".kmap")
+            os.close(fd)
+            try:
+                write_binary_map(synthetic_map(size), tmp)
+                start = time.perf_counter()
+                with MappedMap(tmp) as m:
+                    opened = time.perf_counter()
+                    first = m.array("racingLine.points")[0].copy()
+                    touched = time.perf_counter()
+                print(f"{size} points ({os.path.getsize(tmp) / 1e6:.2f} MB): open {(opened - start) * 1000:.2f} ms, "
+                      f"first block access {(touched - opened) * 1000:.3f} ms, racingLine[0] = {first.tolist()}")
+            finally:
+                os.remove(tmp)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
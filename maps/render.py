@@ -0,0 +1,437 @@
+"""Headless map renderer: thumbnails and previews without the Tk editor.
+
+``render_map`` draws a map document (background, roads, void zones, walls,
+curves, checkpoints, finish line, boosters, items, spawn points and racing
+line) with the editor's colours to a PIL image of any size. Shapes are drawn
+at ``supersample`` times the requested size and downscaled, which smooths
+the lines without an antialiasing pass.
+
+``python -m maps.render`` renders every map of ``maps/`` (or the given
+files) in parallel to PNG or WebP. Like ``maps.compile``, a map is skipped
+when the hash of its source, of its background image, of the options and of
+the renderer sources matches the last render recorded in
+``<out-dir>/.render-cache.json`` and its output still exists. Outputs are
+named after the source files: two sources with the same name (from different
+directories) are rejected before anything is rendered. Requires PIL.
+"""
+
+import glob
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maps.core.spline import sample_curve
+from maps.game_config import KART_SIZE, TRACK_HEIGHT, TRACK_WIDTH
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_PACKAGE_DIR)
+DEFAULT_OUT_DIR = os.path.join("build", "thumbnails")
+CACHE_NAME = ".render-cache.json"
+DEFAULT_WIDTH = 384
+SUPERSAMPLE = 2
+FORMATS = {"png": "PNG", "webp": "WEBP"}
+
+# Calques dans l'ordre de dessin (les mêmes couleurs que MapEditor.redraw)
+LAYERS = ("background", "roads", "voidZones", "walls", "curves", "checkpoints", "finishLine",
+          "boosters", "items", "spawnPoints", "racingLine")
+COLORS = {
+    "road": (90, 90, 90, 255),
+    "voidZone": (255, 107, 53, 110),
+    "voidZoneOutline": (255, 69, 0, 255),
+    "wall": (255, 0, 0, 255),
+    "curve": (255, 165, 0, 255),
+    "checkpoint": (0, 255, 0, 255),
+    "finish": (255, 255, 255, 255),
+    "booster": (243, 156, 18, 255),
+    "item": (26, 188, 156, 255),
+    "spawnPoint": (155, 89, 182, 255),
+    "racingLine": (255, 0, 0, 255),
+}
+# Épaisseurs à l'échelle 1 (en px de la map), comme dans l'éditeur
+WIDTHS = {
+    "voidZoneOutline": 3,
+    "wall": 2,
+    "curve": 3,
+    "checkpoint": 2,
+    "finish": 3,
+    "booster": 3,
+    "item": 3,
+    "spawnPoint": 2,
+    "racingLine": 2,
+}
+
+
+class _Pen:
+    """Map to image coordinates and line widths at one scale"""
+
+    def __init__(self, scale_x, scale_y):
+        self.scale_x = scale_x
+        self.scale_y = scale_y
+        self.scale = min(scale_x, scale_y)
+
+    def point(self, x, y):
+        return x * self.scale_x, y * self.scale_y
+
+    def points(self, points):
+        return [(p[0] * self.scale_x, p[1] * self.scale_y) for p in points]
+
+    def width(self, key):
+        return max(1, round(WIDTHS[key] * self.scale))
+
+
+def _load_background(path, size):
+    """Background image scaled to ``size`` (RGBA), or None when it can not be read"""
+    from PIL import Image
+    try:
+        image = Image.open(path)
+        image.load()
+    except OSError:
+        return None
+    # Réduction entière d'abord (rapide), puis rééchantillonnage à la taille exacte
+    factor = min(image.width // size[0], image.height // size[1])
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image.convert("RGBA").resize(size, Image.Resampling.BILINEAR)
+
+
+def background_path(data, root=_ROOT):
+    """Path of the background image of ``data``, relative keys resolved from the repository root"""
+    key = data.get("background")
+    if not key:
+        return None
+    return key if os.path.isabs(key) else os.path.join(root, key)
+
+
+def _draw_line_object(draw, pen, line, key):
+    draw.line([pen.point(line["x1"], line["y1"]), pen.point(line["x2"], line["y2"])],
+              fill=COLORS[key], width=pen.width(key))
+
+
+def _draw_finish_line(draw, pen, line):
+    _draw_line_object(draw, pen, line, "finish")
+    # Damier le long de la ligne, décalé vers la normale comme dans l'éditeur
+    dx = line["x2"] - line["x1"]
+    dy = line["y2"] - line["y1"]
+    length = math.hypot(dx, dy)
+    squares = int(length / 10)
+    if squares == 0:
+        return
+    nx, ny = -dy / length * 5, dx / length * 5
+    half = 3 * pen.scale
+    for i in range(squares):
+        x, y = pen.point(line["x1"] + dx * i / squares + nx, line["y1"] + dy * i / squares + ny)
+        color = COLORS["finish"] if i % 2 == 0 else (0, 0, 0, 255)
+        draw.rectangle([x - half, y - half, x + half, y + half], fill=color)
+
+
+def _wall_corners(wall):
+    angle = math.radians(wall.get("angle", 0))
+    cos, sin = math.cos(angle), math.sin(angle)
+    cx = wall["x"] + wall["width"] / 2
+    cy = wall["y"] + wall["height"] / 2
+    half_w, half_h = wall["width"] / 2, wall["height"] / 2
+    return [(cx + dx * cos - dy * sin, cy + dx * sin + dy * cos)
+            for dx, dy in ((-half_w, -half_h), (half_w, -half_h), (half_w, half_h), (-half_w, half_h))]
+
+
+def _bezier(points, steps=20):
+    (x0, y0), (x1, y1), (x2, y2) = points
+    return [((1 - t)**2 * x0 + 2 * (1 - t) * t * x1 + t**2 * x2,
+             (1 - t)**2 * y0 + 2 * (1 - t) * t * y1 + t**2 * y2)
+            for t in (i / steps for i in range(steps + 1))]
+
+
+def _draw_spawn_point(draw, pen, spawn):
+    # Triangle orienté dans la direction de départ ; (x, y) est le coin du rectangle 30x20
+    # de l'éditeur et l'angle est en degrés, comme dans le JSON
+    angle = math.radians(spawn.get("angle", 0))
+    x, y = spawn["x"] + 15, spawn["y"] + 10
+    size = KART_SIZE / 2
+    tip = (x + math.cos(angle) * size, y + math.sin(angle) * size)
+    left = (x + math.cos(angle + 2.5) * size, y + math.sin(angle + 2.5) * size)
+    right = (x + math.cos(angle - 2.5) * size, y + math.sin(angle - 2.5) * size)
+    draw.polygon(pen.points([tip, left, right]), outline=COLORS["spawnPoint"], width=pen.width("spawnPoint"))
+
+
+def render_map(data, width=DEFAULT_WIDTH, height=None, layers=None, supersample=SUPERSAMPLE, root=_ROOT):
+    """Render the map document ``data`` to an RGB PIL image.
+
+    ``height`` defaults to the map aspect ratio. ``layers`` is the subset of
+    ``LAYERS`` to draw (all when None). Relative background paths are
+    resolved from ``root``; a missing background leaves the image black.
+    """
+    from PIL import Image, ImageDraw
+
+    layers = LAYERS if layers is None else layers
+    map_width = data.get("width") or TRACK_WIDTH
+    map_height = data.get("height") or TRACK_HEIGHT
+    if height is None:
+        height = max(1, round(width * map_height / map_width))
+    size = (width * supersample, height * supersample)
+    pen = _Pen(size[0] / map_width, size[1] / map_height)
+
+    image = None
+    if "background" in layers:
+        path = background_path(data, root)
+        if path:
+            image = _load_background(path, size)
+    if image is None:
+        image = Image.new("RGBA", size, (0, 0, 0, 255))
+    draw = ImageDraw.Draw(image)
+
+    if "roads" in layers:
+        for road in data.get("roads") or []:
+            draw.line([pen.point(road["x1"], road["y1"]), pen.point(road["x2"], road["y2"])],
+                      fill=COLORS["road"], width=max(1, round(road["width"] * pen.scale)))
+
+    if "voidZones" in layers:
+        zones = [zone["points"] for zone in data.get("voidZones") or [] if len(zone.get("points", [])) >= 3]
+        if zones:
+            # Remplissage semi-transparent : calque séparé puis composition
+            overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+            for points in zones:
+                overlay_draw.polygon(pen.points(points), fill=COLORS["voidZone"])
+            image = Image.alpha_composite(image, overlay)
+            draw = ImageDraw.Draw(image)
+            for points in zones:
+                outline = pen.points(points)
+                draw.line(outline + outline[:1], fill=COLORS["voidZoneOutline"],
+                          width=pen.width("voidZoneOutline"), joint="curve")
+
+    if "walls" in layers:
+        for wall in data.get("walls") or []:
+            draw.polygon(pen.points(_wall_corners(wall)), outline=COLORS["wall"], width=pen.width("wall"))
+
+    if "curves" in layers:
+        for curve in data.get("curves") or []:
+            if len(curve.get("points", [])) == 3:
+                draw.line(pen.points(_bezier(curve["points"])), fill=COLORS["curve"], width=pen.width("curve"),
+                          joint="curve")
+        for curve in data.get("continuousCurves") or []:
+            points = curve.get("points", [])
+            if len(points) >= 2:
+                draw.line(pen.points(sample_curve(points, curve.get("closed", False))), fill=COLORS["curve"],
+                          width=pen.width("curve"), joint="curve")
+
+    if "checkpoints" in layers:
+        for checkpoint in data.get("checkpoints") or []:
+            _draw_line_object(draw, pen, checkpoint, "checkpoint")
+
+    if "finishLine" in layers and data.get("finishLine"):
+        _draw_finish_line(draw, pen, data["finishLine"])
+
+    if "boosters" in layers:
+        for booster in data.get("boosters") or []:
+            _draw_line_object(draw, pen, booster, "booster")
+
+    if "items" in layers:
+        for item in data.get("items") or []:
+            _draw_line_object(draw, pen, item, "item")
+
+    if "spawnPoints" in layers:
+        for spawn in data.get("spawnPoints") or []:
+            _draw_spawn_point(draw, pen, spawn)
+
+    racing_line = data.get("racingLine")
+    if "racingLine" in layers and racing_line and len(racing_line.get("points", [])) >= 2:
+        points = pen.points(racing_line["points"])
+        if racing_line.get("closed", False):
+            points.append(points[0])
+        draw.line(points, fill=COLORS["racingLine"], width=pen.width("racingLine"), joint="curve")
+
+    if supersample > 1:
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    return image.convert("RGB")
+
+
+def renderer_fingerprint():
+    """Hash of the sources that produce the rendered images"""
+    digest = hashlib.sha256()
+    for name in ("render.py", "game_config.py", os.path.join("core", "spline.py")):
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(_PACKAGE_DIR, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def content_hash(raw, background, options, fingerprint):
+    """Hash of a map source, its background image (path or None), the render options and the renderer"""
+    digest = hashlib.sha256(raw)
+    if background and os.path.exists(background):
+        with open(background, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+    digest.update(fingerprint.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def output_path(source, out_dir, image_format):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(out_dir, f"{stem}.{image_format}")
+
+
+def check_destinations(sources, out_dir, image_format):
+    """Raise ValueError when two different sources would be rendered to the same image"""
+    owners = {}
+    for source in sources:
+        destination = output_path(source, out_dir, image_format)
+        owners.setdefault(os.path.normcase(os.path.abspath(destination)), set()).add(os.path.abspath(source))
+    clashes = sorted(paths for paths in owners.values() if len(paths) > 1)
+    if clashes:
+        details = " ; ".join(", ".join(sorted(paths)) for paths in clashes)
+        raise ValueError(f"plusieurs maps portent le même nom et écraseraient la même image : {details}")
+
+
+def render_file(source, destination, width=DEFAULT_WIDTH, height=None, layers=None, image_format="png"):
+    """Render one map file; returns ``(timings, output_size)``.
+
+    ``timings`` maps each stage (``read``, ``render``, ``encode``) to seconds.
+    """
+    from maps.core.loader import parse_map_bytes
+
+    clock = time.perf_counter
+    timings = {}
+    start = clock()
+    with open(source, "rb") as f:
+        data = parse_map_bytes(f.read())
+    timings["read"] = clock() - start
+
+    stage = clock()
+    image = render_map(data, width, height, layers)
+    timings["render"] = clock() - stage
+
+    stage = clock()
+    temporary = destination + ".tmp"
+    if image_format == "webp":
+        image.save(temporary, FORMATS[image_format], quality=85)
+    else:
+        image.save(temporary, FORMATS[image_format])
+    os.replace(temporary, destination)
+    timings["encode"] = clock() - stage
+    return timings, os.path.getsize(destination)
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def default_sources():
+    """Every map document shipped in ``maps/``"""
+    return sorted(glob.glob(os.path.join(_PACKAGE_DIR, "*.json")))
+
+
+def render_maps(sources, out_dir=DEFAULT_OUT_DIR, width=DEFAULT_WIDTH, height=None, layers=None,
+                image_format="png", jobs=None, force=False, report=print):
+    """Render ``sources`` into ``out_dir``; returns ``{source: status}``.
+
+    ``status`` is ``"rendered"``, ``"skipped"`` or the error message. The
+    images are named after the sources' base names: a source listed twice is
+    rendered once, and ValueError is raised before anything is rendered when
+    two different sources share a name.
+    """
+    from maps.core.loader import parse_map_bytes
+
+    # Même fichier listé deux fois (motifs qui se recoupent) : rendu une fois
+    unique = {}
+    for source in sources:
+        unique.setdefault(os.path.normcase(os.path.abspath(source)), source)
+    sources = list(unique.values())
+    check_destinations(sources, out_dir, image_format)
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.join(out_dir, CACHE_NAME)
+    cache = _load_cache(cache_path)
+    fingerprint = renderer_fingerprint()
+    options = {"width": width, "height": height, "layers": list(LAYERS if layers is None else layers),
+               "format": image_format}
+
+    pending = {}
+    results = {}
+    for source in sources:
+        destination = output_path(source, out_dir, image_format)
+        key = os.path.abspath(destination)
+        try:
+            with open(source, "rb") as f:
+                raw = f.read()
+            background = background_path(parse_map_bytes(raw))
+        except (OSError, ValueError) as e:
+            results[source] = f"{type(e).__name__}: {e}"
+            report(f"{source}: ERROR {results[source]}")
+            continue
+        digest = content_hash(raw, background, options, fingerprint)
+        entry = cache.get(key)
+        if not force and entry and entry.get("hash") == digest and os.path.exists(destination):
+            results[source] = "skipped"
+            report(f"{source}: unchanged, skipped")
+            continue
+        pending[source] = (key, destination, digest)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(render_file, source, destination, width, height, layers, image_format): source
+                       for source, (_key, destination, _digest) in pending.items()}
+            for future in as_completed(futures):
+                source = futures[future]
+                key, destination, digest = pending[source]
+                try:
+                    timings, size = future.result()
+                except Exception as e:
+                    results[source] = f"{type(e).__name__}: {e}"
+                    cache.pop(key, None)
+                    report(f"{source}: ERROR {results[source]}")
+                    continue
+                results[source] = "rendered"
+                cache[key] = {"hash": digest, "source": os.path.abspath(source)}
+                report(f"{source} -> {destination} ({size / 1e3:.0f} kB) in {sum(timings.values()) * 1000:.0f} ms: "
+                       + ", ".join(f"{stage} {seconds * 1000:.1f}" for stage, seconds in timings.items()) + " (ms)")
+        _save_cache(cache_path, cache)
+    return results
+
+
+def _main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m maps.render",
+                                     description="Render map thumbnails and previews, in parallel")
+    parser.add_argument("maps", nargs="*", help="map files (default: every map of maps/)")
+    parser.add_argument("-o", "--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--format", choices=tuple(FORMATS), default="png")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("--height", type=int, default=None, help="default: keep the map aspect ratio")
+    parser.add_argument("--hide", action="append", default=[], choices=LAYERS, metavar="LAYER",
+                        help=f"do not draw a layer ({', '.join(LAYERS)})")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the render cache")
+    args = parser.parse_args(argv)
+
+    layers = tuple(layer for layer in LAYERS if layer not in args.hide)
+    start = time.perf_counter()
+    try:
+        results = render_maps(args.maps or default_sources(), args.out_dir, args.width, args.height, layers,
+                              args.format, args.jobs, args.force)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    rendered = sum(1 for status in results.values() if status == "rendered")
+    skipped = sum(1 for status in results.values() if status == "skipped")
+    failed = len(results) - rendered - skipped
+    print(f"{rendered} rendered, {skipped} skipped, {failed} failed in {time.perf_counter() - start:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,1008 @@
+"""Reference simulator of the server's per-tick kart logic: ``python -m maps.simulate``.
+
+Python port of what ``Room.update`` does for every racing player on every
+tick, in the same order:
+
+- ``Player.update``: inputs (``accelerate``/``brake``/``turnLeft``/
+  ``turnRight``), friction, speed limits, movement, track bounds, and the
+  drift of a kart falling into a void zone,
+- ``Room.checkWallCollisions`` against ``continuousCurves``: push-out, crash
+  bounce, scrape along the wall and damage through ``takeDamage`` (grace
+  period, invulnerability, 200 ms cooldown),
+- ``Room.checkBoosterCollisions`` and ``activateBoost``,
+- ``Room.checkVoidZoneCollisions`` (7 of the 9 sample points inside a closed
+  zone), the 1.5 s fall, ``die`` and the respawn at the checkpoint positions
+  saved by the player,
+- ``Room.checkRaceProgress``: finish line and next checkpoint crossings, their
+  direction and 1 s cooldowns, laps and finish,
+- ``Room.calculateTrackProgress`` on the preprocessed racing line.
+
+The state of N karts is held in NumPy arrays and every step is vectorized
+over the karts; the server's inner loops (wall segments, zone edges,
+racing-line segments) become array operations. Time is simulated: a step is
+one tick of ``1 / TICK_RATE`` s and the race starts at tick 0, after the
+countdown.
+
+Not simulated: item boxes and items (stun, poison, freeze...), drift,
+kart-to-kart collisions.
+
+Bots press ``up`` and steer towards waypoints spaced along the racing line,
+or through the checkpoints (near their middle, away from void zones) when the
+map has none. A run reports
+ticks per second, laps, crashes, falls and deaths for each map. With
+``--check-bakes``, every position and movement the bots went through is
+replayed against the compiled acceleration structures (``collisionGrid``,
+``sdf``, ``voidZoneBitmap``, ``triggerGrid`` and line boxes,
+``progressGrid``) and compared with the brute-force answer; every pose of
+the ``respawnTable`` goes through the server's wall, void-zone and line
+tests.
+Requires NumPy.
+"""
+
+import copy
+import math
+import sys
+import time
+
+import numpy as np
+
+from maps.bakes.collision_grid import query_collision_grid, wall_segments
+from maps.bakes.racing_line import grid_progress, preprocess_racing_line, racing_segments, resample_points
+from maps.bakes.void_zones import KART_RADIUS, MIN_POINTS_INSIDE, SAMPLE_OFFSETS
+from maps.core.model import DEFAULT_RACE_SETTINGS
+from maps.game_config import (ACCELERATION, BOOSTER_REACH, FRICTION, KART_SIZE, MAX_SPEED, TICK_RATE,
+                              TRACK_HEIGHT, TRACK_WIDTH, TURN_SPEED, WALL_CLEARANCE)
+
+DEFAULT_BOTS = 8
+DEFAULT_TICKS = 60 * TICK_RATE
+TICK_MS = 1000 / TICK_RATE
+
+# Durées du serveur, en ms
+FALL_DURATION = 1500
+CRASH_RESPAWN_DELAY = 3000
+FALL_RESPAWN_DELAY = 2000
+INVULNERABILITY = 2000
+GRACE_PERIOD = 2000
+DAMAGE_COOLDOWN = 200
+LINE_COOLDOWN = 1000
+BOOST_DURATION = 1500
+BOOST_COOLDOWN = 500
+MAX_HP = 100
+_OFFSET_X = np.array([ox for ox, _oy in SAMPLE_OFFSETS])
+_OFFSET_Y = np.array([oy for _ox, oy in SAMPLE_OFFSETS])
+
+# Pilotage des bots
+WAYPOINT_SPACING = 40
+LOOKAHEAD = (40, 70)
+STEER_DEADBAND = 0.05
+# Positions essayées sur un checkpoint, du milieu vers les extrémités
+GATE_POSITIONS = (0.5, 0.4, 0.6, 0.3, 0.7, 0.2, 0.8)
+# Trajet entre checkpoints : pas de vérification, détours latéraux essayés
+PATH_STEP = 8
+DETOUR_STEP = 10
+DETOUR_REACH = 200
+DETOUR_DEPTH = 3
+# Un bot presque arrêté pendant STUCK_TICKS recule pendant REVERSE_TICKS
+STUCK_TICKS = TICK_RATE * 3 // 2
+REVERSE_TICKS = TICK_RATE
+# Un bot qui a parcouru moins de STUCK_DISTANCE px en STUCK_WINDOW ticks est signalé
+STUCK_WINDOW = 2 * TICK_RATE
+STUCK_DISTANCE = 20
+# check_bakes : rayon de dispersion des positions autour des trajectoires
+TRACE_SPREAD = 60
+
+
+# --- Tests du serveur, vectorisés sur les karts ---
+
+def segments_intersect(x1, y1, x2, y2, x3, y3, x4, y4):
+    """Room.lineSegmentsIntersect over broadcastable arrays"""
+    denom = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denom
+        u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denom
+    return (np.abs(denom) >= 0.0001) & (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1)
+
+
+def wall_arrays(continuous_curves):
+    """Every wall segment as flat arrays, in checkWallCollisions order.
+
+    Returns ``(curves, starts, segments, x1, y1, dx, dy, length_sq)``: the
+    curve index of each group, the offset of each group in the arrays, and
+    per segment its index in the curve; zero-length segments are left out
+    like the server skips them.
+    """
+    rows = [(ci, si, x1, y1, x2 - x1, y2 - y1) for ci, si, x1, y1, x2, y2 in wall_segments(continuous_curves)]
+    table = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    curve = table[:, 0].astype(int)
+    starts = np.flatnonzero(np.r_[True, curve[1:] != curve[:-1]]) if len(curve) else np.zeros(0, dtype=int)
+    dx, dy = table[:, 4], table[:, 5]
+    return curve[starts], starts, table[:, 1].astype(int), table[:, 2], table[:, 3], dx, dy, dx * dx + dy * dy
+
+
+def first_wall_hits(walls, kx, ky, min_dist_sq=WALL_CLEARANCE * WALL_CLEARANCE):
+    """First segment of each curve closer than the clearance to each position.
+
+    This is the loop of checkWallCollisions with its per-curve ``break``, for
+    positions that do not move between curves. Returns ``(first, t)``:
+    ``first[k, c]`` is the index into the flat arrays of the segment hit on
+    the ``c``-th curve group (-1 without hit), ``t`` the clamped projections
+    of every position on every segment.
+    """
+    _curves, starts, _segments, x1, y1, dx, dy, length_sq = walls
+    px = kx[:, np.newaxis]
+    py = ky[:, np.newaxis]
+    t = np.clip(((px - x1) * dx + (py - y1) * dy) / length_sq, 0, 1)
+    ex = px - (x1 + t * dx)
+    ey = py - (y1 + t * dy)
+    count = len(x1)
+    index = np.where(ex * ex + ey * ey < min_dist_sq, np.arange(count), count)
+    first = np.minimum.reduceat(index, starts, axis=1) if count else np.zeros((len(kx), 0), dtype=int)
+    return np.where(first < count, first, -1), t
+
+
+def brute_force_hits_array(walls, kx, ky, min_dist_sq=WALL_CLEARANCE * WALL_CLEARANCE):
+    """``brute_force_hits`` for arrays of positions: one list of ``(curve, segment)`` per position"""
+    curves, _starts, segments = walls[:3]
+    first, _t = first_wall_hits(walls, kx, ky, min_dist_sq)
+    return [[(int(curves[c]), int(segments[f])) for c, f in enumerate(row) if f >= 0] for row in first]
+
+
+def zone_edges(void_zones):
+    """Edges of the closed void zones as flat arrays, in server order.
+
+    Returns ``(zones, starts, xi, yi, xj, yj)``: the zone index of each group
+    of edges and the offset of each group. Horizontal edges are left out,
+    ``(yi > y) !== (yj > y)`` is always false for them, and so are zones
+    left without edges (they contain no point).
+    """
+    zones, starts, edges = [], [], []
+    count = 0
+    for zone_id, zone in enumerate(void_zones):
+        if not zone.get("closed", False):
+            continue
+        points = np.array(zone.get("points", []), dtype=np.float64).reshape(-1, 2)
+        previous = np.roll(points, 1, axis=0)
+        keep = points[:, 1] != previous[:, 1]
+        if not keep.any():
+            continue
+        zones.append(zone_id)
+        starts.append(count)
+        edges.append(np.column_stack((points[keep], previous[keep])))
+        count += int(keep.sum())
+    table = np.concatenate(edges) if edges else np.zeros((0, 4))
+    return np.array(zones, dtype=int), np.array(starts, dtype=int), table[:, 0], table[:, 1], table[:, 2], table[:, 3]
+
+
+def falling_zones(edges, x, y):
+    """checkVoidZoneCollision for arrays of positions: index of the zone, -1 when none.
+
+    ``edges`` comes from zone_edges; isPointInPolygon's even-odd toggles
+    become a parity count over the edges of each zone.
+    """
+    zones, starts, xi, yi, xj, yj = edges
+    if not len(zones):
+        return np.full(len(x), -1)
+    sample_x = (x[:, np.newaxis] + KART_RADIUS * _OFFSET_X)[..., np.newaxis]
+    sample_y = (y[:, np.newaxis] + KART_RADIUS * _OFFSET_Y)[..., np.newaxis]
+    crossings = ((yi > sample_y) != (yj > sample_y)) & (sample_x < (xj - xi) * (sample_y - yi) / (yj - yi) + xi)
+    inside = np.add.reduceat(crossings, starts, axis=2) % 2 == 1
+    falling = inside.sum(axis=1) >= MIN_POINTS_INSIDE
+    return np.where(falling.any(axis=1), zones[falling.argmax(axis=1)], -1)
+
+
+def racing_arrays(points, closed):
+    """``(x1, y1, dx, dy, length_sq)`` arrays of the racing-line segments"""
+    segments = np.array(racing_segments(points, closed), dtype=np.float64).reshape(-1, 4)
+    dx = segments[:, 2] - segments[:, 0]
+    dy = segments[:, 3] - segments[:, 1]
+    return segments[:, 0], segments[:, 1], dx, dy, dx * dx + dy * dy
+
+
+def closest_racing_segments(segments, x, y):
+    """The segment scan of calculateTrackProgress: ``(segment, t)`` for each position"""
+    x1, y1, dx, dy, length_sq = segments
+    px = x[:, np.newaxis]
+    py = y[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq == 0, 0.0, np.clip(((px - x1) * dx + (py - y1) * dy) / length_sq, 0, 1))
+    ex = x1 + t * dx - px
+    ey = y1 + t * dy - py
+    segment = np.argmin(np.sqrt(ex * ex + ey * ey), axis=1)
+    return segment, t[np.arange(len(x)), segment]
+
+
+def _point_to_line_distance(px, py, x1, y1, x2, y2):
+    """Room.pointToLineDistance and the ``t`` of projectPointOnLine, broadcast over lines"""
+    c = x2 - x1
+    d = y2 - y1
+    len_sq = c * c + d * d
+    with np.errstate(divide="ignore", invalid="ignore"):
+        param = np.where(len_sq == 0, 0.0, ((px - x1) * c + (py - y1) * d) / len_sq)
+    degenerate = len_sq == 0
+    xx = np.where(degenerate | (param < 0), x1, np.where(param > 1, x2, x1 + param * c))
+    yy = np.where(degenerate | (param < 0), y1, np.where(param > 1, y2, y1 + param * d))
+    return np.sqrt((px - xx) ** 2 + (py - yy) ** 2), param
+
+
+def _normalize_angle(angle):
+    """The server's ``while`` loops bringing an angle into (-pi, pi]"""
+    turn = 2 * math.pi
+    angle = np.where(angle > math.pi, angle - turn * np.ceil((angle - math.pi) / turn), angle)
+    return np.where(angle < -math.pi, angle + turn * np.ceil((-math.pi - angle) / turn), angle)
+
+
+def _midpoint(line):
+    return [(line["x1"] + line["x2"]) / 2, (line["y1"] + line["y2"]) / 2]
+
+
+def _blocked(walls, edges, x, y):
+    """Positions where a bot would touch a wall or come near a void zone"""
+    # Marge : un kart deux fois plus large que celui de checkVoidZoneCollision
+    px = (x[:, np.newaxis] + 2 * KART_RADIUS * _OFFSET_X).ravel()
+    py = (y[:, np.newaxis] + 2 * KART_RADIUS * _OFFSET_Y).ravel()
+    in_void = (falling_zones(edges, px, py) >= 0).reshape(len(x), -1).any(axis=1)
+    first, _t = first_wall_hits(walls, x, y)
+    return in_void | (first >= 0).any(axis=1)
+
+
+def _path_blocked(walls, edges, a, b):
+    count = max(2, int(math.hypot(b[0] - a[0], b[1] - a[1]) / PATH_STEP) + 1)
+    t = np.linspace(0, 1, count)
+    return _blocked(walls, edges, a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])).any()
+
+
+def _detour(walls, edges, a, b, depth=DETOUR_DEPTH):
+    """Points to insert between ``a`` and ``b`` so that the straight legs stay clear"""
+    if depth == 0 or not _path_blocked(walls, edges, a, b):
+        return []
+    length = math.hypot(b[0] - a[0], b[1] - a[1]) or 1.0
+    nx, ny = (a[1] - b[1]) / length, (b[0] - a[0]) / length
+    mx, my = (a[0] + b[0]) / 2, (a[1] + b[1]) / 2
+    offsets = np.arange(DETOUR_STEP, DETOUR_REACH + DETOUR_STEP, DETOUR_STEP)
+    offsets = np.ravel(np.column_stack((offsets, -offsets)))
+    candidates = np.column_stack((mx + offsets * nx, my + offsets * ny))
+    free = ~_blocked(walls, edges, candidates[:, 0], candidates[:, 1])
+    for point in candidates[free]:
+        point = list(point)
+        if not _path_blocked(walls, edges, a, point) and not _path_blocked(walls, edges, point, b):
+            return [point]
+    if not free.any():
+        return []
+    point = list(candidates[free][0])
+    return _detour(walls, edges, a, point, depth - 1) + [point] + _detour(walls, edges, point, b, depth - 1)
+
+
+def _gate_point(gate, walls, edges):
+    """Point of a gate closest to its middle where a bot is clear of walls and void zones"""
+    x1, y1, x2, y2 = gate["x1"], gate["y1"], gate["x2"], gate["y2"]
+    ts = np.array(GATE_POSITIONS)
+    clear = ~_blocked(walls, edges, x1 + ts * (x2 - x1), y1 + ts * (y2 - y1))
+    t = ts[clear.argmax()] if clear.any() else 0.5
+    return [x1 + t * (x2 - x1), y1 + t * (y2 - y1)]
+
+
+def unsafe_respawn_poses(walls, edges, gate, x, y, samples=20):
+    """Poses of one checkpoint that the server would not respawn cleanly at.
+
+    Checked with the server's own tests, not the baker's: a wall closer than
+    WALL_CLEARANCE (checkWallCollisions), 7 of 9 points in a void zone
+    (checkVoidZoneCollisions), or a wall crossing (lineSegmentsIntersect)
+    between the pose and every one of ``samples + 1`` points of the gate.
+    Returns a boolean array.
+    """
+    first, _t = first_wall_hits(walls, x, y)
+    unsafe = (first >= 0).any(axis=1) | (falling_zones(edges, x, y) >= 0)
+    _curves, _starts, _segments, x1, y1, dx, dy, _length_sq = walls
+    t = np.linspace(0, 1, samples + 1)[:, np.newaxis, np.newaxis]
+    gx = gate["x1"] + t * (gate["x2"] - gate["x1"])
+    gy = gate["y1"] + t * (gate["y2"] - gate["y1"])
+    # (points de la porte, poses, murs)
+    crossed = segments_intersect(gx, gy, x[:, np.newaxis], y[:, np.newaxis], x1, y1, x1 + dx, y1 + dy)
+    hidden = crossed.any(axis=2).all(axis=0)
+    return unsafe | hidden
+
+
+def bot_waypoints(data):
+    """Loop of points the bots drive through.
+
+    The racing line when the map has one, otherwise the finish line and the
+    checkpoints in order, each crossed near its middle, with detours added
+    where the straight leg between two gates would touch a wall or a void
+    zone; resampled every WAYPOINT_SPACING px. The loop is always closed: the
+    server may treat a racing line as open (for its progress), the race goes
+    round.
+    """
+    racing_line = data.get("racingLine")
+    if racing_line and len(racing_line.get("points", [])) >= 2:
+        points, _closed, _distances, _total = preprocess_racing_line(racing_line)
+        waypoints, _spacing = resample_points(points, True, WAYPOINT_SPACING)
+        return np.array(waypoints, dtype=np.float64)
+    gates = ([data["finishLine"]] if data.get("finishLine") else []) + list(data.get("checkpoints") or [])
+    if not gates:
+        raise ValueError("ni ligne de course ni checkpoints : les bots n'ont pas de trajet")
+    walls = wall_arrays(data.get("continuousCurves", []))
+    edges = zone_edges(data.get("voidZones") or [])
+    points = [_gate_point(gate, walls, edges) for gate in gates]
+    path = []
+    for k, point in enumerate(points):
+        path.append(point)
+        path += _detour(walls, edges, point, points[(k + 1) % len(points)])
+    waypoints, _spacing = resample_points(path, True, WAYPOINT_SPACING)
+    return np.array(waypoints, dtype=np.float64)
+
+
+class Simulation:
+    """N bot karts on a map document, stepped one server tick at a time.
+
+    Kart state is public: ``x``, ``y``, ``angle``, ``speed``, ``lap``,
+    ``next_checkpoint``, ``finished``, ``dead``, ``falling``, ``progress``...
+    are arrays of length ``bots``. Race events are appended to ``events`` as
+    ``(tick, kind, bot, x, y, detail)`` tuples. When ``record`` is true, the
+    movement of every racing kart is kept in ``trace`` for check_bakes.
+    """
+
+    def __init__(self, data, bots=DEFAULT_BOTS, seed=0, record=False):
+        spawn_points = data.get("spawnPoints") or []
+        if not spawn_points:
+            raise ValueError("la map n'a pas de point de départ")
+        self.data = data
+        self.bots = bots
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        self.laps = (data.get("raceSettings") or DEFAULT_RACE_SETTINGS).get("laps", DEFAULT_RACE_SETTINGS["laps"])
+
+        self.walls = wall_arrays(data.get("continuousCurves", []))
+        self.zone_edges = zone_edges(data.get("voidZones") or [])
+        boosters = data.get("boosters") or []
+        self.boosters = boosters
+        self.booster_lines = np.array([[b["x1"], b["y1"], b["x2"], b["y2"]] for b in boosters],
+                                      dtype=np.float64).reshape(-1, 4).T
+        self.finish_line = data.get("finishLine")
+        checkpoints = data.get("checkpoints") or []
+        self.checkpoints = np.array([[c["x1"], c["y1"], c["x2"], c["y2"]] for c in checkpoints],
+                                    dtype=np.float64).reshape(-1, 4)
+        self.racing_line = None
+        racing_line = data.get("racingLine")
+        if racing_line and len(racing_line.get("points", [])) >= 2:
+            points, closed, distances, total = preprocess_racing_line(racing_line)
+            self.racing_line = (racing_arrays(points, closed), np.array(distances), total)
+
+        n = bots
+        count = len(self.checkpoints)
+        # startGame : les joueurs sont placés sur les points de départ, angle en degrés
+        self.spawn_points = np.array([[p["x"], p["y"], p.get("angle", 0)] for p in spawn_points], dtype=np.float64)
+        start = self.spawn_points[np.arange(n) % len(self.spawn_points)]
+        self.x = start[:, 0].copy()
+        self.y = start[:, 1].copy()
+        self.angle = np.radians(start[:, 2])
+        self.speed = np.zeros(n)
+        self.last_x = self.x.copy()
+        self.last_y = self.y.copy()
+        self.hp = np.full(n, float(MAX_HP))
+        self.dead = np.zeros(n, dtype=bool)
+        self.respawn_time = np.zeros(n)
+        self.invulnerable_until = np.zeros(n)
+        self.last_damage_time = np.full(n, -np.inf)
+        self.falling = np.zeros(n, dtype=bool)
+        self.fall_start = np.zeros(n)
+        self.fall_vx = np.zeros(n)
+        self.fall_vy = np.zeros(n)
+        self.boosting = np.zeros(n, dtype=bool)
+        self.boost_end = np.zeros(n)
+        self.boost_cooldown = np.zeros(n)
+        self.last_booster = np.full(n, -1)
+
+        self.lap = np.zeros(n, dtype=int)
+        self.next_checkpoint = np.zeros(n, dtype=int)
+        self.passed_start = np.zeros(n, dtype=bool)
+        self.finished = np.zeros(n, dtype=bool)
+        self.finish_time = np.full(n, np.nan)
+        self.wrong_way_crossing = np.zeros(n, dtype=bool)
+        self.going_backwards = np.zeros(n, dtype=bool)
+        # Le serveur compare les cooldowns à Date.now() : le premier passage n'est jamais bloqué
+        self.last_finish_time = np.full(n, -np.inf)
+        self.last_checkpoint_time = np.full((n, count), -np.inf)
+        self.last_validated = np.zeros(n, dtype=int)
+        self.checkpoint_poses = np.zeros((n, count, 3))
+        self.checkpoint_saved = np.zeros((n, count), dtype=bool)
+        self.progress = np.zeros(n)
+        self.segment = np.zeros(n, dtype=int)
+        self.segment_t = np.zeros(n)
+
+        self.up = np.zeros(n, dtype=bool)
+        self.down = np.zeros(n, dtype=bool)
+        self.left = np.zeros(n, dtype=bool)
+        self.right = np.zeros(n, dtype=bool)
+
+        self.crashes = np.zeros(n, dtype=int)
+        self.scrapes = np.zeros(n, dtype=int)
+        self.falls = np.zeros(n, dtype=int)
+        self.deaths = np.zeros(n, dtype=int)
+        self.events = []
+        self.trace = [] if record else None
+
+        self.waypoints = bot_waypoints(data)
+        self.lookahead = self.rng.uniform(*LOOKAHEAD, n)
+        self.target = self._nearest_waypoints(np.ones(n, dtype=bool), np.zeros(n, dtype=int))
+        self.slow_ticks = np.zeros(n, dtype=int)
+        self.reverse_until = np.zeros(n, dtype=int)
+        self.anchor_x = self.x.copy()
+        self.anchor_y = self.y.copy()
+        self.stuck = np.zeros(n, dtype=int)
+
+    def _event(self, kind, mask, detail=None):
+        if not mask.any():
+            return
+        for k in np.flatnonzero(mask):
+            self.events.append((self.tick, kind, int(k), float(self.x[k]), float(self.y[k]),
+                                None if detail is None else int(detail[k])))
+
+    # --- Bots ---
+
+    def _nearest_waypoints(self, mask, target):
+        """Waypoint after the closest one, for the karts of ``mask``"""
+        ex = self.waypoints[:, 0] - self.x[mask, np.newaxis]
+        ey = self.waypoints[:, 1] - self.y[mask, np.newaxis]
+        nearest = np.argmin(ex * ex + ey * ey, axis=1)
+        target = target.copy()
+        target[mask] = self._advance(nearest)
+        return target
+
+    def _advance(self, target):
+        return (target + 1) % len(self.waypoints)
+
+    def _drive(self):
+        """Set the inputs of every bot for this tick"""
+        for _ in range(8):
+            wx, wy = self.waypoints[self.target, 0], self.waypoints[self.target, 1]
+            after = self._advance(self.target)
+            distance = np.hypot(wx - self.x, wy - self.y)
+            # Waypoint atteint, ou dépassé (le suivant est plus proche)
+            reached = (distance < self.lookahead) | (
+                np.hypot(self.waypoints[after, 0] - self.x, self.waypoints[after, 1] - self.y) < distance)
+            if not reached.any():
+                break
+            self.target = np.where(reached, after, self.target)
+
+        wx, wy = self.waypoints[self.target, 0], self.waypoints[self.target, 1]
+        diff = _normalize_angle(np.arctan2(wy - self.y, wx - self.x) - self.angle)
+        racing = ~self.finished & ~self.dead & ~self.falling
+        self.slow_ticks = np.where(racing & (np.abs(self.speed) < 0.5), self.slow_ticks + 1, 0)
+        starts = self.slow_ticks >= STUCK_TICKS
+        self.reverse_until = np.where(starts, self.tick + REVERSE_TICKS, self.reverse_until)
+        self.slow_ticks[starts] = 0
+        reverse = self.tick < self.reverse_until
+
+        # En marche arrière, tourner à gauche fait pivoter le nez vers la droite
+        self.up = ~reverse & ((np.abs(diff) < 1.5) | (self.speed < 1.5))
+        self.down = reverse
+        self.left = np.where(reverse, diff > STEER_DEADBAND, diff < -STEER_DEADBAND)
+        self.right = np.where(reverse, diff < -STEER_DEADBAND, diff > STEER_DEADBAND)
+
+    # --- Room.update ---
+
+    def step(self):
+        """Advance the race by one server tick"""
+        self.tick += 1
+        now = self.tick * TICK_MS
+        self._drive()
+        self._respawn(now)
+        active = ~self.finished & ~self.dead
+        self._update(active, now)
+        self._wall_collisions(active & ~self.dead, now)
+        self._booster_collisions(active, now)
+        self._void_zone_collisions(active & ~self.falling & ~self.dead, now)
+        self._race_progress(active, now)
+        if self.racing_line is not None:
+            self._track_progress(~self.finished)
+        if self.trace is not None:
+            self.trace.append((self.last_x[active], self.last_y[active], self.x[active], self.y[active]))
+        if self.tick % STUCK_WINDOW == 0:
+            stuck = (~self.finished & ~self.dead & ~self.falling
+                     & (np.hypot(self.x - self.anchor_x, self.y - self.anchor_y) < STUCK_DISTANCE))
+            self.stuck += stuck
+            self._event("stuck", stuck)
+            self.anchor_x = self.x.copy()
+            self.anchor_y = self.y.copy()
+
+    def run(self, ticks):
+        """Step ``ticks`` times or until every kart finished; returns the number of ticks run"""
+        for done in range(ticks):
+            if self.finished.all():
+                return done
+            self.step()
+        return ticks
+
+    def _respawn(self, now):
+        respawning = self.dead & (now >= self.respawn_time)
+        if not respawning.any():
+            return
+        count = len(self.checkpoints)
+        validated = self.last_validated
+        rows = np.arange(self.bots)
+        spawn = self.spawn_points[rows % len(self.spawn_points)]
+        # Player.respawn reprend l'angle tel quel : en radians pour une position de
+        # checkpoint, en degrés (non converti par le serveur) pour un point de départ
+        x, y, angle = spawn[:, 0], spawn[:, 1], spawn[:, 2]
+        if count:
+            # Avant-dernier checkpoint validé, sinon le seul validé, sinon le point de départ
+            before = np.clip(validated - 2, 0, count - 1)
+            second_last = (validated > 1) & self.checkpoint_saved[rows, before]
+            only = ~second_last & (validated == 1) & self.checkpoint_saved[:, 0]
+            pose = np.where(second_last[:, np.newaxis], self.checkpoint_poses[rows, before],
+                            self.checkpoint_poses[:, 0])
+            saved = second_last | only
+            x = np.where(saved, pose[:, 0], x)
+            y = np.where(saved, pose[:, 1], y)
+            angle = np.where(saved, pose[:, 2], angle)
+
+        m = respawning
+        self.x[m] = x[m]
+        self.y[m] = y[m]
+        self.last_x[m] = x[m]
+        self.last_y[m] = y[m]
+        self.angle[m] = angle[m]
+        self.speed[m] = 0
+        self.hp[m] = MAX_HP
+        self.dead[m] = False
+        self.invulnerable_until[m] = now + INVULNERABILITY
+        self.boosting[m] = False
+        self.wrong_way_crossing[m] = False
+        self.going_backwards[m] = False
+        racing = m & (validated > 0) & ~self.passed_start
+        self.passed_start[racing] = True
+        self.lap[racing] = 0
+        self.target = self._nearest_waypoints(m, self.target)
+        self._event("respawn", m)
+
+    def _die(self, mask, now, delay):
+        self.dead |= mask
+        self.speed[mask] = 0
+        self.respawn_time[mask] = now + delay
+        self.boosting[mask] = False
+        self.deaths += mask
+        self._event("death", mask)
+
+    def _update(self, active, now):
+        """Player.update for the karts of ``active``"""
+        dt = 1 / TICK_RATE
+        falling = active & self.falling
+        if falling.any():
+            velocity = np.hypot(self.fall_vx, self.fall_vy)
+            drift = 3 + (velocity / MAX_SPEED) * 7
+            self.x = np.where(falling, self.x + self.fall_vx * dt * drift, self.x)
+            self.y = np.where(falling, self.y + self.fall_vy * dt * drift, self.y)
+            fallen = falling & (now - self.fall_start >= FALL_DURATION)
+            self.hp[fallen] = 0
+            self.falling[fallen] = False
+            self._die(fallen, now, FALL_RESPAWN_DELAY)
+
+        m = active & ~falling
+        self.last_x = np.where(m, self.x, self.last_x)
+        self.last_y = np.where(m, self.y, self.last_y)
+        self.boosting &= ~(m & (now > self.boost_end))
+        self.boost_cooldown = np.where(m & (self.boost_cooldown > 0), self.boost_cooldown - dt * 1000,
+                                       self.boost_cooldown)
+
+        up = m & self.up
+        down = m & self.down
+        speed = self.speed
+        # accelerate() : boostLevel reste à 0 pour un booster, donc multiplicateur par défaut
+        max_speed = np.where(self.boosting, MAX_SPEED * 1.15, MAX_SPEED)
+        acceleration = np.where(self.boosting, ACCELERATION * 1.5, ACCELERATION)
+        accelerated = np.minimum(speed + acceleration, max_speed)
+        accelerated = np.where(accelerated > max_speed * 0.98, max_speed, accelerated)
+        speed = np.where(up, accelerated, speed)
+        braked = np.where(speed > 0, np.maximum(0, speed - ACCELERATION * 2),
+                          np.maximum(speed - ACCELERATION, -MAX_SPEED * 0.5))
+        speed = np.where(down, braked, speed)
+        turn = TURN_SPEED * (speed / MAX_SPEED) * np.where(self.boosting, 0.6, 1.0)
+        can_turn = np.abs(speed) > 0.1
+        self.angle = np.where(m & self.left & can_turn, self.angle - turn, self.angle)
+        self.angle = np.where(m & self.right & can_turn, self.angle + turn, self.angle)
+
+        friction = np.where((up & (speed > 0)) | (down & (speed < 0)), FRICTION + 0.01, FRICTION - 0.02)
+        speed = np.where(m, speed * friction, speed)
+        # Le niveau 0 des boosters ne relève pas la limite de vitesse
+        speed = np.where(m, np.clip(speed, -MAX_SPEED * 0.5, MAX_SPEED), speed)
+        speed = np.where(m & (np.abs(speed) < 0.1), 0.0, speed)
+        self.speed = speed
+
+        self.x = np.where(m, self.x + np.cos(self.angle) * speed, self.x)
+        self.y = np.where(m, self.y + np.sin(self.angle) * speed, self.y)
+        self.x = np.where(m, np.clip(self.x, KART_SIZE, TRACK_WIDTH - KART_SIZE), self.x)
+        self.y = np.where(m, np.clip(self.y, KART_SIZE, TRACK_HEIGHT - KART_SIZE), self.y)
+
+    def _take_damage(self, rows, damage, now):
+        """takeDamage for the karts ``rows``"""
+        if now < GRACE_PERIOD:
+            return
+        hurt = ((damage > 0) & (self.invulnerable_until[rows] <= now) & ~self.dead[rows]
+                & (now - self.last_damage_time[rows] >= DAMAGE_COOLDOWN))
+        rows = rows[hurt]
+        self.hp[rows] = np.maximum(0, self.hp[rows] - damage[hurt])
+        self.last_damage_time[rows] = now
+        killed = np.zeros(self.bots, dtype=bool)
+        killed[rows[self.hp[rows] <= 0]] = True
+        if killed.any():
+            self._die(killed, now, CRASH_RESPAWN_DELAY)
+
+    def _wall_collisions(self, mask, now):
+        """Room.checkWallCollisions for the karts of ``mask``"""
+        rows = np.flatnonzero(mask)
+        if not len(rows) or not len(self.walls[0]):
+            return
+        # Le serveur teste la position du début de l'appel contre toutes les courbes :
+        # les segments touchés sont connus d'avance, seule la réponse est séquentielle
+        kx = self.x[rows]
+        ky = self.y[rows]
+        min_dist = WALL_CLEARANCE
+        min_dist_sq = min_dist * min_dist
+        first, t_all = first_wall_hits(self.walls, kx, ky, min_dist_sq)
+        _curves, _starts, _segments, x1, y1, dx, dy, _length_sq = self.walls
+        for group in np.flatnonzero((first >= 0).any(axis=0)):
+            hit = first[:, group] >= 0
+            h = rows[hit]
+            s = first[hit, group]
+            t = t_all[hit, s]
+            closest_x = x1[s] + t * dx[s]
+            closest_y = y1[s] + t * dy[s]
+            dist_x = kx[hit] - closest_x
+            dist_y = ky[hit] - closest_y
+            dist = np.sqrt(dist_x * dist_x + dist_y * dist_y)
+            dist = np.where(dist == 0, 0.001, dist)
+            nx = dist_x / dist
+            ny = dist_y / dist
+
+            penetration = min_dist - dist
+            self.x[h] += nx * (penetration + 2)
+            self.y[h] += ny * (penetration + 2)
+
+            speed = self.speed[h]
+            vx = np.cos(self.angle[h]) * speed
+            vy = np.sin(self.angle[h]) * speed
+            dot = vx * nx + vy * ny
+            angle_ratio = np.abs(dot) / (np.sqrt(vx * vx + vy * vy) + 0.001)
+            impact = np.abs(speed)
+
+            crash = (dot < -0.1) & (angle_ratio > 0.7)
+            scrape = ~crash & (impact > MAX_SPEED * 0.2)
+            damage = np.where(crash, np.floor(5 + (impact / MAX_SPEED) * 10),
+                              np.where(scrape, np.floor(1 + (impact / MAX_SPEED) * 4), 0))
+
+            # Collision frontale : rebond de 8 px et petite variation aléatoire de l'angle
+            c = h[crash]
+            self.speed[c] *= -0.2
+            self.x[c] += nx[crash] * 8
+            self.y[c] += ny[crash] * 8
+            self.angle[c] += (self.rng.random(len(c)) - 0.5) * 0.2
+
+            # Frottement : la vitesse est projetée sur la direction du mur
+            wall_length = np.sqrt(dx[s] * dx[s] + dy[s] * dy[s])
+            along = vx * (dx[s] / wall_length) + vy * (dy[s] / wall_length)
+            new_vx = dx[s] / wall_length * along * 0.70
+            new_vy = dy[s] / wall_length * along * 0.70
+            new_speed = np.sqrt(new_vx * new_vx + new_vy * new_vy)
+            turning = scrape & (new_speed > 0.1)
+            target = np.arctan2(new_vy, new_vx)
+            self.speed[h[scrape]] = new_speed[scrape]
+            self.angle[h[turning]] += _normalize_angle(target - self.angle[h])[turning] * 0.3
+
+            gentle = ~crash & ~scrape
+            self.speed[h[gentle]] *= 0.95
+
+            self.crashes[h] += crash
+            self.scrapes[h] += scrape
+            self._take_damage(h, damage, now)
+
+            # Sécurité du serveur : forcer la sortie du mur
+            final_x = self.x[h] - closest_x
+            final_y = self.y[h] - closest_y
+            final_sq = final_x * final_x + final_y * final_y
+            inside = (final_sq < min_dist_sq) & (final_sq > 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = (math.sqrt(min_dist_sq) + 2) / np.sqrt(final_sq)
+            self.x[h[inside]] = (closest_x + final_x * scale)[inside]
+            self.y[h[inside]] = (closest_y + final_y * scale)[inside]
+
+            speed = self.speed[h]
+            self.speed[h] = np.where((np.abs(speed) < 0.5) & (speed != 0), 0.0, speed)
+
+    def _booster_collisions(self, mask, now):
+        """Room.checkBoosterCollisions and activateBoost"""
+        mask = mask & (self.boost_cooldown <= 0)
+        if not len(self.boosters) or not mask.any():
+            return
+        x1, y1, x2, y2 = self.booster_lines
+        distance, t = _point_to_line_distance(self.x[:, np.newaxis], self.y[:, np.newaxis], x1, y1, x2, y2)
+        # lastBoosterIndex ne change qu'en faveur d'un index plus grand pendant la boucle :
+        # seul l'index de départ est sauté
+        hit = (mask[:, np.newaxis] & (np.arange(len(x1)) != self.last_booster[:, np.newaxis])
+               & (distance < BOOSTER_REACH) & (t >= 0) & (t <= 1))
+        touched = hit.any(axis=1)
+        if not touched.any():
+            return
+        # Le premier booster touché active le boost, le cooldown bloque les suivants
+        self.boosting |= touched
+        self.boost_end[touched] = now + BOOST_DURATION
+        self.boost_cooldown[touched] = BOOST_COOLDOWN
+        self.speed[touched] = np.minimum(self.speed[touched] + 1.5, MAX_SPEED * 1.25)
+        self.last_booster[touched] = len(x1) - 1 - hit[touched, ::-1].argmax(axis=1)
+
+    def _void_zone_collisions(self, mask, now):
+        """Room.checkVoidZoneCollisions for the karts of ``mask``"""
+        rows = np.flatnonzero(mask)
+        if not len(rows) or not len(self.zone_edges[0]):
+            return
+        zone = falling_zones(self.zone_edges, self.x[rows], self.y[rows])
+        f = rows[zone >= 0]
+        if not len(f):
+            return
+        self.falling[f] = True
+        self.fall_start[f] = now
+        self.fall_vx[f] = np.cos(self.angle[f]) * self.speed[f]
+        self.fall_vy[f] = np.sin(self.angle[f]) * self.speed[f]
+        self.speed[f] = 0
+        self.falls[f] += 1
+        fell = np.zeros(self.bots, dtype=bool)
+        fell[f] = True
+        detail = np.full(self.bots, -1)
+        detail[rows] = zone
+        self._event("fall", fell, detail)
+
+    def _crossings(self, mask, x1, y1, x2, y2):
+        """Crossed line and dot product with its normal, per kart"""
+        crossed = mask & segments_intersect(self.last_x, self.last_y, self.x, self.y, x1, y1, x2, y2)
+        dot = -(y2 - y1) * (self.x - self.last_x) + (x2 - x1) * (self.y - self.last_y)
+        return crossed, dot
+
+    def _race_progress(self, active, now):
+        """Room.checkRaceProgress for the karts of ``active``"""
+        count = len(self.checkpoints)
+        line = self.finish_line
+        if line:
+            crossed, dot = self._crossings(active, line["x1"], line["y1"], line["x2"], line["y2"])
+            crossed &= now - self.last_finish_time > LINE_COOLDOWN
+            self.last_finish_time[crossed] = now
+            forward = crossed & (dot > 0)
+            self.wrong_way_crossing &= ~forward
+
+            started = forward & ~self.passed_start
+            self.passed_start |= started
+            self.lap[started] = 1
+            self.next_checkpoint[started] = 0
+
+            lap_done = forward & ~started & (self.next_checkpoint == count)
+            self.lap += lap_done
+            self.next_checkpoint[lap_done] = 0
+            finished = lap_done & (self.lap > self.laps)
+            self.finished |= finished
+            self.finish_time[finished] = now
+            self.lap[finished] = self.laps
+            self._event("lap", lap_done & ~finished, self.lap)
+            self._event("finish", finished, self.lap)
+            # Passage de la ligne sans tous les checkpoints : le serveur envoie invalidFinish
+            self._event("missedCheckpoint", forward & ~started & ~lap_done, self.next_checkpoint)
+
+            backward = crossed & (dot < 0)
+            self.wrong_way_crossing |= backward & self.passed_start & (self.lap > 0)
+            self._event("wrongWay", backward)
+
+        if not count:
+            return
+        mask = active & self.passed_start & (self.next_checkpoint < count)
+        index = np.minimum(self.next_checkpoint, count - 1)
+        x1, y1, x2, y2 = self.checkpoints[index].T
+        crossed, dot = self._crossings(mask, x1, y1, x2, y2)
+        rows = np.arange(self.bots)
+        crossed &= now - self.last_checkpoint_time[rows, index] > LINE_COOLDOWN
+        self.last_checkpoint_time[rows[crossed], index[crossed]] = now
+        passed = crossed & (dot > 0)
+        p = rows[passed]
+        self.checkpoint_poses[p, index[passed]] = np.column_stack((self.x[p], self.y[p], self.angle[p]))
+        self.checkpoint_saved[p, index[passed]] = True
+        self.last_validated[p] = index[passed]
+        self.next_checkpoint[p] += 1
+        self._event("checkpoint", passed, index)
+
+    def _track_progress(self, mask):
+        """Room.calculateTrackProgress for the karts of ``mask``"""
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return
+        segments, distances, total = self.racing_line
+        segment, t = closest_racing_segments(segments, self.x[rows], self.y[rows])
+        x1, y1, dx, dy, length_sq = segments
+        length = np.sqrt(length_sq[segment])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            facing = np.where(length > 0, (dx[segment] * np.cos(self.angle[rows])
+                                           + dy[segment] * np.sin(self.angle[rows])) / length, 0.0)
+        self.going_backwards[rows] = (facing < -0.1) & (self.speed[rows] > 0.5)
+
+        lap = self.lap[rows]
+        completed = np.where(lap == 0, -1, lap - 1)
+        completed = np.where(self.wrong_way_crossing[rows], np.maximum(-1, completed - 1), completed)
+        start = distances[segment]
+        self.progress[rows] = completed * total + start + (distances[segment + 1] - start) * t
+        self.segment[rows] = segment
+        self.segment_t[rows] = t
+
+    def completed_laps(self):
+        """Laps completed by each kart"""
+        return np.where(self.finished, self.laps, np.maximum(self.lap - 1, 0))
+
+    def summary(self):
+        """Totals of the run so far"""
+        kinds = {}
+        for event in self.events:
+            kinds[event[1]] = kinds.get(event[1], 0) + 1
+        return {
+            "ticks": self.tick,
+            "laps": float(self.completed_laps().mean()),
+            "finished": int(self.finished.sum()),
+            "crashes": int(self.crashes.sum()),
+            "scrapes": int(self.scrapes.sum()),
+            "falls": int(self.falls.sum()),
+            "deaths": int(self.deaths.sum()),
+            "stuck": int(self.stuck.sum()),
+            "missedCheckpoints": kinds.get("missedCheckpoint", 0),
+        }
+
+
+# --- Oracle des structures précalculées ---
+
+def _trace_arrays(trace):
+    if not trace:
+        empty = np.zeros(0)
+        return empty, empty, empty, empty
+    return tuple(np.concatenate([step[k] for step in trace]) for k in range(4))
+
+
+def check_bakes(data, trace, samples=20000, seed=0):
+    """Compare every baked structure with the brute-force tests on the bots' trajectories.
+
+    ``trace`` is ``Simulation.trace``. The map is compiled with every bake
+    that keeps the geometry. Up to ``samples`` movements are drawn from the
+    trace; trigger lines are checked on the movements, the other structures
+    on their end positions and as many positions scattered up to
+    ``TRACE_SPREAD`` px around them (bots seldom graze the walls). Returns
+    ``{section: (checked, mismatches)}``; the ``sdf`` entry counts samples
+    farther than one cell from the exact distance, the ``respawnTable`` entry
+    the poses failing ``unsafe_respawn_poses``.
+    """
+    from maps.bakes.sdf import decode_sdf, exact_field, sample_sdf
+    from maps.bakes.triggers import (aabb_crosses_line, booster_hits, crosses_line, crossing_direction,
+                                     first_item_hit, grid_booster_hits, grid_first_item_hit)
+    from maps.bakes.void_zones import decode_bitmap, falling_zone
+    from maps.compile import batch_options
+    from maps.map_compiler import compile_map
+
+    baked = compile_map(copy.deepcopy(data), batch_options())
+    last_x, last_y, x, y = _trace_arrays(trace)
+    if len(x) > samples:
+        keep = np.sort(np.random.default_rng(seed + 1).choice(len(x), samples, replace=False))
+        last_x, last_y, x, y = last_x[keep], last_y[keep], x[keep], y[keep]
+    rng = np.random.default_rng(seed)
+    radius = TRACE_SPREAD * np.sqrt(rng.random(len(x)))
+    direction = rng.random(len(x)) * 2 * math.pi
+    sample_x = np.concatenate((x, x + radius * np.cos(direction)))
+    sample_y = np.concatenate((y, y + radius * np.sin(direction)))
+    positions = list(zip(sample_x.tolist(), sample_y.tolist()))
+    results = {}
+
+    curves = baked.get("continuousCurves", [])
+    grid = baked["collisionGrid"]
+    walls = wall_arrays(curves)
+    brute = []
+    for start in range(0, len(sample_x), 4096):
+        brute += brute_force_hits_array(walls, sample_x[start:start + 4096], sample_y[start:start + 4096])
+    results["collisionGrid"] = (len(sample_x), sum(query_collision_grid(grid, curves, px, py) != hits
+                                                   for (px, py), hits in zip(positions, brute)))
+
+    sdf = baked["sdf"]
+    cells = decode_sdf(sdf)
+    exact, _nx, _ny = exact_field(curves, sample_x, sample_y)
+    approx = np.array([sample_sdf(sdf, px, py, cells)[0] for px, py in positions])
+    finite = np.isfinite(exact)
+    results["sdf"] = (len(sample_x), int((np.abs(approx - exact)[finite] > sdf["cellSize"]).sum()))
+
+    zones = baked.get("voidZones") or []
+    if baked.get("voidZoneBitmap"):
+        bitmap = baked["voidZoneBitmap"]
+        bits = decode_bitmap(bitmap)
+        exact_zones = falling_zones(zone_edges(zones), sample_x, sample_y)
+        mismatches = 0
+        for (px, py), zone in zip(positions, exact_zones):
+            from_bitmap = falling_zone(bitmap, bits, zones, px, py)
+            mismatches += (-1 if from_bitmap is None else from_bitmap) != zone
+        results["voidZoneBitmap"] = (len(sample_x), int(mismatches))
+
+    gates = list(baked.get("checkpoints") or []) + ([baked["finishLine"]] if baked.get("finishLine") else [])
+    checked = mismatches = 0
+    for line in gates:
+        # Préfiltre large autour de la ligne, puis tests exacts et tests via la boîte précalculée
+        near = ((np.minimum(last_x, x) <= max(line["x1"], line["x2"]) + 1)
+                & (np.maximum(last_x, x) >= min(line["x1"], line["x2"]) - 1)
+                & (np.minimum(last_y, y) <= max(line["y1"], line["y2"]) + 1)
+                & (np.maximum(last_y, y) >= min(line["y1"], line["y2"]) - 1))
+        for k in np.flatnonzero(near):
+            checked += 1
+            args = (line, float(last_x[k]), float(last_y[k]), float(x[k]), float(y[k]))
+            exact_cross = crosses_line(*args)
+            if aabb_crosses_line(*args) != exact_cross:
+                mismatches += 1
+            elif exact_cross:
+                dot = -(line["y2"] - line["y1"]) * (args[3] - args[1]) + (line["x2"] - line["x1"]) * (args[4] - args[2])
+                if abs(dot) > 1e-6 * line["length"] and crossing_direction(*args) != ((dot > 0) - (dot < 0)):
+                    mismatches += 1
+    results["triggerLines"] = (checked, mismatches)
+
+    trigger_grid = baked["triggerGrid"]
+    boosters = baked.get("boosters") or []
+    items = baked.get("items") or []
+    active = [True] * len(items)
+    results["triggerGrid"] = (len(sample_x), sum(
+        grid_booster_hits(trigger_grid, boosters, px, py, -1) != booster_hits(boosters, px, py, -1)
+        or grid_first_item_hit(trigger_grid, items, active, px, py) != first_item_hit(items, active, px, py)
+        for px, py in positions))
+
+    racing_line = baked.get("racingLine")
+    if racing_line and racing_line.get("progressGrid"):
+        points, closed, distances, _total = preprocess_racing_line(racing_line)
+        segment, t = closest_racing_segments(racing_arrays(points, closed), sample_x, sample_y)
+        progress_grid = racing_line["progressGrid"]
+        results["progressGrid"] = (len(sample_x), sum(
+            grid_progress(progress_grid, points, closed, distances, px, py)[:2] != (int(s), float(st))
+            for (px, py), s, st in zip(positions, segment, t)))
+
+    if baked.get("respawnTable"):
+        edges = zone_edges(zones)
+        checked = mismatches = 0
+        for gate, poses in zip(baked.get("checkpoints") or [], baked["respawnTable"]["poses"]):
+            table = np.array(poses, dtype=np.float64).reshape(-1, 3)
+            checked += len(table)
+            if len(table):
+                mismatches += int(unsafe_respawn_poses(walls, edges, gate, table[:, 0], table[:, 1]).sum())
+        results["respawnTable"] = (checked, mismatches)
+    return results
+
+
+def _main(argv):
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(prog="python -m maps.simulate",
+                                     description="Drive bots with a port of the server's kart logic")
+    parser.add_argument("maps", nargs="+")
+    parser.add_argument("--bots", type=int, default=DEFAULT_BOTS)
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS,
+                        help=f"maximum ticks per map (default: {DEFAULT_TICKS}, one minute)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check-bakes", action="store_true",
+                        help="replay the bots' trajectories against the compiled acceleration structures")
+    parser.add_argument("--samples", type=int, default=20000, help="positions checked with --check-bakes")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.maps:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        sim = Simulation(data, args.bots, args.seed, record=args.check_bakes)
+        start = time.perf_counter()
+        ticks = sim.run(args.ticks)
+        elapsed = time.perf_counter() - start
+        report = sim.summary()
+        print(f"{path}: {args.bots} bots, {ticks} ticks in {elapsed:.2f} s "
+              f"({ticks / elapsed:.0f} ticks/s, {ticks * args.bots / elapsed:.0f} kart-ticks/s); "
+              f"{report['laps']:.1f} laps avg, {report['finished']}/{args.bots} finished, "
+              f"{report['crashes']} crashes, {report['scrapes']} scrapes, {report['falls']} falls, "
+              f"{report['deaths']} deaths, {report['stuck']} stuck, "
+              f"{report['missedCheckpoints']} missed checkpoints")
+        if args.check_bakes:
+            for section, (checked, mismatches) in check_bakes(data, sim.trace, args.samples, args.seed).items():
+                print(f"  {section}: {checked} checked, {'OK' if not mismatches else f'{mismatches} MISMATCHES'}")
+                status |= bool(mismatches)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,265 @@
+"""Gameplay telemetry heatmaps: ``python -m maps.telemetry``.
+
+Reads player telemetry logged by the server as NDJSON, one record per line::
+
+    {"t": 1718000000000, "map": "nimbusrush", "player": "a1", "event": "position", "x": 412.5, "y": 230.1}
+    {"t": 1718000000420, "map": "nimbusrush", "player": "a1", "event": "crash", "x": 430.0, "y": 241.7}
+    {"t": 1718000003100, "map": "nimbusrush", "player": "b7", "event": "fall", "x": 880.2, "y": 512.9}
+
+``event`` is ``position`` (the default when missing), ``crash`` or ``fall``;
+other events and records of other maps (with ``--map-id``) are skipped.
+Every kind is accumulated into a ``histogram2d`` over the track, one bin per
+``cellSize`` px. The log is read in ``CHUNK_SIZE`` byte chunks: each chunk is
+parsed in one call (``orjson`` when installed) and binned, so memory stays
+constant whatever the size of the log.
+
+The histograms are cached per log file in ``build/telemetry``, with the
+number of bytes consumed: an unchanged log is not read again, and a log that
+grew (the server appends) is read from where the last ingestion stopped. A
+last line without its newline is left for the next ingestion, the server may
+still be writing it. Requires NumPy; the images need PIL.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+DEFAULT_CACHE_DIR = os.path.join("build", "telemetry")
+DEFAULT_OUT_DIR = os.path.join("build", "telemetry")
+DEFAULT_CELL_SIZE = 8
+DEFAULT_WIDTH = 768
+CHUNK_SIZE = 4 << 20
+# Début du log comparé avant de reprendre une ingestion : le fichier n'a pas été remplacé
+HEAD_SIZE = 64 << 10
+# Type de heatmap -> (événement du log, couleur RGB)
+KINDS = {
+    "density": ("position", (0, 200, 255)),
+    "crashes": ("crash", (255, 40, 40)),
+    "falls": ("fall", (255, 60, 220)),
+}
+_EVENTS = {event: kind for kind, (event, _color) in KINDS.items()}
+# Opacité maximale des cellules les plus fréquentées
+MAX_ALPHA = 200
+
+
+def _parse_lines(lines):
+    """Records of a block of complete lines; returns ``(records, bad_lines)``"""
+    block = b"[" + b",".join(lines) + b"]"
+    try:
+        records = orjson.loads(block) if orjson is not None else json.loads(block)
+    except ValueError:
+        records = None
+    # Des lignes invalides peuvent se recoller (« [1 » puis « 2] ») : le bloc
+    # n'est accepté qu'avec exactement un enregistrement par ligne
+    if type(records) is list and len(records) == len(lines):
+        return records, 0
+    # Au moins une ligne invalide : bloc relu ligne par ligne
+    records = []
+    bad = 0
+    for line in lines:
+        try:
+            records.append(orjson.loads(line) if orjson is not None else json.loads(line))
+        except ValueError:
+            bad += 1
+    return records, bad
+
+
+def _bin_records(records, histograms, edges, map_id):
+    """Add the positions of ``records`` to ``histograms``; returns the number of records kept"""
+    coordinates = {kind: ([], []) for kind in KINDS}
+    kept = 0
+    for record in records:
+        if not isinstance(record, dict) or (map_id is not None and record.get("map") != map_id):
+            continue
+        kind = _EVENTS.get(record.get("event", "position"))
+        x = record.get("x")
+        y = record.get("y")
+        if kind is None or type(x) not in (int, float) or type(y) not in (int, float):
+            continue
+        xs, ys = coordinates[kind]
+        xs.append(x)
+        ys.append(y)
+        kept += 1
+    for kind, (xs, ys) in coordinates.items():
+        if xs:
+            # histogram2d indexe [x, y] : transposé en [ligne, colonne] pour les images
+            counts, _, _ = np.histogram2d(ys, xs, bins=edges)
+            histograms[kind] += counts.astype(np.int64)
+    return kept
+
+
+def _head_hash(path, size):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(size)).hexdigest()
+
+
+def cache_path(log_path, map_id=None, cell_size=DEFAULT_CELL_SIZE, cache_dir=DEFAULT_CACHE_DIR):
+    key = json.dumps([os.path.abspath(log_path), map_id, cell_size])
+    return os.path.join(cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest()[:16] + ".npz")
+
+
+def _load_cache(path, log_path, rows, cols):
+    """Cached histograms and metadata, when they are a prefix of the current log"""
+    try:
+        with np.load(path) as cached:
+            meta = json.loads(str(cached["meta"]))
+            histograms = {kind: cached[kind] for kind in KINDS}
+    except (OSError, KeyError, ValueError):
+        return None
+    if any(h.shape != (rows, cols) for h in histograms.values()):
+        return None
+    if os.path.getsize(log_path) < meta["offset"]:
+        return None
+    if _head_hash(log_path, meta["headSize"]) != meta["head"]:
+        return None
+    return histograms, meta
+
+
+def _save_cache(path, histograms, meta):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = path + ".tmp.npz"
+    np.savez_compressed(temporary, meta=json.dumps(meta), **histograms)
+    os.replace(temporary, path)
+
+
+def ingest_log(log_path, map_id=None, cell_size=DEFAULT_CELL_SIZE, cache_dir=DEFAULT_CACHE_DIR,
+               chunk_size=CHUNK_SIZE, use_cache=True):
+    """Histograms of a telemetry log, read in chunks and cached.
+
+    Returns ``(histograms, stats)``: ``histograms`` maps every kind of
+    ``KINDS`` to an int64 array of ``rows x cols`` cells of ``cell_size`` px
+    from the track origin. ``stats`` gives the records kept in total
+    (``records``), the lines and bytes read by this call (``lines``,
+    ``bytes``), the invalid lines (``badLines``), ``seconds`` and whether the
+    cache was used (``cached``: ``"hit"``, ``"resumed"`` or ``None``).
+    """
+    start = time.perf_counter()
+    cols = -(-TRACK_WIDTH // cell_size)
+    rows = -(-TRACK_HEIGHT // cell_size)
+    edges = (np.arange(rows + 1) * cell_size, np.arange(cols + 1) * cell_size)
+    cache_file = cache_path(log_path, map_id, cell_size, cache_dir)
+
+    cached = _load_cache(cache_file, log_path, rows, cols) if use_cache else None
+    if cached is not None:
+        histograms, meta = cached
+        histograms = {kind: counts.astype(np.int64) for kind, counts in histograms.items()}
+        offset, records = meta["offset"], meta["records"]
+    else:
+        histograms = {kind: np.zeros((rows, cols), dtype=np.int64) for kind in KINDS}
+        offset = records = 0
+    resumed_at = offset
+
+    lines = bad = 0
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        remainder = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            end = chunk.rfind(b"\n")
+            if end < 0:
+                remainder = chunk
+                continue
+            remainder = chunk[end + 1:]
+            block = [line for line in chunk[:end].split(b"\n") if line.strip()]
+            if block:
+                parsed, invalid = _parse_lines(block)
+                records += _bin_records(parsed, histograms, edges, map_id)
+                lines += len(block)
+                bad += invalid
+            offset += end + 1
+
+    stats = {"records": records, "lines": lines, "bytes": offset - resumed_at, "badLines": bad,
+             "seconds": time.perf_counter() - start,
+             "cached": None if cached is None else ("hit" if offset == resumed_at else "resumed")}
+    if use_cache and (cached is None or offset != resumed_at):
+        head_size = min(HEAD_SIZE, offset)
+        _save_cache(cache_file, histograms, {"offset": offset, "records": records, "cellSize": cell_size,
+                                             "head": _head_hash(log_path, head_size), "headSize": head_size})
+    return histograms, stats
+
+
+def heatmap_cells(counts, color):
+    """RGBA PIL image with one pixel per cell: ``color`` with a log-scaled opacity"""
+    from PIL import Image
+
+    peak = counts.max()
+    alpha = np.zeros(counts.shape, dtype=np.uint8)
+    if peak:
+        alpha = (np.log1p(counts) / np.log1p(peak) * MAX_ALPHA).astype(np.uint8)
+    pixels = np.empty(counts.shape + (4,), dtype=np.uint8)
+    pixels[..., :3] = color
+    pixels[..., 3] = alpha
+    return Image.fromarray(pixels, "RGBA")
+
+
+def render_heatmap(counts, color, data=None, width=DEFAULT_WIDTH, cell_size=DEFAULT_CELL_SIZE):
+    """Heatmap over the rendered map (a black track without ``data``), as an RGB PIL image"""
+    from PIL import Image
+
+    from maps.render import render_map
+
+    height = round(width * TRACK_HEIGHT / TRACK_WIDTH)
+    if data is None:
+        base = Image.new("RGBA", (width, height), (0, 0, 0, 255))
+    else:
+        base = render_map(data, width, height).convert("RGBA")
+    # La dernière ligne et la dernière colonne de cellules débordent de la piste
+    # quand cell_size ne divise pas ses dimensions
+    scale = width / TRACK_WIDTH
+    rows, cols = counts.shape
+    layer = heatmap_cells(counts, color).resize((round(cols * cell_size * scale), round(rows * cell_size * scale)),
+                                                Image.Resampling.BILINEAR)
+    return Image.alpha_composite(base, layer.crop((0, 0, width, height))).convert("RGB")
+
+
+def _main(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m maps.telemetry",
+                                     description="Density, crash and fall heatmaps from NDJSON telemetry logs")
+    parser.add_argument("logs", nargs="+")
+    parser.add_argument("--map", help="map JSON drawn under the heatmaps")
+    parser.add_argument("--map-id", help="only keep the records of this map (default: the --map id)")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE)
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH)
+    parser.add_argument("-o", "--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="read the whole logs and do not update the cache")
+    args = parser.parse_args(argv)
+
+    data = None
+    map_id = args.map_id
+    if args.map:
+        with open(args.map, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        map_id = map_id or data.get("id")
+    os.makedirs(args.out_dir, exist_ok=True)
+    for path in args.logs:
+        histograms, stats = ingest_log(path, map_id, args.cell_size, args.cache_dir, use_cache=not args.no_cache)
+        rate = stats["bytes"] / stats["seconds"] / 1e6 if stats["seconds"] else 0
+        print(f"{path}: {stats['records']} records, {stats['lines']} lines read "
+              f"({stats['bytes'] / 1e6:.1f} MB in {stats['seconds']:.2f} s, {rate:.0f} MB/s), "
+              f"{stats['badLines']} invalid, cache: {stats['cached'] or 'miss'}")
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for kind, (_event, color) in KINDS.items():
+            destination = os.path.join(args.out_dir, f"{stem}-{kind}.png")
+            render_heatmap(histograms[kind], color, data, args.width, args.cell_size).save(destination)
+            print(f"  {kind}: {int(histograms[kind].sum())} -> {destination}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
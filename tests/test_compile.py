@@ -0,0 +1,40 @@
+import os
+import shutil
+
+import pytest
+
+from maps.compile import compile_maps
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def test_same_named_sources_are_rejected(tmp_path):
+    for folder, name in (("a", "beach.json"), ("b", "lava_track.json")):
+        os.makedirs(tmp_path / folder)
+        shutil.copy(os.path.join(MAPS_DIR, name), tmp_path / folder / "track.json")
+    out_dir = tmp_path / "out"
+    with pytest.raises(ValueError, match="même nom"):
+        compile_maps([str(tmp_path / "a" / "track.json"), str(tmp_path / "b" / "track.json")], str(out_dir),
+                     report=lambda line: None)
+    assert not out_dir.exists()
+
+
+def test_source_listed_twice_is_compiled_once(tmp_path):
+    source = os.path.join(MAPS_DIR, "night_city.json")
+    options = {"triggers": True}
+    results = compile_maps([source, os.path.join(MAPS_DIR, ".", "night_city.json")], str(tmp_path), options,
+                           jobs=1, report=lambda line: None)
+    assert results == {source: "compiled"}
+    assert os.path.exists(tmp_path / "night_city.json")
+
+
+def test_missing_source_is_reported_and_others_compiled(tmp_path):
+    source = os.path.join(MAPS_DIR, "night_city.json")
+    missing = str(tmp_path / "absent" / "missing.json")
+    lines = []
+    results = compile_maps([missing, source], str(tmp_path / "out"), {"triggers": True}, jobs=1,
+                           report=lines.append)
+    assert results[source] == "compiled"
+    assert results[missing].startswith("FileNotFoundError")
+    assert any(line.startswith(f"{missing}: ERROR") for line in lines)
+    assert os.path.exists(tmp_path / "out" / "night_city.json")
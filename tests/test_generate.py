@@ -0,0 +1,35 @@
+import pytest
+
+from maps.bakes.collision_grid import brute_force_hits
+from maps.core.writer import dumps_map
+from maps.generate import generate_track
+from maps.game_config import WALL_CLEARANCE
+
+SEEDS = range(6)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_same_seed_gives_the_same_document(seed):
+    assert dumps_map(generate_track(seed)) == dumps_map(generate_track(seed))
+
+
+def test_seeds_give_different_tracks():
+    documents = {dumps_map(generate_track(seed)) for seed in SEEDS}
+    assert len(documents) == len(SEEDS)
+
+
+@pytest.mark.parametrize("track_width", [80, 120, 160])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spawn_slots_are_clear_of_the_walls(seed, track_width):
+    data = generate_track(seed, track_width=track_width)
+    curves = data["continuousCurves"]
+    assert len(data["spawnPoints"]) == 6
+    for spawn in data["spawnPoints"]:
+        # Coin utilisé par le serveur et centre dessiné par l'éditeur
+        for x, y in ((spawn["x"], spawn["y"]), (spawn["x"] + 15, spawn["y"] + 10)):
+            assert not brute_force_hits(curves, x, y, WALL_CLEARANCE), (spawn, x, y)
+
+
+def test_track_too_narrow_for_a_spawn_slot():
+    with pytest.raises(ValueError, match="spawn"):
+        generate_track(0, track_width=40)
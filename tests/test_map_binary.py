@@ -0,0 +1,107 @@
+import glob
+import json
+import os
+
+import pytest
+
+import maps.map_binary as map_binary
+from maps.core.writer import dumps_map, synthetic_map
+from maps.map_binary import (DTYPE_FIXED32, DTYPE_FLOAT64, block_array, block_raw, decode_map, encode_map,
+                             read_header, same_document)
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+SHIPPED_MAPS = sorted(glob.glob(os.path.join(MAPS_DIR, "*.json")))
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "pure-python"])
+def numpy_decoder(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(map_binary, "np", None)
+    elif map_binary.np is None:
+        pytest.skip("NumPy n'est pas installé")
+
+
+def test_shipped_maps_found():
+    assert SHIPPED_MAPS
+
+
+@pytest.mark.parametrize("path", SHIPPED_MAPS, ids=os.path.basename)
+def test_shipped_map_round_trip(path, numpy_decoder):
+    data = load(path)
+    decoded = decode_map(encode_map(data))
+    assert same_document(data, decoded)
+    assert dumps_map(decoded) == dumps_map(data)
+
+
+def test_synthetic_map_round_trip(numpy_decoder):
+    data = synthetic_map(5000)
+    encoded = encode_map(data)
+    assert same_document(data, decode_map(encoded))
+    # Sans fixed_point, jamais de virgule fixe : les blocs restent des vues
+    _, blocks = read_header(encoded)
+    assert all(block.dtype != DTYPE_FIXED32 for block in blocks)
+    assert any(block.dtype == DTYPE_FLOAT64 for block in blocks)
+
+
+def test_synthetic_map_fixed_point_round_trip(numpy_decoder):
+    data = synthetic_map(5000)
+    encoded = encode_map(data, fixed_point=True)
+    assert same_document(data, decode_map(encoded))
+    # Coordonnées à 3 décimales : virgule fixe sur 32 bits, pas float64
+    _, blocks = read_header(encoded)
+    assert any(block.dtype == DTYPE_FIXED32 and block.decimals == 3 for block in blocks)
+    assert len(encoded) < len(dumps_map(data).encode("utf-8")) / 2
+
+
+def test_default_blocks_are_read_only_views():
+    np = pytest.importorskip("numpy")
+    encoded = encode_map(synthetic_map(2000))
+    buffer = memoryview(encoded)
+    _, blocks = read_header(buffer)
+    for block in blocks:
+        values = block_array(buffer, block)
+        assert not values.flags.writeable
+        assert np.shares_memory(values, np.frombuffer(buffer, dtype=np.uint8))
+
+
+def test_fixed_point_raw_view_and_scale():
+    pytest.importorskip("numpy")
+    encoded = encode_map({"points": [[1.125, 2.1], [3.5, 4.25]]}, fixed_point=True)
+    buffer = memoryview(encoded)
+    _, blocks = read_header(buffer)
+    view, scale = block_raw(buffer, blocks[0])
+    assert not view.flags.writeable
+    assert scale == 1000
+    assert (view / scale).tolist() == block_array(buffer, blocks[0]).tolist() == [1.125, 2.1, 3.5, 4.25]
+
+
+def test_edge_values_round_trip(numpy_decoder):
+    data = {
+        "mixed": [[1, 2.5], [3, -4.25]],
+        "negativeZero": [[-0.0, 1.5], [2.5, 3.5]],
+        "fullPrecision": [[0.1 + 0.2, 1 / 3]],
+        "notFinite": [float("inf"), float("nan"), 1.5],
+        "bigInts": [2 ** 40, 1],
+        "fixedRange": [[2147.483647, 0.000001]],
+        "records": [{"x": 1.125, "y": 2}, {"x": 3.5, "y": 4}],
+    }
+    assert same_document(data, decode_map(encode_map(data)))
+    assert same_document(data, decode_map(encode_map(data, fixed_point=True)))
+
+
+@pytest.mark.parametrize("cut", ["empty", "header", "half", "last-byte"])
+def test_mapped_map_rejects_empty_and_truncated_files(tmp_path, cut):
+    pytest.importorskip("numpy")
+    from maps.map_binary import MapBinaryError
+    from maps.map_mmap import MappedMap
+    encoded = encode_map(synthetic_map(100))
+    size = {"empty": 0, "header": 3, "half": len(encoded) // 2, "last-byte": len(encoded) - 1}[cut]
+    path = tmp_path / "truncated.kmap"
+    path.write_bytes(encoded[:size])
+    with pytest.raises(MapBinaryError):
+        MappedMap(str(path))
@@ -0,0 +1,55 @@
+import glob
+import json
+import os
+
+import pytest
+
+from maps.bakes.racing_line import (bake_progress_grid, brute_force_progress, grid_progress, preprocess_racing_line,
+                                    resample_racing_line, sample_track_positions)
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def racing_lines():
+    lines = []
+    for path in sorted(glob.glob(os.path.join(MAPS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            racing_line = json.load(f).get("racingLine")
+        if racing_line and len(racing_line.get("points", [])) >= 2:
+            lines.append(pytest.param(racing_line, id=os.path.basename(path)))
+            lines.append(pytest.param(resample_racing_line(racing_line, 20), id=os.path.basename(path) + "-20px"))
+    lines.append(pytest.param({"points": [[100, 100], [900, 140], [500, 700]]}, id="open"))
+    return lines
+
+
+@pytest.mark.parametrize("racing_line", racing_lines())
+def test_grid_progress_matches_full_scan(racing_line):
+    points, closed, distances, _total = preprocess_racing_line(racing_line)
+    grid = bake_progress_grid(points, closed)
+    positions = sample_track_positions(points, closed, 3000, seed=0)
+    positions += [(x, y) for y in range(-40, 1100, 37) for x in range(-40, 1600, 41)]
+    for x, y in positions:
+        assert grid_progress(grid, points, closed, distances, x, y) == \
+            brute_force_progress(points, closed, distances, x, y)
+
+
+def resampled_lines():
+    lines = []
+    for path in sorted(glob.glob(os.path.join(MAPS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            racing_line = json.load(f).get("racingLine")
+        if racing_line and len(racing_line.get("points", [])) >= 2:
+            for spacing in (20, 40, 300, 350):
+                lines.append(pytest.param(racing_line, spacing, id=f"{os.path.basename(path)}-{spacing}px"))
+    return lines
+
+
+@pytest.mark.parametrize("racing_line,spacing", resampled_lines())
+def test_resampled_segments_have_the_exported_spacing(racing_line, spacing):
+    resampled = resample_racing_line(racing_line, spacing)
+    points, closed, distances, total = preprocess_racing_line(resampled)
+    lengths = [b - a for a, b in zip(distances, distances[1:])]
+    assert len(lengths) == (len(points) if closed else len(points) - 1)
+    for length in lengths:
+        assert length == pytest.approx(resampled["spacing"], rel=1e-3)
+    assert resampled["totalLength"] == pytest.approx(resampled["spacing"] * len(lengths), rel=1e-3)
@@ -0,0 +1,28 @@
+import os
+import shutil
+
+import pytest
+
+from maps.render import render_maps
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def test_same_named_sources_are_rejected(tmp_path):
+    for folder, name in (("a", "beach.json"), ("b", "lava_track.json")):
+        os.makedirs(tmp_path / folder)
+        shutil.copy(os.path.join(MAPS_DIR, name), tmp_path / folder / "track.json")
+    out_dir = tmp_path / "out"
+    with pytest.raises(ValueError, match="même nom"):
+        render_maps([str(tmp_path / "a" / "track.json"), str(tmp_path / "b" / "track.json")], str(out_dir),
+                    report=lambda line: None)
+    assert not out_dir.exists()
+
+
+def test_source_listed_twice_is_rendered_once(tmp_path):
+    pytest.importorskip("PIL")
+    source = os.path.join(MAPS_DIR, "night_city.json")
+    results = render_maps([source, os.path.join(MAPS_DIR, ".", "night_city.json")], str(tmp_path), width=64,
+                          jobs=1, report=lambda line: None)
+    assert results == {source: "rendered"}
+    assert os.path.exists(tmp_path / "night_city.png")
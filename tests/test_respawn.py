@@ -0,0 +1,64 @@
+import glob
+import json
+import os
+
+import pytest
+
+from maps.bakes.collision_grid import wall_segments
+from maps.bakes.respawn import bake_respawn_table, verify_respawn_table
+from maps.bakes.triggers import line_segments_intersect
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+MAP_PATHS = sorted(glob.glob(os.path.join(MAPS_DIR, "*.json")))
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def seen_from_gate(data, checkpoint, x, y, samples=20):
+    """True when some point of the gate reaches (x, y) without crossing a wall"""
+    walls = [segment[2:] for segment in wall_segments(data.get("continuousCurves", []))]
+    for k in range(samples + 1):
+        gx = checkpoint["x1"] + (checkpoint["x2"] - checkpoint["x1"]) * k / samples
+        gy = checkpoint["y1"] + (checkpoint["y2"] - checkpoint["y1"]) * k / samples
+        if not any(line_segments_intersect(gx, gy, x, y, *wall) for wall in walls):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("path", MAP_PATHS, ids=os.path.basename)
+def test_every_pose_is_seen_from_its_gate(path):
+    data = load(path)
+    table = bake_respawn_table(data)
+    for checkpoint, poses in zip(data["checkpoints"], table["poses"]):
+        for k in range(0, len(poses), 3):
+            assert seen_from_gate(data, checkpoint, poses[k], poses[k + 1]), (checkpoint, poses[k:k + 2])
+    count, unsafe, _empty = verify_respawn_table(data, table)
+    assert count and unsafe == 0
+
+
+def test_pose_behind_a_wall_fails_verification():
+    # Porte 13 de night_city : (788.67, 434.92) est derrière un mur vu de la porte
+    data = load(os.path.join(MAPS_DIR, "night_city.json"))
+    table = bake_respawn_table(data)
+    assert not seen_from_gate(data, data["checkpoints"][13], 788.67, 434.92)
+    table["poses"][13] = [788.67, 434.92, 0.0] + table["poses"][13]
+    count, unsafe, _empty = verify_respawn_table(data, table)
+    assert unsafe == 1
+
+
+def test_candidates_behind_a_wall_are_rejected():
+    # Un mur parallèle à la porte masque tous les candidats au-delà de lui
+    data = {
+        "continuousCurves": [
+            {"points": [[0, 0], [1000, 0], [1000, 1000], [0, 1000]], "type": "continuous", "closed": True},
+            {"points": [[380, 540], [620, 540]], "type": "continuous", "closed": False},
+        ],
+        "checkpoints": [{"x1": 400, "y1": 500, "x2": 600, "y2": 500}],
+    }
+    table = bake_respawn_table(data)
+    assert table["poses"] == [[]]
+    data["continuousCurves"].pop()
+    assert bake_respawn_table(data)["poses"][0]
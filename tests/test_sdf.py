@@ -0,0 +1,52 @@
+import glob
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from maps.bakes.sdf import _grid_axes, accuracy_report, bake_sdf, exact_field, grid_field
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+SHIPPED_MAPS = sorted(glob.glob(os.path.join(MAPS_DIR, "*.json")))
+
+
+def load_curves(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("continuousCurves", [])
+
+
+def assert_same_field(curves, xs, ys):
+    expected = exact_field(curves, xs[np.newaxis, :], ys[:, np.newaxis])
+    for channel, reference in zip(grid_field(curves, xs, ys), expected):
+        np.testing.assert_array_equal(channel, reference)
+
+
+@pytest.mark.parametrize("cell_size", [5, 7])
+@pytest.mark.parametrize("path", SHIPPED_MAPS, ids=os.path.basename)
+def test_grid_field_matches_full_scan(path, cell_size):
+    xs, ys = _grid_axes(cell_size, 1536, 1024)
+    assert_same_field(load_curves(path), xs, ys)
+
+
+def test_grid_field_edge_cases():
+    xs, ys = _grid_axes(3, 200, 150)
+    curves = [
+        # Courbe fermée qui se recoupe, segment de longueur nulle, arête horizontale
+        {"points": [[20, 20], [180, 120], [180, 20], [20, 120], [20, 120]], "closed": True},
+        {"points": [[60, 70], [140, 70]], "closed": False},
+        {"points": [[100, 10]], "closed": False},
+    ]
+    assert_same_field(curves, xs, ys)
+    distance, _normal_x, _normal_y = grid_field([], xs, ys)
+    assert np.isinf(distance).all()
+
+
+def test_baked_sdf_accuracy():
+    curves = load_curves(os.path.join(MAPS_DIR, "nimbusrush.json"))
+    sdf = bake_sdf(curves)
+    report = accuracy_report(sdf, curves, count=2000)
+    # L'interpolation bilinéaire s'écarte surtout près des angles des murs
+    assert report["near_mean_error"] < 0.05
+    assert report["near_max_error"] < sdf["cellSize"]
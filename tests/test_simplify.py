@@ -0,0 +1,76 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+from maps.bakes.simplify import crossing_spans, is_simple, segments_touch, simplify_map, simplify_points
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def comb(rng, teeth):
+    """Base presque droite, et des dents qui redescendent juste au-dessus d'elle.
+
+    Simplifiée, la base passe au-dessus de la pointe des dents : les croisements
+    doivent être réparés.
+    """
+    length = teeth * 20
+    points = [[x, -1.0 - rng.uniform(0, 0.4)] for x in range(0, length + 1, 5)]
+    points[0][1] = points[-1][1] = 0.0
+    points.append([length, 30])
+    for k in range(teeth, 0, -1):
+        x = k * 20 - 10
+        points += [[x + 4, 30], [x, -0.6 + rng.uniform(0, 0.3)], [x - 4, 30]]
+    points.append([0, 30])
+    return points
+
+
+def brute_force_crossings(points, indices, closed):
+    spans = list(zip(indices, indices[1:])) + ([(indices[-1], indices[0])] if closed else [])
+    count = len(spans)
+    crossing = set()
+    for i in range(count):
+        for j in range(i + 2, count):
+            if closed and i == 0 and j == count - 1:
+                continue
+            (a, b), (c, d) = spans[i], spans[j]
+            if segments_touch(points[a], points[b], points[c], points[d]):
+                crossing |= {i, j}
+    return crossing
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_simplified_comb_stays_simple(seed):
+    rng = random.Random(seed)
+    points = comb(rng, rng.randint(2, 30))
+    closed = seed % 2 == 1
+    tolerance = rng.uniform(1.2, 3.0)
+    assert is_simple(points, closed)
+    simplified, removed, deviation = simplify_points(points, closed, tolerance)
+    assert removed > 0
+    assert deviation <= tolerance
+    assert is_simple(simplified, closed)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_crossings_match_pairwise_scan(seed):
+    rng = random.Random(seed)
+    points = [[rng.uniform(0, 100), rng.uniform(0, 100)] for _ in range(60)]
+    indices = list(range(len(points)))
+    for closed in (False, True):
+        assert crossing_spans(points, indices, closed) == brute_force_crossings(points, indices, closed)
+
+
+def test_shipped_maps_stay_simple():
+    for path in sorted(glob.glob(os.path.join(MAPS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            original = json.load(f)
+        data = json.loads(json.dumps(original))
+        simplify_map(data, 2.0)
+        for section, closed_default in (("continuousCurves", False), ("voidZones", True)):
+            for before, after in zip(original.get(section, []), data.get(section, [])):
+                closed = after.get("closed", closed_default)
+                if is_simple(before["points"], closed):
+                    assert is_simple(after["points"], closed)
@@ -0,0 +1,134 @@
+import json
+import math
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from maps.bakes.respawn import bake_respawn_table
+from maps.game_config import MAX_SPEED, WALL_CLEARANCE
+from maps.simulate import GRACE_PERIOD, LINE_COOLDOWN, Simulation, unsafe_respawn_poses, wall_arrays, zone_edges
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+# Après la période de grâce : les dégâts comptent
+NOW = GRACE_PERIOD + 1000
+
+
+def straight_map():
+    """One horizontal wall at y = 800, a finish line at x = 300 and a checkpoint at x = 600"""
+    return {
+        "spawnPoints": [{"x": 200, "y": 500, "angle": 0}],
+        "continuousCurves": [{"points": [[100, 800], [900, 800]], "type": "continuous", "closed": False}],
+        # Sens avant : la normale (-(y2 - y1), x2 - x1) pointe vers +x
+        "finishLine": {"x1": 300, "y1": 700, "x2": 300, "y2": 300},
+        "checkpoints": [{"x1": 600, "y1": 700, "x2": 600, "y2": 300}],
+    }
+
+
+def kart_at(x, y, angle, speed):
+    sim = Simulation(straight_map(), bots=1)
+    sim.x[0], sim.y[0], sim.angle[0], sim.speed[0] = x, y, angle, speed
+    sim.last_x[0], sim.last_y[0] = x, y
+    return sim
+
+
+def test_wall_push_out():
+    # 10 px du mur, à l'arrêt : poussé de penetration + 2 le long de la normale (0, -1)
+    sim = kart_at(500, 790, 0.0, 0.0)
+    sim._wall_collisions(np.ones(1, dtype=bool), NOW)
+    assert sim.x[0] == pytest.approx(500)
+    assert sim.y[0] == pytest.approx(800 - WALL_CLEARANCE - 2)
+    assert sim.speed[0] == 0
+    assert sim.crashes[0] == 0 and sim.scrapes[0] == 0 and sim.hp[0] == 100
+
+
+def test_wall_crash():
+    # Droit sur le mur à pleine vitesse : dot = -MAX_SPEED, angle_ratio = 1
+    sim = kart_at(500, 790, math.pi / 2, MAX_SPEED)
+    sim._wall_collisions(np.ones(1, dtype=bool), NOW)
+    penetration = WALL_CLEARANCE - 10
+    assert sim.y[0] == pytest.approx(790 - (penetration + 2) - 8)
+    assert sim.speed[0] == pytest.approx(MAX_SPEED * -0.2)
+    assert abs(sim.angle[0] - math.pi / 2) <= 0.1
+    assert sim.crashes[0] == 1
+    assert sim.hp[0] == 100 - math.floor(5 + (MAX_SPEED / MAX_SPEED) * 10)
+
+
+def test_wall_scrape():
+    # Le long du mur à pleine vitesse : vitesse projetée sur le mur * 0.7
+    sim = kart_at(500, 790, 0.0, MAX_SPEED)
+    sim._wall_collisions(np.ones(1, dtype=bool), NOW)
+    assert sim.speed[0] == pytest.approx(MAX_SPEED * 0.7)
+    assert sim.angle[0] == pytest.approx(0.0)
+    assert sim.scrapes[0] == 1 and sim.crashes[0] == 0
+    assert sim.hp[0] == 100 - math.floor(1 + (MAX_SPEED / MAX_SPEED) * 4)
+
+
+def test_no_damage_during_grace_period():
+    sim = kart_at(500, 790, math.pi / 2, MAX_SPEED)
+    sim._wall_collisions(np.ones(1, dtype=bool), GRACE_PERIOD - 1)
+    assert sim.crashes[0] == 1 and sim.hp[0] == 100
+
+
+def cross(sim, x1, x2, y=500, now=NOW):
+    sim.last_x[0], sim.x[0] = x1, x2
+    sim.last_y[0], sim.y[0] = y, y
+    sim._race_progress(np.ones(1, dtype=bool), now)
+
+
+def test_finish_line_starts_the_race():
+    sim = kart_at(290, 500, 0.0, MAX_SPEED)
+    cross(sim, 290, 310)
+    assert sim.passed_start[0] and sim.lap[0] == 1 and sim.next_checkpoint[0] == 0
+
+
+def test_checkpoint_forward_crossing_saves_the_pose():
+    sim = kart_at(590, 500, 0.0, MAX_SPEED)
+    sim.passed_start[0] = True
+    sim.lap[0] = 1
+    cross(sim, 590, 610)
+    assert sim.next_checkpoint[0] == 1
+    assert sim.last_validated[0] == 0
+    assert sim.checkpoint_saved[0, 0]
+    assert sim.checkpoint_poses[0, 0].tolist() == [610, 500, 0.0]
+
+
+def test_checkpoint_backward_crossing_and_cooldown():
+    sim = kart_at(610, 500, math.pi, MAX_SPEED)
+    sim.passed_start[0] = True
+    cross(sim, 610, 590)
+    # Mauvais sens : dot < 0, rien de validé, mais le cooldown démarre
+    assert sim.next_checkpoint[0] == 0 and not sim.checkpoint_saved[0, 0]
+    cross(sim, 590, 610, now=NOW + LINE_COOLDOWN)
+    assert sim.next_checkpoint[0] == 0
+    cross(sim, 610, 590, now=NOW + LINE_COOLDOWN + 1)
+    cross(sim, 590, 610, now=NOW + 2 * LINE_COOLDOWN + 2)
+    assert sim.next_checkpoint[0] == 1
+
+
+def load(name):
+    with open(os.path.join(MAPS_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_baked_respawn_poses_pass_the_server_checks():
+    for name in ("night_city.json", "lava_track.json"):
+        data = load(name)
+        walls = wall_arrays(data["continuousCurves"])
+        edges = zone_edges(data.get("voidZones") or [])
+        table = bake_respawn_table(data)
+        for gate, poses in zip(data["checkpoints"], table["poses"]):
+            poses = np.array(poses, dtype=np.float64).reshape(-1, 3)
+            assert not unsafe_respawn_poses(walls, edges, gate, poses[:, 0], poses[:, 1]).any()
+
+
+def test_respawn_pose_checks_fail_on_bad_poses():
+    data = load("night_city.json")
+    walls = wall_arrays(data["continuousCurves"])
+    edges = zone_edges(data.get("voidZones") or [])
+    gate = data["checkpoints"][13]
+    # Derrière un mur vu de la porte 13, puis sur la porte, à moins de WALL_CLEARANCE d'une extrémité
+    x = np.array([788.67, gate["x1"]], dtype=np.float64)
+    y = np.array([434.92, gate["y1"]], dtype=np.float64)
+    assert unsafe_respawn_poses(walls, edges, gate, x, y).tolist() == [True, True]
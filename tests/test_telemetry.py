@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from maps.telemetry import _parse_lines, ingest_log
+
+
+def record_lines(count, start=0):
+    lines = []
+    for i in range(start, start + count):
+        event = ("position", "crash", "fall")[i % 3]
+        lines.append(json.dumps({"t": i, "map": "m", "player": "p", "event": event,
+                                 "x": (i * 37) % 1500 + 0.5, "y": (i * 53) % 1000 + 0.25}) + "\n")
+    return lines
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+def same_histograms(a, b):
+    return a.keys() == b.keys() and all(np.array_equal(a[kind], b[kind]) for kind in a)
+
+
+def test_merged_invalid_lines_are_counted():
+    records, bad = _parse_lines([b'{"x": 1, "y": 2}', b"[1", b"2]"])
+    assert records == [{"x": 1, "y": 2}]
+    assert bad == 2
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 4096, 1 << 20])
+def test_chunk_boundaries_do_not_change_the_result(tmp_path, chunk_size):
+    log = tmp_path / "log.ndjson"
+    write(log, record_lines(300))
+    expected, expected_stats = ingest_log(str(log), use_cache=False, chunk_size=1 << 20)
+    histograms, stats = ingest_log(str(log), use_cache=False, chunk_size=chunk_size)
+    assert same_histograms(histograms, expected)
+    assert stats["records"] == expected_stats["records"] == 300
+    assert stats["lines"] == 300 and stats["badLines"] == 0
+    assert stats["bytes"] == log.stat().st_size
+
+
+def test_trailing_partial_line_is_left_for_later(tmp_path):
+    log = tmp_path / "log.ndjson"
+    lines = record_lines(50)
+    partial = lines[-1]
+    write(log, lines[:-1] + [partial[:20]])
+    _histograms, stats = ingest_log(str(log), cache_dir=str(tmp_path / "cache"), chunk_size=64)
+    assert stats["records"] == 49 and stats["badLines"] == 0
+    assert stats["bytes"] == len("".join(lines[:-1]).encode("utf-8"))
+
+    # Le serveur termine la ligne : elle est lue à la reprise
+    write(log, [partial[20:]], mode="a")
+    histograms, stats = ingest_log(str(log), cache_dir=str(tmp_path / "cache"), chunk_size=64)
+    assert stats["cached"] == "resumed"
+    assert stats["records"] == 50 and stats["lines"] == 1 and stats["badLines"] == 0
+    assert same_histograms(histograms, ingest_log(str(log), use_cache=False)[0])
+
+
+def test_resuming_an_appended_log(tmp_path):
+    log = tmp_path / "log.ndjson"
+    cache = str(tmp_path / "cache")
+    write(log, record_lines(200))
+    _histograms, stats = ingest_log(str(log), cache_dir=cache)
+    assert stats["cached"] is None and stats["records"] == 200
+
+    _histograms, stats = ingest_log(str(log), cache_dir=cache)
+    assert stats["cached"] == "hit" and stats["lines"] == 0 and stats["records"] == 200
+
+    write(log, record_lines(120, start=200), mode="a")
+    histograms, stats = ingest_log(str(log), cache_dir=cache, chunk_size=333)
+    assert stats["cached"] == "resumed"
+    assert stats["lines"] == 120 and stats["records"] == 320
+    assert same_histograms(histograms, ingest_log(str(log), use_cache=False)[0])
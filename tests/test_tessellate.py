@@ -0,0 +1,37 @@
+import pytest
+
+from maps.bakes.collision_grid import query_collision_grid, verify_collision_grid
+from maps.map_compiler import compile_map
+
+
+def square_map():
+    # Spline fermée par les quatre coins : elle bombe bien au-delà des côtés du carré
+    return {"continuousCurves": [{"points": [[300, 300], [700, 300], [700, 700], [300, 700]],
+                                  "type": "continuous", "closed": True}]}
+
+
+def test_collision_grid_follows_the_tessellated_polyline():
+    baked = compile_map(square_map(), {"tessellate": True, "collisionGrid": True})
+    curves = baked["continuousCurves"]
+    assert len(curves[0]["tessellated"]) > 4
+    assert verify_collision_grid(baked["collisionGrid"], curves, samples=5000) == []
+    # 60 px au-dessus du côté du carré, à quelques px de la courbe dessinée
+    hits = query_collision_grid(baked["collisionGrid"], curves, 500, 240)
+    assert hits and hits[0][1] < len(curves[0]["tessellated"])
+
+    plain = compile_map(square_map(), {"collisionGrid": True})
+    assert query_collision_grid(plain["collisionGrid"], plain["continuousCurves"], 500, 240) == []
+
+
+def test_sdf_follows_the_tessellated_polyline():
+    np = pytest.importorskip("numpy")
+    from maps.bakes.sdf import exact_field, sample_sdf
+    baked = compile_map(square_map(), {"tessellate": True, "sdf": True})
+    polyline = [{"points": curve["tessellated"], "closed": curve["closed"]} for curve in baked["continuousCurves"]]
+    x, y = np.array([500.0, 500.0, 250.0]), np.array([240.0, 500.0, 500.0])
+    expected, _nx, _ny = exact_field(polyline, x, y)
+    plain, _nx, _ny = exact_field(square_map()["continuousCurves"], x, y)
+    for k in range(len(x)):
+        distance = sample_sdf(baked["sdf"], float(x[k]), float(y[k]))[0]
+        assert distance == pytest.approx(expected[k], abs=baked["sdf"]["cellSize"])
+    assert abs(expected[0] - plain[0]) > 20
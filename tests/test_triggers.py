@@ -0,0 +1,68 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+from maps.bakes.triggers import (aabb_crosses_line, bake_triggers, booster_hits, crosses_line, grid_booster_hits,
+                                 grid_entries, grid_first_item_hit, first_item_hit, random_lines, verify_triggers)
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+SHIPPED_MAPS = sorted(glob.glob(os.path.join(MAPS_DIR, "*.json")))
+NO_MISMATCH = {"boosters": 0, "items": 0, "checkpoints": 0, "directions": 0}
+
+
+def baked(data):
+    bake_triggers(data)
+    # Comme le serveur : le document baké est relu depuis le JSON exporté
+    return json.loads(json.dumps(data))
+
+
+def synthetic_document(seed):
+    rng = random.Random(seed)
+    return {"boosters": random_lines(40, rng), "items": random_lines(30, rng),
+            "checkpoints": random_lines(20, rng)}
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("path", SHIPPED_MAPS, ids=os.path.basename)
+def test_shipped_maps_match_brute_force(path, seed):
+    with open(path, "r", encoding="utf-8") as f:
+        data = baked(json.load(f))
+    assert verify_triggers(data, samples=4000, seed=seed) == NO_MISMATCH
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_synthetic_maps_match_brute_force(seed):
+    data = baked(synthetic_document(seed))
+    assert verify_triggers(data, samples=4000, seed=seed) == NO_MISMATCH
+
+
+def test_grid_prunes_candidates():
+    data = baked(synthetic_document(0))
+    grid = data["triggerGrid"]
+    rng = random.Random(0)
+    total = len(data["boosters"]) + len(data["items"])
+    entries = [len(grid_entries(grid, rng.uniform(0, 1000), rng.uniform(0, 1000))) // 2 for _ in range(500)]
+    assert sum(entries) / len(entries) < total / 4
+
+
+def test_line_end_points_and_degenerate_lines():
+    lines = [{"x1": 100, "y1": 100, "x2": 200, "y2": 100},
+             {"x1": 300, "y1": 300, "x2": 300, "y2": 300},
+             {"x1": 400, "y1": 100, "x2": 400, "y2": 250}]
+    data = baked({"boosters": [dict(line) for line in lines], "items": [dict(line) for line in lines],
+                  "checkpoints": [dict(line) for line in lines]})
+    grid = data["triggerGrid"]
+    for line in data["checkpoints"]:
+        for last_x, last_y, x, y in ((line["x1"], line["y1"] - 5, line["x1"], line["y1"] + 5),
+                                     (line["x2"] - 5, line["y2"], line["x2"] + 5, line["y2"]),
+                                     (line["x1"], line["y1"], line["x2"], line["y2"]),
+                                     (line["x1"] + 1, line["y1"] + 1, line["x1"] + 1, line["y1"] + 1)):
+            assert aabb_crosses_line(line, last_x, last_y, x, y) == crosses_line(line, last_x, last_y, x, y)
+    active = [True, False, True]
+    for x, y in ((100, 100), (200, 100), (300, 300), (300, 320), (400, 250), (150, 130), (600, 600)):
+        for last in (-1, 0, 1, 2):
+            assert grid_booster_hits(grid, data["boosters"], x, y, last) == booster_hits(data["boosters"], x, y, last)
+        assert grid_first_item_hit(grid, data["items"], active, x, y) == first_item_hit(data["items"], active, x, y)
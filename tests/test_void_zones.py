@@ -0,0 +1,101 @@
+import glob
+import json
+import os
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from maps.bakes.void_zones import (bake_void_zones, decode_bitmap, falling_zone, falling_zone_exact,
+                                   point_in_polygon, triangulation_error, verify_bitmap, zones_at)
+from maps.game_config import TRACK_HEIGHT, TRACK_WIDTH
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps")
+
+
+def void_zone_maps():
+    paths = []
+    for path in sorted(glob.glob(os.path.join(MAPS_DIR, "*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            if any(zone.get("closed", False) for zone in json.load(f).get("voidZones") or []):
+                paths.append(path)
+    return paths
+
+
+VOID_ZONE_MAPS = void_zone_maps()
+
+
+def load_zones(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["voidZones"]
+
+
+def test_nimbusrush_has_void_zones():
+    assert any(os.path.basename(path) == "nimbusrush.json" for path in VOID_ZONE_MAPS)
+
+
+@pytest.mark.parametrize("path", VOID_ZONE_MAPS, ids=os.path.basename)
+def test_bitmap_matches_even_odd_on_dense_grid(path):
+    void_zones = load_zones(path)
+    _zones, bitmap = bake_void_zones(void_zones)
+    positions, mismatches, mixed = verify_bitmap(bitmap, void_zones, step=1.0)
+    assert mismatches == 0
+    # La plupart des lectures ne retombent pas sur le test exact
+    assert mixed < positions * 0.05
+
+
+@pytest.mark.parametrize("path", VOID_ZONE_MAPS, ids=os.path.basename)
+def test_bitmap_cells_match_point_in_polygon(path):
+    void_zones = load_zones(path)
+    zones, bitmap = bake_void_zones(void_zones)
+    cells = decode_bitmap(bitmap)
+    rng = random.Random(1)
+    for _ in range(3000):
+        zone = rng.choice(zones)
+        aabb = zone["aabb"]
+        x = rng.uniform(aabb[0] - 10, aabb[2] + 10)
+        y = rng.uniform(aabb[1] - 10, aabb[3] + 10)
+        expected = [i for i, z in enumerate(void_zones)
+                    if z.get("closed", False) and point_in_polygon(x, y, z["points"])]
+        assert zones_at(bitmap, cells, zones, x, y) == expected
+
+
+@pytest.mark.parametrize("path", VOID_ZONE_MAPS, ids=os.path.basename)
+def test_falling_zone_matches_server_loop(path):
+    zones, bitmap = bake_void_zones(load_zones(path))
+    cells = decode_bitmap(bitmap)
+    rng = random.Random(0)
+    falls = 0
+    for _ in range(2000):
+        if rng.random() < 0.7:
+            aabb = rng.choice(zones)["aabb"]
+            x, y = rng.uniform(aabb[0] - 20, aabb[2] + 20), rng.uniform(aabb[1] - 20, aabb[3] + 20)
+        else:
+            x, y = rng.uniform(20, TRACK_WIDTH - 20), rng.uniform(20, TRACK_HEIGHT - 20)
+        expected = falling_zone_exact(zones, x, y)
+        falls += expected is not None
+        assert falling_zone(bitmap, cells, zones, x, y) == expected
+    assert falls
+
+
+@pytest.mark.parametrize("path", VOID_ZONE_MAPS, ids=os.path.basename)
+def test_triangulation_covers_zone(path):
+    zones, _bitmap = bake_void_zones(load_zones(path))
+    for zone in zones:
+        # Liste plate de 3 indices par triangle ; les sommets alignés n'en créent pas
+        assert zone["triangles"] and len(zone["triangles"]) % 3 == 0
+        assert len(zone["triangles"]) <= 3 * (len(zone["points"]) - 2)
+        assert triangulation_error(zone["points"], zone["triangles"]) < 1e-3
+
+
+def test_concave_and_overlapping_zones():
+    void_zones = [
+        {"points": [[100, 100], [300, 100], [300, 300], [200, 150], [100, 300]], "closed": True},
+        {"points": [[250, 250], [400, 250], [400, 400], [250, 400]], "closed": True},
+        {"points": [[500, 500], [600, 500], [600, 600]], "closed": False},
+    ]
+    _zones, bitmap = bake_void_zones(void_zones)
+    _positions, mismatches, mixed = verify_bitmap(bitmap, void_zones, step=0.5)
+    assert mismatches == 0
+    assert mixed